@@ -1,30 +1,55 @@
 from __future__ import annotations
 from typing import List, Optional
-from fastapi import FastAPI, Query, HTTPException, Depends, Header
+from fastapi import FastAPI, Query, HTTPException, Depends, Header, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from sqlalchemy import select, func
+from pydantic_core import to_jsonable_python
+from sqlalchemy import select, func, or_, and_, case, literal_column, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
+import asyncio
+import base64
+import hashlib
+import json
+from operator import itemgetter
+import time
 import yaml
 
-from .db import SessionLocal, engine
-from .models import News
-from .ingest import ensure_schema
+from .db import ReadSessionLocal, engine, read_engine
+from .models import AppMeta, News, NewsTag
+from .ingest import ensure_schema, NEWS_VERSION_KEY
+from .cache import response_cache
+from . import compression, export, metrics, stats, stream
 from .config import settings
-from .middleware import RateLimiter, RequestLogger
+from .utils import as_utc
+from .middleware import Compression, RateLimiter, RequestLogger
+from .logging_util import get_logger
+
+log = get_logger("api")
 
 app = FastAPI(title="Commodities News API", version="1.0.0")
-# Request logging & rate limiting
+# Request logging & rate limiting; compression sits innermost, next to the app
+app.add_middleware(Compression)
 app.add_middleware(RequestLogger)
 app.add_middleware(RateLimiter)
 
 # CORS
+_EXPOSE_HEADERS = ["X-Next-Cursor", "ETag", "X-Cache"]
 _origins = [o.strip() for o in (settings.CORS_ORIGINS or "*").split(",")] if settings.CORS_ORIGINS else ["*"]
 if _origins == ["*"]:
-    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"], expose_headers=_EXPOSE_HEADERS)
 else:
-    app.add_middleware(CORSMiddleware, allow_origins=_origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+    app.add_middleware(CORSMiddleware, allow_origins=_origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"], expose_headers=_EXPOSE_HEADERS)
+
+
+# Generated tsvector column created by migrations.add_search_tsv (PostgreSQL only, not mapped on the model)
+_SEARCH_TSV = literal_column("news.search_tsv")
+_HEADLINE_OPTS = "StartSel=<b>, StopSel=</b>, MaxWords=35, MinWords=15, MaxFragments=2"
+_fts_enabled = False
+# Last news_version seen in app_meta and when it was read (monotonic seconds)
+_data_version: Optional[int] = None
+_version_checked = 0.0
 
 
 class NewsOut(BaseModel):
@@ -37,12 +62,15 @@ class NewsOut(BaseModel):
     content: str
     language: str
     tags: str
+    cluster_id: Optional[int] = None
+    headline: Optional[str] = None
 
     class Config:
         from_attributes = True
 
 async def get_session() -> AsyncSession:
-    async with SessionLocal() as session:
+    # The API only reads: sessions come from the replica engine when DATABASE_READ_URL is set
+    async with ReadSessionLocal() as session:
         yield session
 
 
@@ -68,6 +96,16 @@ async def startup():
     except Exception:
         pass
     await ensure_schema(engine)
+    global _fts_enabled
+    _fts_enabled = await _detect_fts()
+
+async def _detect_fts() -> bool:
+    if (settings.SEARCH_BACKEND or "auto").lower() == "like" or engine.dialect.name != "postgresql":
+        return False
+    from sqlalchemy import inspect
+    async with read_engine.connect() as conn:
+        cols = await conn.run_sync(lambda c: {col["name"] for col in inspect(c).get_columns("news")})
+    return "search_tsv" in cols
 
 @app.get("/health")
 async def health():
@@ -84,76 +122,442 @@ async def sources():
     except Exception as e:
         raise HTTPException(500, f"Could not read sources.yml: {e}")
 
-@app.get("/news", response_model=List[NewsOut])
-async def list_news(
-    q: Optional[str] = Query(None, description="Full-text query over title/summary/content (simple LIKE search)"),
-    source: Optional[str] = Query(None, description="Exact source_name"),
-    lang: Optional[str] = Query(None, description="Language code filter (e.g., tr/en)"),
-    tag: Optional[str] = Query(None, description="Contains tag text"),
-    published_from: Optional[datetime] = Query(None, description="ISO date lower bound (inclusive)"),
-    published_to: Optional[datetime] = Query(None, description="ISO date upper bound (exclusive)"),
-    limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
-    order: str = Query("desc", pattern="^(asc|desc)$"),
-    session: AsyncSession = Depends(get_session),
-):
-    stmt = select(News)
+def _fts_query(q: str):
+    # Match either stemming: Turkish rows are indexed with the turkish config, the rest with english
+    return func.websearch_to_tsquery(literal_column("'english'::regconfig"), q).op("||")(
+        func.websearch_to_tsquery(literal_column("'turkish'::regconfig"), q)
+    )
+
+def _use_fts(search: str) -> bool:
+    if search == "like":
+        return False
+    if search == "fts" and not _fts_enabled:
+        raise HTTPException(400, "Full-text search is not available on this database")
+    return _fts_enabled
+
+_NEWS_FIELDS = [f for f in NewsOut.model_fields if f != "headline"]
+
+
+def _news_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(_NEWS_FIELDS)
+    wanted = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = wanted.difference(_NEWS_FIELDS)
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [f for f in _NEWS_FIELDS if f in wanted or f == "id"]
+
+def _tag_list(tag: Optional[str], tags: Optional[List[str]]) -> List[str]:
+    out = []
+    for raw in ([tag] if tag else []) + list(tags or []):
+        out.extend(t.strip().lower() for t in raw.split(",") if t.strip())
+    return sorted(set(out))
+
+def _tag_filter(tags: List[str], mode: str = "any"):
+    # Exact matches through the news_tags (tag, news_id) index instead of a substring scan over News.tags
+    sub = select(NewsTag.news_id).where(NewsTag.tag.in_(tags) if len(tags) > 1 else NewsTag.tag == tags[0])
+    if mode == "all" and len(tags) > 1:
+        sub = sub.group_by(NewsTag.news_id).having(func.count(NewsTag.tag) == len(tags))
+    return News.id.in_(sub)
+
+def _filters(q, source, lang, tags, published_from, published_to, fts: bool, tag_mode: str = "any"):
     conds = []
+    tsq = None
     if source:
         conds.append(News.source_name == source)
     if lang:
         conds.append(News.language == lang)
-    if tag:
-        conds.append(News.tags.ilike(f"%{tag}%"))
+    if tags:
+        conds.append(_tag_filter(tags, tag_mode))
     if published_from:
         conds.append(News.published_at >= published_from)
     if published_to:
         conds.append(News.published_at < published_to)
     if q:
-        like = f"%{q}%"
-        from sqlalchemy import or_
-        conds.append(or_(News.title.ilike(like), News.summary.ilike(like), News.content.ilike(like)))
+        if fts:
+            tsq = _fts_query(q)
+            conds.append(_SEARCH_TSV.op("@@")(tsq))
+        else:
+            like = f"%{q}%"
+            conds.append(or_(News.title.ilike(like), News.summary.ilike(like), News.content.ilike(like)))
+    return conds, tsq
+
+def _collapse(conds):
+    # Representative (lowest id) of every cluster among the filtered rows; pre-clustering rows count as their own
+    heads = select(func.min(News.id)).group_by(func.coalesce(News.cluster_id, News.id))
     if conds:
-        from sqlalchemy import and_ as _and
-        stmt = stmt.where(_and(*conds))
-    if order.lower() == "desc":
-        stmt = stmt.order_by(News.id.desc())
+        heads = heads.where(and_(*conds))
+    return News.id.in_(heads)
+
+def _encode_cursor(sort: str, order: str, row) -> str:
+    data = {"s": sort, "o": order, "id": row.id}
+    if sort == "published_at":
+        data["p"] = as_utc(row.published_at).isoformat()
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, sort: str, order: str):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        last_id = int(data["id"])
+        last_pub = datetime.fromisoformat(data["p"]) if sort == "published_at" else None
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+    if data.get("s") != sort or data.get("o") != order:
+        raise HTTPException(400, "Cursor was issued for a different sort/order")
+    return last_id, last_pub
+
+def _keyset(sort: str, order: str, last_id: int, last_pub):
+    # Row-value comparison keeps deep pages on the (published_at, id) / primary key index
+    if sort == "published_at":
+        key, val = tuple_(News.published_at, News.id), tuple_(last_pub, last_id)
     else:
-        stmt = stmt.order_by(News.id.asc())
-    stmt = stmt.limit(limit).offset(offset)
-    result = await session.execute(stmt)
-    rows = result.scalars().all()
-    return [NewsOut.model_validate(r) for r in rows]
+        key, val = News.id, last_id
+    return key < val if order == "desc" else key > val
+
+async def _sync_data_version(session: AsyncSession):
+    # Ingest may run in another process: poll its counter (at most every RESPONSE_CACHE_VERSION_CHECK s)
+    global _data_version, _version_checked
+    now = time.monotonic()
+    if now - _version_checked < settings.RESPONSE_CACHE_VERSION_CHECK:
+        return
+    _version_checked = now
+    try:
+        v = (await session.execute(select(AppMeta.value).where(AppMeta.key == NEWS_VERSION_KEY))).scalar_one_or_none()
+    except Exception as e:
+        log.warning(f"news_version check failed, dropping response cache: {e}")
+        await session.rollback()
+        response_cache.clear()
+        return
+    if v != _data_version:
+        _data_version = v
+        response_cache.clear()
+
+_orjson = None
+
+def _dumps(payload) -> bytes:
+    # Same bytes as a response_model (pydantic JSON mode): UTC datetimes end in "Z", not "+00:00".
+    # orjson when installed: row dicts (datetimes included) go straight to bytes
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson  # type: ignore
+            _orjson = orjson
+        except Exception:
+            _orjson = False
+    if _orjson:
+        return _orjson.dumps(payload, default=to_jsonable_python, option=_orjson.OPT_UTC_Z)
+    return json.dumps(payload, default=to_jsonable_python, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _etag_match(request: Request, etag: str) -> Optional[str]:
+    # The If-None-Match token that matches etag (weak comparison); the per-coding suffix the compression
+    # middleware adds ("…-gzip") names the same representation before encoding
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return None
+    for token in (t.strip() for t in inm.split(",")):
+        if token == "*":
+            return etag
+        base = token[2:] if token.startswith("W/") else token
+        for suffix in compression.ETAG_SUFFIXES:
+            if base.endswith(f'{suffix}"'):
+                base = base[:-len(suffix) - 1] + '"'
+                break
+        if base == etag:
+            return token
+    return None
+
+_ETAG_VERSION = 2  # bump when the /news item format changes
+
+def _window_etag(key, n, max_id, sum_id, max_fetched) -> str:
+    # Strong validator of a /news page: the query plus its row set (count, max and sum of ids) and the newest
+    # fetched_at in it (save_items bumps fetched_at when it rewrites a row)
+    fetched = as_utc(max_fetched).isoformat() if max_fetched else ""
+    raw = repr((_ETAG_VERSION, key, int(n), max_id, int(sum_id or 0), fetched))
+    return f'"{hashlib.sha1(raw.encode("utf-8")).hexdigest()}"'
+
+async def _cached(request: Request, session: AsyncSession, key, build, validate=None) -> Response:
+    # build() -> (JSON-able payload, extra headers); the serialized body and its ETag are cached together.
+    # build may set the ETag itself; validate() then computes the same ETag cheaply, so a conditional request
+    # that misses the cache can still be answered with 304 before build() runs.
+    entry = None
+    if settings.RESPONSE_CACHE_ENABLED:
+        await _sync_data_version(session)
+        entry = response_cache.get(key)
+    state = "HIT"
+    if entry is None:
+        state = "MISS" if settings.RESPONSE_CACHE_ENABLED else "BYPASS"
+        if validate is not None and request.headers.get("if-none-match"):
+            matched = _etag_match(request, await validate())
+            if matched:
+                return Response(status_code=304, headers={"ETag": matched, "X-Cache": "VALIDATED"})
+        payload, headers = await build()
+        body = _dumps(payload)
+        etag = headers.pop("ETag", None) or f'"{hashlib.sha1(body).hexdigest()}"'
+        entry = (body, etag, headers)
+        if settings.RESPONSE_CACHE_ENABLED:
+            response_cache.set(key, entry)
+    body, etag, headers = entry
+    headers = {**headers, "ETag": etag, "X-Cache": state}
+    matched = _etag_match(request, etag)
+    if matched:
+        return Response(status_code=304, headers={**headers, "ETag": matched})
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/cache/stats", dependencies=[Depends(api_key_auth)])
+async def cache_stats():
+    return {"enabled": settings.RESPONSE_CACHE_ENABLED, "data_version": _data_version, **response_cache.stats()}
+
+@app.get("/metrics", dependencies=[Depends(api_key_auth)])
+async def metrics_endpoint():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(404, "Metrics are disabled")
+    return Response(metrics.render(metrics.API), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/news", response_model=List[NewsOut], response_model_exclude_unset=True)
+async def list_news(
+    request: Request,
+    q: Optional[str] = Query(None, description="Search over title/summary/content (PostgreSQL full-text search, LIKE elsewhere)"),
+    source: Optional[str] = Query(None, description="Exact source_name"),
+    lang: Optional[str] = Query(None, description="Language code filter (e.g., tr/en)"),
+    tag: Optional[str] = Query(None, description="Exact tag"),
+    tags: Optional[List[str]] = Query(None, description="Exact tags (repeat or comma-separate), combined with tag"),
+    tag_mode: str = Query("any", pattern="^(any|all)$", description="Match any or all of the given tags"),
+    published_from: Optional[datetime] = Query(None, description="ISO date lower bound (inclusive)"),
+    published_to: Optional[datetime] = Query(None, description="ISO date upper bound (exclusive)"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    order: str = Query("desc", pattern="^(asc|desc|rank)$", description="rank = relevance order for q (full-text search only)"),
+    sort: str = Query("id", pattern="^(id|published_at)$", description="Sort key for asc/desc"),
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor value from the previous page (keyset pagination)"),
+    search: str = Query("auto", pattern="^(auto|fts|like)$", description="Search backend for q"),
+    highlight: bool = Query(False, description="Return a highlighted summary fragment in 'headline' (full-text search only)"),
+    collapse: Optional[str] = Query(None, pattern="^cluster$", description="cluster = one item (the earliest match) per near-duplicate cluster"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of the item fields, e.g. id,title,url,published_at (id is always included)"),
+    session: AsyncSession = Depends(get_session),
+):
+    order = order.lower()
+    tag_list = _tag_list(tag, tags)
+    key = ("news", q, source, lang, tuple(tag_list), tag_mode, published_from, published_to,
+           limit, offset, order, sort, cursor, search, highlight, collapse, fields)
+
+    def window(cols):
+        # The page's statement for any column list: the rows themselves, or the few columns validate() needs
+        conds, tsq = _filters(q, source, lang, tag_list, published_from, published_to,
+                              _use_fts(search) if q else False, tag_mode)
+        ranked = order == "rank" and tsq is not None
+        if collapse:
+            conds = [_collapse(conds)]
+        if cursor:
+            if ranked or order == "rank":
+                raise HTTPException(400, "cursor cannot be combined with order=rank")
+            if offset:
+                raise HTTPException(400, "cursor cannot be combined with offset")
+            conds.append(_keyset(sort, order, *_decode_cursor(cursor, sort, order)))
+        if tsq is not None and highlight:
+            cfg = case((News.language == "tr", literal_column("'turkish'::regconfig")), else_=literal_column("'english'::regconfig"))
+            cols = cols + [func.ts_headline(cfg, News.summary, tsq, _HEADLINE_OPTS).label("headline")]
+        stmt = select(*cols)
+        if conds:
+            stmt = stmt.where(and_(*conds))
+        if ranked:
+            stmt = stmt.order_by(func.ts_rank_cd(_SEARCH_TSV, tsq).desc(), News.id.desc())
+        else:
+            keys = [News.published_at, News.id] if sort == "published_at" else [News.id]
+            stmt = stmt.order_by(*[k.asc() if order == "asc" else k.desc() for k in keys])
+        return stmt.limit(limit).offset(offset), ranked
+
+    async def validate():
+        stmt, _ = window([News.id, News.fetched_at])
+        w = stmt.subquery()
+        agg = select(func.count(), func.max(w.c.id), func.sum(w.c.id), func.max(w.c.fetched_at))
+        return _window_etag(key, *(await session.execute(agg)).one())
+
+    async def build():
+        names = _news_fields(fields)
+        # Plain column tuples, no ORM entities; published_at (cursor) and fetched_at (ETag) ride along
+        selected = names + [n for n in ("published_at", "fetched_at") if n not in names]
+        stmt, ranked = window([getattr(News, n) for n in selected])
+        idx = list(range(len(names)))
+        if len(stmt.selected_columns) > len(selected):
+            names, idx = names + ["headline"], idx + [len(selected)]
+        pick = itemgetter(*idx) if len(idx) > 1 else (lambda r: (r[0],))
+        rows = (await session.execute(stmt)).all()
+        headers = {}
+        if not ranked and order != "rank" and len(rows) == limit:
+            headers["X-Next-Cursor"] = _encode_cursor(sort, order, rows[-1])
+        ids = [r.id for r in rows]
+        fetched = [r.fetched_at for r in rows if r.fetched_at is not None]
+        headers["ETag"] = _window_etag(key, len(rows), max(ids, default=None), sum(ids),
+                                       max(fetched, key=as_utc, default=None))
+        return [dict(zip(names, pick(r))) for r in rows], headers
+
+    return await _cached(request, session, key, build, validate)
 
 @app.get("/news/count")
 async def count_news(
+    request: Request,
     q: Optional[str] = None,
     source: Optional[str] = None,
     lang: Optional[str] = None,
     tag: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    tag_mode: str = Query("any", pattern="^(any|all)$"),
     published_from: Optional[datetime] = None,
     published_to: Optional[datetime] = None,
+    search: str = Query("auto", pattern="^(auto|fts|like)$"),
+    collapse: Optional[str] = Query(None, pattern="^cluster$"),
     session: AsyncSession = Depends(get_session),
 ):
-    stmt = select(func.count(News.id))
-    conds = []
-    if source:
-        conds.append(News.source_name == source)
-    if lang:
-        conds.append(News.language == lang)
-    if tag:
-        conds.append(News.tags.ilike(f"%{tag}%"))
-    if published_from:
-        conds.append(News.published_at >= published_from)
-    if published_to:
-        conds.append(News.published_at < published_to)
-    if q:
-        like = f"%{q}%"
-        from sqlalchemy import or_
-        conds.append(or_(News.title.ilike(like), News.summary.ilike(like), News.content.ilike(like)))
+    tag_list = _tag_list(tag, tags)
+    key = ("count", q, source, lang, tuple(tag_list), tag_mode, published_from, published_to, search, collapse)
+
+    async def build():
+        if collapse:
+            stmt = select(func.count(func.distinct(func.coalesce(News.cluster_id, News.id))))
+        else:
+            stmt = select(func.count(News.id))
+        conds, _ = _filters(q, source, lang, tag_list, published_from, published_to,
+                            _use_fts(search) if q else False, tag_mode)
+        if conds:
+            stmt = stmt.where(and_(*conds))
+        result = await session.execute(stmt)
+        total = result.scalar_one()
+        return {"count": int(total)}, {}
+
+    return await _cached(request, session, key, build)
+
+@app.get("/news/stats")
+async def news_stats(
+    request: Request,
+    interval: str = Query("day", pattern="^(hour|day)$", description="Bucket size (UTC)"),
+    group_by: Optional[List[str]] = Query(None, description="source, language and/or tag (repeat or comma-separate); default all three"),
+    source: Optional[str] = None,
+    lang: Optional[str] = None,
+    tag: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None, description="Exact tags; counts are always split per tag"),
+    published_from: Optional[datetime] = Query(None, description="Rounded down to the start of its bucket"),
+    published_to: Optional[datetime] = Query(None, description="Buckets starting before this time"),
+    limit: int = Query(10000, ge=1, le=100000),
+    session: AsyncSession = Depends(get_session),
+):
+    # Story counts per bucket from the news_stats rollup: no scan of news, whatever the range
+    dims = []
+    for raw in group_by if group_by is not None else ["source,language,tag"]:
+        for d in (x.strip().lower() for x in raw.split(",")):
+            if d and d not in stats.DIMENSIONS:
+                raise HTTPException(400, f"Unknown group_by '{d}' (source, language, tag)")
+            if d and d not in dims:
+                dims.append(d)
+    tag_list = _tag_list(tag, tags)
+    key = ("stats", interval, tuple(dims), source, lang, tuple(tag_list), published_from, published_to, limit)
+
+    async def build():
+        stmt, cols = stats.query(interval, dims, source, lang, tag_list, published_from, published_to, limit)
+        names = ["bucket"] + [stats.DIMENSIONS[d].key for d in cols] + ["count"]
+        result = await session.execute(stmt)
+        buckets = [dict(zip(names, row)) for row in result.all()]
+        for b in buckets:
+            b["bucket"] = as_utc(b["bucket"]).isoformat()
+            b["count"] = int(b["count"])
+        return {"interval": interval, "group_by": cols, "buckets": buckets}, {}
+
+    return await _cached(request, session, key, build)
+
+@app.get("/news/export", dependencies=[Depends(api_key_auth)])
+async def export_news(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|arrow|parquet)$", description="ndjson | csv | arrow (IPC stream) | parquet"),
+    q: Optional[str] = None,
+    source: Optional[str] = None,
+    lang: Optional[str] = None,
+    tag: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    tag_mode: str = Query("any", pattern="^(any|all)$"),
+    published_from: Optional[datetime] = None,
+    published_to: Optional[datetime] = None,
+    search: str = Query("auto", pattern="^(auto|fts|like)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Order by id"),
+):
+    # Whole result set, streamed from a server-side cursor; no limit/offset
+    if export.needs_pyarrow(format) and not export.pyarrow_available():
+        raise HTTPException(400, f"format={format} needs pyarrow installed on the server")
+    conds, _ = _filters(q, source, lang, _tag_list(tag, tags), published_from, published_to,
+                        _use_fts(search) if q else False, tag_mode)
+    stmt = select(*[getattr(News, c) for c in export.COLUMNS])
     if conds:
-        from sqlalchemy import and_ as _and
-        stmt = stmt.where(_and(*conds))
+        stmt = stmt.where(and_(*conds))
+    stmt = stmt.order_by(News.id.asc() if order == "asc" else News.id.desc())
+    media_type, ext = export.FORMATS[format]
+    return StreamingResponse(
+        export.stream_export(stmt, format, settings.EXPORT_BATCH_SIZE),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="news.{ext}"'},
+    )
+
+class _StreamResponse(StreamingResponse):
+    # Frees the subscriber slot however the response ends, even when the client left before the body started
+    def __init__(self, sub, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sub = sub
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            stream.hub.unsubscribe(self.sub)
+
+@app.get("/news/stream")
+async def stream_news(
+    request: Request,
+    source: Optional[str] = None,
+    lang: Optional[str] = None,
+    tag: Optional[str] = None,
+    tags: Optional[List[str]] = Query(None),
+    tag_mode: str = Query("any", pattern="^(any|all)$"),
+    last_event_id: Optional[str] = Query(None, description="Resume after this event id (same as the Last-Event-ID header)"),
+):
+    # Server-sent events: news.created / news.updated as the ingestor commits them
+    if stream.hub.subscribers >= settings.STREAM_MAX_SUBSCRIBERS:
+        raise HTTPException(503, "Too many stream subscribers")
+    resume = stream.parse_event_id(last_event_id or request.headers.get("last-event-id"))
+    tag_list = _tag_list(tag, tags)
+    # Reserved right after the check (no await in between), so concurrent connects can't overshoot the cap
+    sub = stream.hub.subscribe(source, lang, tag_list, tag_mode)
+
+    async def events():
+        try:
+            yield f"retry: {int(settings.STREAM_RETRY_MS)}\n\n".encode()
+            if resume is not None:
+                conds, _ = _filters(None, source, lang, tag_list, None, None, False, tag_mode)
+                for frame in await stream.replay(conds, *resume):
+                    yield frame
+            while not sub.closed:
+                try:
+                    yield await asyncio.wait_for(sub.queue.get(), timeout=settings.STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+            # Fell behind: drain what was queued and end; the client reconnects with Last-Event-ID
+            while not sub.queue.empty():
+                yield sub.queue.get_nowait()
+        finally:
+            stream.hub.unsubscribe(sub)
+
+    return _StreamResponse(sub, events(), media_type="text/event-stream",
+                           headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stream.hub.stop()
+    if read_engine is not engine:
+        await read_engine.dispose()
+    await engine.dispose()
+
+@app.get("/tags")
+async def list_tags(
+    limit: int = Query(100, ge=1, le=1000),
+    session: AsyncSession = Depends(get_session),
+):
+    # GROUP BY on the leading column of ix_news_tags_tag_news_id: an index-only scan, no news table access
+    n = func.count(NewsTag.news_id).label("count")
+    stmt = select(NewsTag.tag, n).group_by(NewsTag.tag).order_by(n.desc(), NewsTag.tag).limit(limit)
     result = await session.execute(stmt)
-    total = result.scalar_one()
-    return {"count": int(total)}
+    return {"tags": [{"tag": t, "count": int(c)} for t, c in result.all()]}
@@ -0,0 +1,126 @@
+from __future__ import annotations
+import gzip
+import zlib
+from typing import Dict, List, Optional
+
+from .cache import TTLCache
+from .config import settings
+from .logging_util import get_logger
+
+log = get_logger("compression")
+
+# Content codings for API responses. gzip is always there; br and zstd need the optional brotli / zstandard
+# packages and are skipped (with one log line) when they aren't installed.
+
+COMPRESSIBLE = ("application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html")
+ETAG_SUFFIXES = ("-zstd", "-br", "-gzip")  # appended to a strong ETag per coding; api strips them to compare
+
+
+class _Gzip:
+    def __init__(self):
+        self._z = zlib.compressobj(settings.COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def end(self) -> bytes:
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        import brotli  # type: ignore
+        self._c = brotli.Compressor(quality=settings.COMPRESS_BROTLI_QUALITY)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def end(self) -> bytes:
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        import zstandard  # type: ignore
+        self._zstd = zstandard
+        self._c = zstandard.ZstdCompressor(level=settings.COMPRESS_ZSTD_LEVEL).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.compress(data) + self._c.flush(self._zstd.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def end(self) -> bytes:
+        return self._c.flush()
+
+
+def _gzip_body(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=settings.COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def _brotli_body(body: bytes) -> bytes:
+    import brotli  # type: ignore
+    return brotli.compress(body, quality=settings.COMPRESS_BROTLI_QUALITY)
+
+
+def _zstd_body(body: bytes) -> bytes:
+    import zstandard  # type: ignore
+    return zstandard.ZstdCompressor(level=settings.COMPRESS_ZSTD_LEVEL).compress(body)
+
+
+# coding -> (whole-body compressor, streaming compressor class, module it needs)
+_CODECS = {
+    "zstd": (_zstd_body, _Zstd, "zstandard"),
+    "br": (_brotli_body, _Brotli, "brotli"),
+    "gzip": (_gzip_body, _Gzip, None),
+}
+
+
+def available_encodings() -> List[str]:
+    # Server preference order from COMPRESS_ENCODINGS, minus codings whose package is missing
+    out = []
+    for name in (e.strip().lower() for e in (settings.COMPRESS_ENCODINGS or "").split(",")):
+        if name not in _CODECS or name in out:
+            continue
+        module = _CODECS[name][2]
+        if module:
+            try:
+                __import__(module)
+            except Exception:
+                log.info(f"{name} compression disabled: {module} is not installed")
+                continue
+        out.append(name)
+    return out
+
+
+def negotiate(accept_encoding: str, offered: List[str]) -> Optional[str]:
+    # Highest q-value among the offered codings; ties go to the server's order. "*" covers unnamed codings.
+    if not accept_encoding or not offered:
+        return None
+    q: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        q[name.strip()] = weight
+    best, best_q = None, 0.0
+    for name in offered:
+        weight = q.get(name, q.get("*", 0.0))
+        if weight > best_q:
+            best, best_q = name, weight
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return _CODECS[encoding][0](body)
+
+
+def stream(encoding: str):
+    return _CODECS[encoding][1]()
+
+
+# (strong ETag, coding) -> compressed body, so popular cached pages are compressed once, not per request
+compressed_cache = TTLCache(settings.COMPRESS_CACHE_MAX_ENTRIES, settings.COMPRESS_CACHE_TTL)
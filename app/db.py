@@ -13,6 +13,37 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 from sqlalchemy.orm import declarative_base
 from .config import settings
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True)
+
+def engine_options(url: str) -> dict:
+    opts = {"echo": False, "future": True, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if not url.startswith("sqlite"):
+        opts.update(pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW,
+                    pool_timeout=settings.DB_POOL_TIMEOUT, pool_recycle=settings.DB_POOL_RECYCLE)
+    if "+asyncpg" in url:
+        # Server-side prepared statements per connection for the fixed /news, /news/count and ingest shapes;
+        # asyncpg's own cache goes off too when disabled (pgbouncer transaction pooling)
+        size = max(0, settings.DB_STATEMENT_CACHE_SIZE)
+        opts["connect_args"] = {"prepared_statement_cache_size": size, **({} if size else {"statement_cache_size": 0})}
+    return opts
+
+
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 SessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, autoflush=False, class_=AsyncSession)
+# Read-only API traffic (list/count/stats/export) goes to DATABASE_READ_URL when set; writes, migrations and the
+# LISTEN connection of the news stream always use the primary
+read_engine = create_async_engine(settings.DATABASE_READ_URL, **engine_options(settings.DATABASE_READ_URL)) \
+    if settings.DATABASE_READ_URL else engine
+ReadSessionLocal = async_sessionmaker(bind=read_engine, expire_on_commit=False, autoflush=False, class_=AsyncSession) \
+    if read_engine is not engine else SessionLocal
 Base = declarative_base()
+
+
+def dialect_insert(dialect_name: str):
+    # INSERT construct with ON CONFLICT support, or None when the backend has no portable upsert
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
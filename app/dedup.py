@@ -0,0 +1,164 @@
+from __future__ import annotations
+import hashlib
+import random
+import re
+import struct
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .logging_util import get_logger
+from .models import News, NewsLSH
+from .tagging import normalize
+from .utils import as_utc
+
+log = get_logger("dedup")
+
+# 32 MinHash values in 8 LSH bands of 4: pairs with Jaccard 0.8 share a band ~98.5% of the time, 0.5 ~40%,
+# and every candidate is verified against the signature before it counts as a duplicate
+PERMUTATIONS = 32
+BANDS = 8
+ROWS = PERMUTATIONS // BANDS
+MIN_TOKENS = 3  # shorter headlines ("Gold") are too generic to cluster on
+
+_PRIME = (1 << 61) - 1
+_rnd = random.Random(0x5EED)  # fixed: signatures are stored and compared across processes and restarts
+_COEFFS = [(_rnd.randrange(1, _PRIME), _rnd.randrange(0, _PRIME)) for _ in range(PERMUTATIONS)]
+_SIG = struct.Struct(f">{PERMUTATIONS}I")
+
+_WORD = re.compile(r"\w{2,}")
+# Google News and aggregators append " - Publisher" / " | Site" to headlines
+_PUBLISHER_TAIL = re.compile(r"\s+[-–—|]\s+[^-–—|]{1,60}$")
+_STOPWORDS = frozenset(
+    "the a an and or of to in on at for by with from as is are was were be its it this that after amid over "
+    "ve ile bir bu da de için gibi daha çok en ki mi ne olarak sonra".split()
+)
+
+
+def tokens(title: str, summary: str = "", lang: str = "") -> FrozenSet[str]:
+    # The headline carries the story; summaries differ per publisher, so they only pad very short titles
+    def words(text: str) -> List[str]:
+        return [w for w in _WORD.findall(normalize(text, lang)) if w not in _STOPWORDS]
+    toks = words(_PUBLISHER_TAIL.sub("", title or ""))
+    if len(toks) < MIN_TOKENS + 1 and summary:
+        toks += words(summary)[:8]
+    return frozenset(toks)
+
+
+def _h64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big") % _PRIME
+
+
+def signature(title: str, summary: str = "", lang: str = "") -> Optional[bytes]:
+    toks = tokens(title, summary, lang)
+    if len(toks) < MIN_TOKENS:
+        return None
+    hs = [_h64(t) for t in toks]
+    return _SIG.pack(*(min((a * x + b) % _PRIME for x in hs) & 0xFFFFFFFF for a, b in _COEFFS))
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    # Estimated Jaccard similarity of the two token sets
+    return _agree(_SIG.unpack(a), _SIG.unpack(b))
+
+
+def _agree(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / PERMUTATIONS
+
+
+def buckets(sig: bytes) -> List[int]:
+    vals = _SIG.unpack(sig)
+    out = []
+    for band in range(BANDS):
+        v = 0
+        for x in vals[band * ROWS:(band + 1) * ROWS]:
+            v = ((v * 1000003) ^ x) & 0xFFFFFFFF
+        out.append((band << 32) | v)
+    return out
+
+
+class LSHIndex:
+    # In-memory variant of the news_lsh table (migration backfill, benchmarks)
+    def __init__(self):
+        self._buckets: Dict[int, List[int]] = defaultdict(list)  # bucket -> entry ids
+        self._entries: List[Tuple[Tuple[int, ...], int]] = []  # (signature values, cluster_id)
+
+    def match(self, sig: bytes) -> Optional[int]:
+        vals = _SIG.unpack(sig)
+        seen = set()
+        best: Optional[Tuple[float, int]] = None
+        for b in buckets(sig):
+            for e in self._buckets.get(b, ()):
+                if e in seen:
+                    continue
+                seen.add(e)
+                other, cid = self._entries[e]
+                s = _agree(vals, other)
+                if s >= settings.DEDUP_THRESHOLD and (best is None or (-s, cid) < best):
+                    best = (-s, cid)
+        return best[1] if best else None
+
+    def add(self, sig: bytes, cluster_id: int):
+        self._entries.append((_SIG.unpack(sig), cluster_id))
+        for b in buckets(sig):
+            self._buckets[b].append(len(self._entries) - 1)
+
+
+def _window() -> timedelta:
+    return timedelta(hours=settings.DEDUP_WINDOW_HOURS)
+
+
+async def match_clusters(session: AsyncSession, rows: Sequence[Dict]) -> List[Tuple[str, Optional[int]]]:
+    # For each new row (with "minhash"/"published_at"): ("cluster", id) for an earlier story in the window,
+    # ("row", j) for an earlier row of this batch, or ("new", None). One indexed lookup per batch.
+    out: List[Tuple[str, Optional[int]]] = [("new", None)] * len(rows)
+    keyed = [j for j, r in enumerate(rows) if r.get("minhash")]
+    if not keyed:
+        return out
+    wanted = {b for j in keyed for b in buckets(rows[j]["minhash"])}
+    times = {j: as_utc(rows[j]["published_at"]) for j in keyed}
+    lo, hi = min(times.values()) - _window(), max(times.values()) + _window()
+    found: Dict[int, List[Tuple[bytes, int, datetime]]] = defaultdict(list)
+    keys = list(wanted)
+    for i in range(0, len(keys), 1000):
+        res = await session.execute(
+            select(NewsLSH.bucket, News.minhash, NewsLSH.cluster_id, NewsLSH.published_at)
+            .join(News, News.id == NewsLSH.news_id)
+            .where(NewsLSH.bucket.in_(keys[i:i + 1000]), NewsLSH.published_at >= lo, NewsLSH.published_at <= hi)
+        )
+        for bucket, sig, cid, pub in res.all():
+            if sig:
+                found[bucket].append((sig, cid, as_utc(pub)))
+    for j in keyed:
+        sig, t = rows[j]["minhash"], times[j]
+        best: Optional[Tuple[float, int]] = None
+        for b in buckets(sig):
+            for other, cid, pub in found.get(b, ()):
+                s = similarity(sig, other)
+                if s >= settings.DEDUP_THRESHOLD and abs(pub - t) <= _window() and (best is None or (-s, cid) < best):
+                    best = (-s, cid)
+        if best is not None:
+            out[j] = ("cluster", best[1])
+            continue
+        for k in keyed:
+            if k >= j:
+                break
+            if similarity(sig, rows[k]["minhash"]) >= settings.DEDUP_THRESHOLD and abs(times[k] - t) <= _window():
+                out[j] = ("row", k)
+                break
+    return out
+
+
+def lsh_rows(news_id: int, sig: bytes, cluster_id: int, published_at) -> List[Dict]:
+    return [{"bucket": b, "news_id": news_id, "cluster_id": cluster_id, "published_at": published_at}
+            for b in buckets(sig)]
+
+
+async def prune(session: AsyncSession, now: Optional[datetime] = None):
+    # The index only has to cover the matching window; older entries would just cost lookups
+    cutoff = (now or datetime.now(timezone.utc)) - _window() * 2
+    await session.execute(delete(NewsLSH).where(NewsLSH.published_at < cutoff))
@@ -0,0 +1,132 @@
+from __future__ import annotations
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Sequence
+
+from sqlalchemy import Select
+
+from .db import ReadSessionLocal
+from .logging_util import get_logger
+from .utils import as_utc
+
+log = get_logger("export")
+
+# format -> (media type, file extension)
+FORMATS: Dict[str, tuple] = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+COLUMNS = ["id", "source_name", "title", "url", "published_at", "summary", "content", "language", "tags"]
+
+
+def needs_pyarrow(fmt: str) -> bool:
+    return fmt in ("arrow", "parquet")
+
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow  # type: ignore  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def _iso(v):
+    return as_utc(v).isoformat() if isinstance(v, datetime) else v
+
+
+async def _partitions(stmt: Select, batch_size: int) -> AsyncIterator[Sequence]:
+    # Own session + server-side cursor: the request's session is gone once streaming starts,
+    # and only one partition of rows is ever held in memory
+    async with ReadSessionLocal() as session:
+        result = await session.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            yield rows
+
+
+async def _ndjson(stmt: Select, batch_size: int) -> AsyncIterator[bytes]:
+    async for rows in _partitions(stmt, batch_size):
+        yield "".join(
+            json.dumps({c: _iso(v) for c, v in zip(COLUMNS, r)}, ensure_ascii=False) + "\n" for r in rows
+        ).encode("utf-8")
+
+
+async def _csv(stmt: Select, batch_size: int) -> AsyncIterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    async for rows in _partitions(stmt, batch_size):
+        writer.writerows([_iso(v) for v in r] for r in rows)
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _arrow_schema():
+    import pyarrow as pa  # type: ignore
+    return pa.schema([
+        ("id", pa.int64()), ("source_name", pa.string()), ("title", pa.string()), ("url", pa.string()),
+        ("published_at", pa.timestamp("us", tz="UTC")), ("summary", pa.string()), ("content", pa.string()),
+        ("language", pa.string()), ("tags", pa.string()),
+    ])
+
+
+def _record_batch(schema, rows: Sequence):
+    import pyarrow as pa  # type: ignore
+    cols: List[list] = [[] for _ in COLUMNS]
+    for r in rows:
+        for i, v in enumerate(r):
+            cols[i].append(as_utc(v) if isinstance(v, datetime) else v)
+    return pa.RecordBatch.from_arrays([pa.array(c, type=f.type) for c, f in zip(cols, schema)], schema=schema)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+async def _arrow(stmt: Select, batch_size: int) -> AsyncIterator[bytes]:
+    # Arrow IPC stream: one record batch per partition
+    import pyarrow as pa  # type: ignore
+    schema = _arrow_schema()
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        async for rows in _partitions(stmt, batch_size):
+            writer.write_batch(_record_batch(schema, rows))
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+async def _parquet(stmt: Select, batch_size: int) -> AsyncIterator[bytes]:
+    # One row group per partition; the footer is written when the writer closes
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+    schema = _arrow_schema()
+    sink = io.BytesIO()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        async for rows in _partitions(stmt, batch_size):
+            writer.write_table(pa.Table.from_batches([_record_batch(schema, rows)]))
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+_WRITERS = {"ndjson": _ndjson, "csv": _csv, "arrow": _arrow, "parquet": _parquet}
+
+
+async def stream_export(stmt: Select, fmt: str, batch_size: int) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in _WRITERS[fmt](stmt, batch_size):
+            if chunk:
+                yield chunk
+    except Exception as e:
+        # Headers are already sent; all we can do is cut the stream short and leave a trace
+        log.exception(f"Export ({fmt}) aborted: {e}")
+        raise
@@ -1,14 +1,18 @@
 from __future__ import annotations
-from typing import List
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.pool import NullPool
+from collections import Counter
+from typing import Any, Dict, List
+from sqlalchemy import bindparam, delete, insert as sa_insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
-from .models import News
-from .utils import tag_by_keywords, join_tags
-from .logging_util import get_logger
-from .webhook import notify_news
+from .models import AppMeta, News, NewsLSH, NewsTag
 from .config import settings
+from . import dedup
+from .cache import response_cache
+from . import metrics, stats, stream
+from .db import dialect_insert
+from .utils import tag_by_keywords, join_tags, url_hash, as_utc, split_tags
+from .logging_util import get_logger
+from .webhook import enqueue_news, wake_dispatcher
 import asyncio
 
 log = get_logger("ingest")
@@ -16,77 +20,201 @@ log = get_logger("ingest")
 _schema_lock = asyncio.Lock()
 
 async def ensure_schema(engine):
-    from .db import Base
+    # Startup check: one read of schema_migrations when nothing is pending (python -m app.migrations applies them)
+    from .migrations import migrate
     async with _schema_lock:
-        # Use a dedicated engine/connection to avoid concurrent ops on pooled connections
-        tmp_engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True, poolclass=NullPool)
-        try:
-            async with tmp_engine.begin() as conn:
-                await conn.run_sync(Base.metadata.create_all)
-        finally:
-            await tmp_engine.dispose()
+        todo = await migrate(engine, apply=settings.DB_AUTO_MIGRATE)
+        if todo and not settings.DB_AUTO_MIGRATE:
+            raise RuntimeError(f"Database schema is behind ({', '.join(todo)}); run `python -m app.migrations`")
 
-async def save_items(session: AsyncSession, items) -> int:
-    inserted = 0
-    inserted_payloads = []
+_INSERT_CHUNK = 500
+NEWS_VERSION_KEY = "news_version"
+_saves = 0
+
+def _is_newer(a, b) -> bool:
+    return bool(a and b and as_utc(a) > as_utc(b))
+
+def _dedup_batch(items) -> Dict[str, Any]:
+    # One candidate per URL; the newest published_at wins, like the per-row update rule below
+    batch: Dict[str, Any] = {}
     for it in items:
-        result = await session.execute(select(News).where(News.url == it.url))
-        existing = result.scalar_one_or_none()
-
-        tags = join_tags(tag_by_keywords(it.title + " " + it.summary, it.language))
-
-        if existing:
-            if it.published_at and existing.published_at and it.published_at > existing.published_at:
-                existing.title = it.title or existing.title
-                existing.summary = it.summary or existing.summary
-                existing.content = it.content or existing.content
-                existing.published_at = it.published_at
-                existing.tags = tags or existing.tags
-                existing.language = it.language or existing.language
-                existing.source_name = it.source_name or existing.source_name
+        h = url_hash(it.url or "")
+        prev = batch.get(h)
+        if prev is None or _is_newer(it.published_at, prev.published_at):
+            batch[h] = it
+    return batch
+
+def _payload(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": row.get("id"),
+        "source_name": row["source_name"],
+        "title": row["title"],
+        "url": row["url"],
+        "published_at": row["published_at"].isoformat() if row.get("published_at") else None,
+        "summary": row["summary"],
+        "content": row["content"],
+        "language": row["language"],
+        "tags": row["tags"],
+        "cluster_id": row.get("cluster_id"),
+    }
+
+async def bump_news_version(session: AsyncSession, insert=None):
+    # API processes poll this counter to drop their response caches after an ingest commit
+    if insert is not None:
+        stmt = insert(AppMeta).values(key=NEWS_VERSION_KEY, value=1)
+        stmt = stmt.on_conflict_do_update(index_elements=["key"], set_={"value": AppMeta.value + 1})
+        await session.execute(stmt)
+        return
+    res = await session.execute(update(AppMeta).where(AppMeta.key == NEWS_VERSION_KEY).values(value=AppMeta.value + 1))
+    if not res.rowcount:
+        session.add(AppMeta(key=NEWS_VERSION_KEY, value=1))
+
+async def _assign_clusters(session: AsyncSession, rows: List[Dict[str, Any]], matches, ids: Dict[str, int]):
+    # Resolve cluster ids now that the new rows have ids: matches found in the window keep theirs, in-batch
+    # near-duplicates follow the earlier row, everything else starts a cluster of its own
+    global _saves
+    fixes, lsh = [], []
+    for r, (kind, ref) in zip(rows, matches):
+        news_id = ids.get(r["url_hash"])
+        if news_id is None:
+            continue
+        if kind == "row" and rows[ref]["url_hash"] in ids:
+            cid = rows[ref]["cluster_id"]
+        elif kind == "cluster":
+            cid = r["cluster_id"]
+        else:
+            cid = news_id
+        if r["cluster_id"] != cid:
+            fixes.append({"b_id": news_id, "b_cid": cid})
+        r["cluster_id"] = cid
+        if r["minhash"]:
+            lsh.extend(dedup.lsh_rows(news_id, r["minhash"], cid, r["published_at"]))
+    if fixes:
+        t = News.__table__
+        await session.execute(update(t).where(t.c.id == bindparam("b_id")).values(cluster_id=bindparam("b_cid")), fixes)
+    if lsh:
+        await session.execute(sa_insert(NewsLSH), lsh)
+    _saves += 1
+    if _saves % 200 == 0:
+        await dedup.prune(session)
+
+async def _write_tags(session: AsyncSession, insert, new: Dict[int, str], changed: Dict[int, str]):
+    # Keep news_tags in step with News.tags for inserted and re-tagged rows
+    if changed:
+        await session.execute(delete(NewsTag).where(NewsTag.news_id.in_(list(changed))))
+    rows = [{"news_id": news_id, "tag": t[:64]}
+            for src in (new, changed) for news_id, tags in src.items() for t in split_tags(tags)]
+    if not rows:
+        return
+    stmt = insert(NewsTag).on_conflict_do_nothing() if insert is not None else NewsTag.__table__.insert()
+    await session.execute(stmt, rows)
+
+async def save_items(session: AsyncSession, items) -> int:
+    batch = _dedup_batch(items)
+    if not batch:
+        return 0
+
+    # Single set-based lookup instead of one SELECT per item; only the key columns come back
+    result = await session.execute(
+        select(News.url_hash, News.published_at).where(News.url_hash.in_(list(batch.keys())))
+    )
+    known = {h: published_at for h, published_at in result.all()}
+    stale = [h for h, published_at in known.items() if _is_newer(batch[h].published_at, published_at)]
+    existing: Dict[str, News] = {}
+    if stale:
+        result = await session.execute(select(News).where(News.url_hash.in_(stale)))
+        existing = {n.url_hash: n for n in result.scalars()}
+
+    new_rows: List[Dict[str, Any]] = []
+    retagged: Dict[int, str] = {}
+    updated_ids: List[int] = []
+    delta: Counter = Counter()
+    for h, it in batch.items():
+        if h in known:
+            current = existing.get(h)
+            if current is not None and _is_newer(it.published_at, current.published_at):
+                tags = join_tags(tag_by_keywords(it.title + " " + it.summary, it.language))
+                if tags and tags != current.tags:
+                    retagged[current.id] = tags
+                stats.count_story(delta, current.source_name, current.language, current.tags, current.published_at, -1)
+                current.title = it.title or current.title
+                current.summary = it.summary or current.summary
+                current.content = it.content or current.content
+                current.published_at = it.published_at
+                current.tags = tags or current.tags
+                current.language = it.language or current.language
+                current.source_name = it.source_name or current.source_name
+                current.fetched_at = datetime.now(tz=timezone.utc)  # /news page ETag, /news/stream update mark
                 # merge raw
                 try:
-                    merged = dict(existing.raw or {})
+                    merged = dict(current.raw or {})
                     merged.update(it.raw or {})
-                    existing.raw = merged
+                    current.raw = merged
                 except Exception:
-                    existing.raw = it.raw or existing.raw
-                log.info(f"Updated: {existing.title}")
+                    current.raw = it.raw or current.raw
+                stats.count_story(delta, current.source_name, current.language, current.tags, current.published_at)
+                updated_ids.append(current.id)
+                log.info(f"Updated: {current.title}")
             continue
-        news = News(
+        new_rows.append(dict(
             source_name=it.source_name,
             title=it.title,
             url=it.url,
+            url_hash=h,
             published_at=it.published_at or datetime.now(tz=timezone.utc),
             summary=it.summary,
             content=it.content,
             language=it.language,
-            tags=tags,
+            tags=join_tags(tag_by_keywords(it.title + " " + it.summary, it.language)),
             raw=it.raw,
-        )
-        session.add(news)
-
-        inserted += 1
-        try:
-            inserted_payloads.append({
-                "id": None,
-                "source_name": news.source_name,
-                "title": news.title,
-                "url": news.url,
-                "published_at": news.published_at.isoformat() if news.published_at else None,
-                "summary": news.summary,
-                "content": news.content,
-                "language": news.language,
-                "tags": news.tags,
-            })
-        except Exception:
-            pass
+        ))
+
+    matches = []
+    for r in new_rows:
+        r["minhash"] = dedup.signature(r["title"], r["summary"], r["language"]) if settings.DEDUP_ENABLED else None
+        r["cluster_id"] = None
+    if settings.DEDUP_ENABLED and new_rows:
+        matches = await dedup.match_clusters(session, new_rows)
+        for r, (kind, ref) in zip(new_rows, matches):
+            if kind == "cluster":
+                r["cluster_id"] = ref
+
+    ids: Dict[str, int] = {}
+    insert = dialect_insert(session.bind.dialect.name)
+    if insert is not None:
+        # ON CONFLICT DO NOTHING covers rows a concurrent run inserted after our lookup
+        # executemany form: batched into multi-row VALUES by the driver layer, with a cached compile
+        stmt = insert(News).on_conflict_do_nothing(index_elements=["url_hash"]).returning(News.id, News.url_hash)
+        for i in range(0, len(new_rows), _INSERT_CHUNK):
+            chunk = new_rows[i:i + _INSERT_CHUNK]
+            ids.update({row.url_hash: row.id for row in await session.execute(stmt, chunk)})
+    else:
+        added = [News(**r) for r in new_rows]
+        session.add_all(added)
+        await session.flush()
+        ids = {n.url_hash: n.id for n in added}
+
+    if matches and ids:
+        await _assign_clusters(session, new_rows, matches, ids)
+    inserted_payloads = [_payload(dict(r, id=ids[r["url_hash"]])) for r in new_rows if r["url_hash"] in ids]
+
+    await _write_tags(session, insert, {p["id"]: p["tags"] for p in inserted_payloads}, retagged)
+    for r in new_rows:
+        if r["url_hash"] in ids:
+            stats.count_story(delta, r["source_name"], r["language"], r["tags"], r["published_at"])
+    await stats.apply(session, insert, delta)
 
+    # Webhook deliveries go into the outbox in the same transaction; the dispatcher sends them later
+    await enqueue_news(session, inserted_payloads)
+    updated = len(updated_ids)
+    await stream.notify_changes(session, [p["id"] for p in inserted_payloads], updated_ids)
+    if inserted_payloads or updated:
+        await bump_news_version(session, insert)
     await session.commit()
-    # Send webhooks outside the transaction
-    try:
-        if inserted_payloads:
-            notify_news(inserted_payloads)
-    except Exception:
-        pass
-    return inserted
+    metrics.NEWS_INSERTED.inc(len(inserted_payloads))
+    metrics.NEWS_UPDATED.inc(updated)
+    if inserted_payloads or updated:
+        response_cache.clear()
+    if inserted_payloads:
+        wake_dispatcher()
+    return len(inserted_payloads)
@@ -2,6 +2,8 @@ from __future__ import annotations
 from typing import List, Tuple, Dict, Any
 from .sources.rss_source import RSSSource
 from .sources.base import Source
+from .translation import get_translator
+from .utils import parse_duration
 
 def load_sources(yaml_path: str) -> List[Source]:
     try:
@@ -18,6 +20,8 @@ def load_sources(yaml_path: str) -> List[Source]:
         src_list = cfg.get("sources", [])
         translation_cfg = cfg.get("translation", {}) or {}
 
+    # One translator for all sources and all reloads so they share the pooled HTTP clients
+    translator = get_translator(translation_cfg)
     sources: List[Source] = []
     for s in src_list:
         if not s.get("rss_url") and not s.get("url"):
@@ -31,8 +35,16 @@ def load_sources(yaml_path: str) -> List[Source]:
         translate_to_tr = bool(s.get("translate_to_tr", False))
         url = s.get("rss_url") or s.get("url")
         if t == "rss":
-            sources.append(RSSSource(name=name, url=url, language=lang, translate_to_tr=translate_to_tr, translator_cfg=translation_cfg))
+            src = RSSSource(name=name, url=url, language=lang, translate_to_tr=translate_to_tr, translator_cfg=translation_cfg, translator=translator)
         else:
             # future: implement JSON APIs etc.
-            pass
+            continue
+        for k in ("poll_interval", "min_interval", "max_interval"):
+            try:
+                v = parse_duration(s.get(k))
+            except ValueError:
+                v = None
+            if v:
+                src.poll[k] = v
+        sources.append(src)
     return sources
@@ -1,10 +1,41 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+
+_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+_listener = None
+
+class _PassThroughQueueHandler(logging.handlers.QueueHandler):
+    # The stock prepare() formats the message (and traceback) on the caller's thread; hand the record over
+    # untouched so the listener thread does all the formatting. Same process, so nothing needs pickling.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 def get_logger(name: str) -> logging.Logger:
     level = os.getenv("LOG_LEVEL", "INFO").upper()
     logging.basicConfig(
         level=getattr(logging, level, logging.INFO),
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        format=_FORMAT,
     )
     return logging.getLogger(name)
+
+def get_queue_logger(name: str) -> logging.Logger:
+    # Hot-path logger: records go through a queue and are formatted/written by a background thread
+    global _listener
+    logger = get_logger(name)
+    if _listener is None:
+        q: "queue.Queue" = queue.Queue(-1)
+        handlers = logging.getLogger().handlers or [logging.StreamHandler()]
+        for h in handlers:
+            if h.formatter is None:
+                h.setFormatter(logging.Formatter(_FORMAT))
+        _listener = logging.handlers.QueueListener(q, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        _listener.queue_handler = _PassThroughQueueHandler(q)
+    if _listener.queue_handler not in logger.handlers:
+        logger.addHandler(_listener.queue_handler)
+        logger.propagate = False
+    return logger
@@ -1,46 +1,123 @@
 from __future__ import annotations
 import argparse
 from datetime import datetime
+from . import metrics
 from .config import settings
 from .logging_util import get_logger
-from .db import SessionLocal, engine
-from .ingest import ensure_schema, save_items
+from .db import engine
+from .ingest import ensure_schema
 from .loader import load_sources
-from .scheduler import start_scheduler
+from .pipeline import run_sources
+from .scheduler import start_polling
+from .sharding import shard, worker_name
+from .translation import close_translator
+from .webhook import get_dispatcher
 import asyncio
 
 log = get_logger("main")
 
 _schema_done = False
 
-async def run_once():
+async def _ensure_schema_once():
     global _schema_done
     if not _schema_done:
         await ensure_schema(engine)
         _schema_done = True
-    sources = load_sources("config/sources.yml")
-    total = 0
-    async with SessionLocal() as s:
-        for src in sources:
-            try:
-                items = list(src.fetch())
-                inserted = await save_items(s, items)
-                total += inserted
-                log.info(f"[{src.name}] fetched={len(items)} inserted={inserted}")
-            except Exception as e:
-                log.exception(f"Source error: {src.name}: {e}")
-    log.info(f"Done. Inserted total={total}")
+
+async def run_once(worker: int = 0, workers: int = 1):
+    await _ensure_schema_once()
+    sources = shard(load_sources("config/sources.yml"), worker, workers)
+    results = await run_sources(sources)
+    total = sum(r.inserted for r in results.values())
+    log.info(f"Done. Inserted total={total}" + (f" ({worker_name(worker)}/{workers})" if workers > 1 else ""))
+    return results
+
+async def _worker_main(index: int, workers: int, once: bool):
+    # Runs in a spawned process: own event loop, engine and pool; the parent already migrated the schema
+    global _schema_done
+    _schema_done = True
+    if settings.INGEST_METRICS_PORT:
+        metrics.start_server(settings.INGEST_METRICS_PORT + 1 + index)
+    if once:
+        await run_once(index, workers)
+        await close_translator()
+        await engine.dispose()
+        return
+    async def job():
+        await run_once(index, workers)
+    start_polling(job, lambda: shard(load_sources("config/sources.yml"), index, workers))
+    while True:
+        await asyncio.sleep(3600)
+
+def _worker_entry(index: int, workers: int, once: bool):
+    try:
+        asyncio.run(_worker_main(index, workers, once))
+    except KeyboardInterrupt:
+        pass
+
+def _spawn(ctx, index: int, workers: int, once: bool):
+    p = ctx.Process(target=_worker_entry, args=(index, workers, once), name=worker_name(index), daemon=False)
+    p.start()
+    log.info(f"Started {worker_name(index)} pid={p.pid}")
+    return p
+
+async def run_workers(workers: int, once: bool):
+    # Parent: migrates once, fans sources out over N processes (consistent hashing on the source name)
+    # and runs the webhook dispatcher; children only fetch/parse/save
+    import multiprocessing
+    await _ensure_schema_once()
+    await engine.dispose()
+    ctx = multiprocessing.get_context("spawn")
+    procs = [_spawn(ctx, i, workers, once) for i in range(workers)]
+    dispatcher = get_dispatcher()
+    try:
+        if once:
+            while any(p.is_alive() for p in procs):
+                await asyncio.sleep(0.2)
+            failed = [p.name for p in procs if p.exitcode]
+            if failed:
+                log.warning(f"Workers exited with errors: {', '.join(failed)}")
+            await dispatcher.drain(max_rounds=10)
+            await dispatcher.stop()
+            return
+        dispatcher.start()
+        while True:
+            await asyncio.sleep(5)
+            for i, p in enumerate(procs):
+                if not p.is_alive():
+                    log.warning(f"{p.name} exited with code {p.exitcode}, restarting")
+                    procs[i] = _spawn(ctx, i, workers, once)
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join(timeout=10)
 
 async def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--once", action="store_true", help="Run a single ingestion and exit")
+    parser.add_argument("--workers", type=int, default=settings.INGEST_WORKERS,
+                        help="Ingestion processes; sources are sharded across them by consistent hashing")
     args = parser.parse_args()
+    # With --workers the parent serves its own series (webhook backlog) and each worker listens on port+1+index
+    metrics.start_server(settings.INGEST_METRICS_PORT)
+    if args.workers > 1:
+        await run_workers(args.workers, args.once)
+        return
+    dispatcher = get_dispatcher()
     if args.once:
         await run_once()
+        await close_translator()
+        # Deliver this run's webhooks before exiting; anything left stays in the outbox
+        await dispatcher.drain(max_rounds=10)
+        await dispatcher.stop()
     else:
         async def job():
             await run_once()
-        start_scheduler(job)
+        await _ensure_schema_once()
+        dispatcher.start()
+        start_polling(job, lambda: load_sources("config/sources.yml"))
         # keep the loop alive
         while True:
             await asyncio.sleep(3600)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .logging_util import get_logger
+
+log = get_logger("metrics")
+
+# Minimal Prometheus text-format registry. Hot paths bind their label values once (labels() caches the child)
+# and then only do a bisect + two float adds per observation. Observations come from the event loop thread;
+# the parse pool never records directly.
+# Each family belongs to the process that fills it: API families are served on the API's /metrics, ingest ones
+# (sources, inserts, translation, scheduler, webhooks) on INGEST_METRICS_PORT; scope None means both.
+
+API, INGEST = "api", "ingest"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), fn: Optional[Callable] = None,
+                 scope: Optional[str] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.fn = fn  # value(s) read at scrape time instead of recorded ones
+        self.scope = scope
+        self._children: Dict[Tuple[str, ...], "_Metric"] = {}
+        self._label_str = ""
+        REGISTRY.append(self)
+
+    def _new_child(self) -> "_Metric":
+        child = object.__new__(type(self))
+        child._init_value()
+        return child
+
+    def labels(self, *values) -> "_Metric":
+        child = self._children.get(values)
+        if child is None:
+            child = self._new_child()
+            child._label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, values))
+            self._children[values] = child
+        return child
+
+    def _series(self) -> Iterator["_Metric"]:
+        if self.labelnames:
+            yield from list(self._children.values())  # the ingestor scrapes from its own thread
+        else:
+            yield self
+
+    def _braces(self, extra: str = "") -> str:
+        inner = ",".join(p for p in (self._label_str, extra) if p)
+        return "{" + inner + "}" if inner else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if self.fn is not None:
+            try:
+                got = self.fn()
+            except Exception as e:
+                log.debug(f"metric {self.name} unavailable: {e}")
+                return []
+            if isinstance(got, dict):
+                for values, v in got.items():
+                    values = values if isinstance(values, tuple) else (values,)
+                    labels = ",".join(f'{k}="{_escape(x)}"' for k, x in zip(self.labelnames, values))
+                    lines.append(f"{self.name}{{{labels}}} {_fmt(v)}")
+            elif got is not None:
+                lines.append(f"{self.name} {_fmt(got)}")
+            return lines
+        for s in self._series():
+            lines.extend(s._lines(self.name))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_value()
+
+    def _init_value(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def _lines(self, name: str) -> List[str]:
+        return [f"{name}{self._braces()} {_fmt(self.value)}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS,
+                 scope: Optional[str] = None):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, scope=scope)
+        self._init_value()
+
+    def _new_child(self) -> "Histogram":
+        child = object.__new__(Histogram)
+        child.bounds = self.bounds
+        child._init_value()
+        return child
+
+    def _init_value(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.sum += seconds
+
+    def _lines(self, name: str) -> List[str]:
+        out, acc = [], 0
+        for bound, n in zip(self.bounds + (float("inf"),), self.counts):
+            acc += n
+            le = f'le="{_fmt(bound)}"'
+            out.append(f"{name}_bucket{self._braces(le)} {acc}")
+        out.append(f"{name}_sum{self._braces()} {self.sum!r}")
+        out.append(f"{name}_count{self._braces()} {acc}")
+        return out
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render(scope: Optional[str] = None) -> str:
+    lines: List[str] = []
+    for m in REGISTRY:
+        if scope is None or m.scope in (None, scope):
+            lines.extend(m.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# API
+HTTP_LATENCY = Histogram("news_http_request_duration_seconds", "API request latency by route template", ["method", "route"],
+                         scope=API)
+HTTP_REQUESTS = Counter("news_http_requests_total", "API responses by route template and status", ["method", "route", "status"],
+                        scope=API)
+
+# Ingest
+SOURCE_STAGE = Histogram("news_source_stage_duration_seconds", "Per-source fetch/parse/translate/save time per poll",
+                         ["source", "stage"], buckets=STAGE_BUCKETS, scope=INGEST)
+SOURCE_ERRORS = Counter("news_source_errors_total", "Failed polls per source", ["source"], scope=INGEST)
+NEWS_INSERTED = Counter("news_inserted_total", "News rows inserted", scope=INGEST)
+NEWS_UPDATED = Counter("news_updated_total", "Existing news rows refreshed by a newer copy", scope=INGEST)
+TRANSLATION_LATENCY = Histogram("news_translation_request_duration_seconds", "Translation provider call latency", scope=INGEST)
+SCHEDULER_LAG = Gauge("news_scheduler_lag_seconds", "How late the last adaptive-scheduler batch started", scope=INGEST)
+WEBHOOK_BACKLOG = Gauge("news_webhook_backlog", "Webhook outbox rows waiting for delivery (as of the last dispatch)",
+                        scope=INGEST)
+
+
+def _pool(attr: str):
+    def read():
+        from .db import engine, read_engine
+        out = {"primary": getattr(engine.sync_engine.pool, attr)()}
+        if read_engine is not engine:
+            out["read"] = getattr(read_engine.sync_engine.pool, attr)()
+        return out
+    return read
+
+
+def _cache(key: str):
+    def read():
+        from .cache import response_cache
+        return response_cache.stats()[key]
+    return read
+
+
+def _translation(key: str):
+    def read():
+        from . import translation
+        return translation.stats.snapshot()[key]
+    return read
+
+
+Gauge("news_db_pool_checked_out", "SQLAlchemy pool connections currently checked out", ["pool"], fn=_pool("checkedout"))
+Gauge("news_db_pool_size", "SQLAlchemy pool size", ["pool"], fn=_pool("size"))
+Counter("news_response_cache_hits_total", "Response cache hits", fn=_cache("hits"), scope=API)
+Counter("news_response_cache_misses_total", "Response cache misses", fn=_cache("misses"), scope=API)
+Counter("news_response_cache_evictions_total", "Response cache LRU evictions", fn=_cache("evictions"), scope=API)
+Gauge("news_response_cache_entries", "Response cache entries", fn=_cache("entries"), scope=API)
+Counter("news_translation_cache_hits_total", "Translation cache hits", fn=_translation("hits"), scope=INGEST)
+Counter("news_translation_cache_misses_total", "Translation cache misses", fn=_translation("misses"), scope=INGEST)
+Counter("news_translation_provider_errors_total", "Failed translation provider calls", fn=_translation("provider_errors"),
+        scope=INGEST)
+
+
+_server_started = False
+
+
+def start_server(port: int, host: str = "0.0.0.0"):
+    # Scrape endpoint for the ingestor processes, which don't run the API; one daemon thread per process
+    global _server_started
+    if port <= 0 or _server_started:
+        return
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = render(INGEST).encode("utf-8") if self.path.split("?")[0] == "/metrics" else b""
+            self.send_response(200 if body else 404)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        log.warning(f"Metrics server not started on :{port}: {e}")
+        return
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    _server_started = True
+    log.info(f"Metrics on http://{host}:{port}/metrics")
@@ -1,100 +1,246 @@
 from __future__ import annotations
 import time, hashlib
-from typing import Dict, Tuple, Optional
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response, JSONResponse
-from starlette.types import ASGIApp, Receive, Scope, Send
+from typing import Dict, List, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from . import compression, metrics
 from .config import settings
-from .logging_util import get_logger
+from .logging_util import get_queue_logger
+from .ratelimit import TokenBuckets, make_backend  # noqa: F401  (TokenBuckets re-exported)
 
-log = get_logger("middleware")
+log = get_queue_logger("middleware")
 
-# --- Simple in-memory token bucket per key ---
-class RateLimiter(BaseHTTPMiddleware):
+_BODY_PREVIEW = 512
+
+
+def _client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimiter:
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
         self.rate = int(settings.RATE_LIMIT_PER_MINUTE or 120)  # tokens per minute
         self.burst = int(settings.RATE_LIMIT_BURST or self.rate)
-        self.store: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, last_ts)
-
-    def _key(self, request: Request) -> str:
-        strat = (settings.RATE_LIMIT_KEY_STRATEGY or "api_key_or_ip").lower()
-        api_key = request.headers.get("x-api-key", "")
-        ip = request.client.host if request.client else "unknown"
-        if strat == "api_key":
-            base = api_key or ip
-        elif strat == "ip":
+        # memory (per process, default) | sqlite (shared on one host) | redis (shared across hosts)
+        self.buckets = make_backend(self.rate, self.burst)
+        self.strategy = (settings.RATE_LIMIT_KEY_STRATEGY or "api_key_or_ip").lower()
+        self._warned_at = 0.0
+
+    def _warn(self, e: Exception):
+        now = time.monotonic()
+        if now - self._warned_at > 60:
+            self._warned_at = now
+            log.warning(f"Rate limit backend error, allowing requests: {e}")
+
+    def _key(self, scope: Scope) -> str:
+        ip = _client_ip(scope)
+        if self.strategy == "ip":
             base = ip
-        else:  # api_key_or_ip
-            base = api_key or ip
+        else:  # api_key | api_key_or_ip
+            base = Headers(scope=scope).get("x-api-key", "") or ip
         return hashlib.sha256(base.encode("utf-8")).hexdigest()
 
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         # no limit for /health
-        if request.url.path == "/health":
-            return await call_next(request)
-
-        key = self._key(request)
-        now = time.time()
-        refill_rate = self.rate / 60.0  # tokens per second
+        if scope["type"] != "http" or scope["path"] == "/health":
+            await self.app(scope, receive, send)
+            return
 
-        tokens, last_ts = self.store.get(key, (float(self.burst), now))
-        # Refill
-        elapsed = max(0.0, now - last_ts)
-        tokens = min(self.burst, tokens + elapsed * refill_rate)
-
-        if tokens < 1.0:
-            # Too many requests
-            retry_after = max(1, int((1.0 - tokens) / refill_rate))
+        try:
+            allowed, tokens, retry_after = await self.buckets.take(self._key(scope))
+        except Exception as e:
+            # Fail open: an unreachable shared store must not take the API down with it
+            self._warn(e)
+            await self.app(scope, receive, send)
+            return
+        if not allowed:
             headers = {
                 "X-RateLimit-Limit": str(self.rate),
                 "X-RateLimit-Remaining": "0",
-                "X-RateLimit-Reset": str(retry_after),
+                "X-RateLimit-Reset": str(max(1, int(retry_after))),
             }
-            return JSONResponse({"detail": "Rate limit exceeded"}, status_code=429, headers=headers)
+            await JSONResponse({"detail": "Rate limit exceeded"}, status_code=429, headers=headers)(scope, receive, send)
+            return
+
+        extra = [
+            (b"x-ratelimit-limit", str(self.rate).encode()),
+            (b"x-ratelimit-remaining", str(int(tokens)).encode()),
+            (b"x-ratelimit-reset", b"0"),
+        ]
 
-        tokens -= 1.0
-        self.store[key] = (tokens, now)
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + extra
+            await send(message)
 
-        response = await call_next(request)
-        # Annotate headers
-        remaining = int(tokens)
-        response.headers["X-RateLimit-Limit"] = str(self.rate)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = "0"
-        return response
+        await self.app(scope, receive, send_with_headers)
 
-class RequestLogger(BaseHTTPMiddleware):
+
+class RequestLogger:
     def __init__(self, app: ASGIApp):
-        super().__init__(app)
+        self.app = app
+        # route template -> method -> (latency histogram, {status: counter}), bound on first use
+        self._series: Dict[str, Dict[str, tuple]] = {}
         # parse header allowlist
         self.header_allow = [h.strip().lower() for h in (settings.REQUEST_LOG_HEADERS or "").split(",") if h.strip()]
 
-    async def dispatch(self, request: Request, call_next):
-        start = time.time()
+    def _headers(self, scope: Scope) -> Dict[str, str]:
         hdrs = {}
         if self.header_allow:
+            headers = Headers(scope=scope)
             for h in self.header_allow:
-                if h in request.headers:
-                    val = request.headers[h]
+                val = headers.get(h)
+                if val is not None:
                     # mask api key
                     if h == "x-api-key" and val:
                         val = (val[:3] + "***" + val[-2:]) if len(val) > 5 else "***"
                     hdrs[h] = val
-        client = request.client.host if request.client else "unknown"
-        query = dict(request.query_params) if settings.REQUEST_LOG_QUERY else {}
-        body_preview = None
-        if settings.REQUEST_LOG_BODY:
-            try:
-                body_preview = (await request.body())
-                body_preview = body_preview[:512].decode("utf-8", errors="ignore")
-            except Exception:
-                body_preview = None
-
-        response = await call_next(request)
-        duration_ms = int((time.time() - start) * 1000)
-        log.info(f"{client} {request.method} {request.url.path} {response.status_code} {duration_ms}ms "
-                 f"headers={hdrs} query={query} body_preview={body_preview}")
-        return response
+        return hdrs
+
+    def _observe(self, scope: Scope, status: int, elapsed: float):
+        # Labelled by route template ("/news", not the raw path) so unmatched URLs can't grow the series set
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        by_method = self._series.get(route)
+        if by_method is None:
+            by_method = self._series[route] = {}
+        series = by_method.get(scope["method"])
+        if series is None:
+            series = by_method[scope["method"]] = (metrics.HTTP_LATENCY.labels(scope["method"], route), {})
+        hist, counters = series
+        hist.observe(elapsed)
+        counter = counters.get(status)
+        if counter is None:
+            counter = counters[status] = metrics.HTTP_REQUESTS.labels(scope["method"], route, str(status))
+        counter.inc()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = [500]
+        preview: List[bytes] = []
+
+        async def receive_tap() -> Message:
+            # Peek at the first bytes as the app reads them; nothing is buffered ahead of the app
+            message = await receive()
+            if message["type"] == "http.request" and sum(map(len, preview)) < _BODY_PREVIEW:
+                preview.append(message.get("body", b"")[:_BODY_PREVIEW])
+            return message
+
+        async def send_tap(message: Message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_tap if settings.REQUEST_LOG_BODY else receive, send_tap)
+        finally:
+            elapsed = time.perf_counter() - start
+            duration_ms = int(elapsed * 1000)
+            if settings.METRICS_ENABLED:
+                self._observe(scope, status[0], elapsed)
+            record = {
+                "client": _client_ip(scope),
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status[0],
+                "duration_ms": duration_ms,
+            }
+            if self.header_allow:
+                record["headers"] = self._headers(scope)
+            if settings.REQUEST_LOG_QUERY:
+                record["query"] = scope.get("query_string", b"").decode("latin-1")
+            if settings.REQUEST_LOG_BODY:
+                record["body_preview"] = b"".join(preview)[:_BODY_PREVIEW].decode("utf-8", errors="ignore")
+            log.info(_AccessLine(record), extra={"http": record})
+
+
+class _AccessLine:
+    # The key=value line is rendered when the queue listener formats the record, not on the event loop
+    __slots__ = ("record",)
+
+    def __init__(self, record: dict):
+        self.record = record
+
+    def __str__(self) -> str:
+        return " ".join(f"{k}={v!r}" if isinstance(v, (str, dict)) else f"{k}={v}" for k, v in self.record.items())
+
+
+class Compression:
+    # Negotiated zstd/br/gzip. Whole bodies over COMPRESS_MIN_SIZE are compressed once per (ETag, coding) through
+    # compression.compressed_cache; streamed bodies (exports) chunk by chunk. Server-sent events, other content
+    # types, non-200 responses and bodies that already have a Content-Encoding go out untouched.
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.encodings = compression.available_encodings()
+
+    @staticmethod
+    def _start(start: Message, encoding: str, length: Optional[int]) -> Message:
+        headers = MutableHeaders(raw=list(start.get("headers", [])))
+        headers["content-encoding"] = encoding
+        if length is None:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(length)
+        vary = headers.get("vary")
+        headers["vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+        etag = headers.get("etag")
+        if etag and etag.startswith('"'):
+            headers["etag"] = f'{etag[:-1]}-{encoding}"'  # strong validators differ per coding
+        return {**start, "headers": headers.raw}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.COMPRESS_ENABLED or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+        encoding = compression.negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        pending: List[Message] = []  # the held response start, until the first body shows its size
+        codec = []
+
+        async def send_compressed(message: Message):
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                ctype = headers.get("content-type", "")
+                if message["status"] == 200 and "content-encoding" not in headers and ctype.startswith(compression.COMPRESSIBLE):
+                    pending.append(message)
+                    return
+                await send(message)
+                return
+            if message["type"] != "http.response.body" or not (pending or codec):
+                await send(message)
+                return
+            body, more = message.get("body", b""), message.get("more_body", False)
+            if codec:
+                out = codec[0].chunk(body) if body else b""
+                await send({"type": "http.response.body", "body": out + (b"" if more else codec[0].end()), "more_body": more})
+                return
+            start = pending.pop()
+            if more:
+                codec.append(compression.stream(encoding))
+                await send(self._start(start, encoding, None))
+                await send({"type": "http.response.body", "body": codec[0].chunk(body), "more_body": True})
+                return
+            if len(body) < settings.COMPRESS_MIN_SIZE:
+                await send(start)
+                await send(message)
+                return
+            etag = Headers(raw=start.get("headers", [])).get("etag")
+            key = (etag, encoding) if etag and etag.startswith('"') else None
+            data = compression.compressed_cache.get(key) if key else None
+            if data is None:
+                data = compression.compress(body, encoding)
+                if key:
+                    compression.compressed_cache.set(key, data)
+            await send(self._start(start, encoding, len(data)))
+            await send({"type": "http.response.body", "body": data, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
+
@@ -0,0 +1,277 @@
+from __future__ import annotations
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import List, Set
+from sqlalchemy import inspect, select, text
+
+from . import dedup, stats
+from .config import settings
+from .logging_util import get_logger
+from .models import News, NewsStat, SchemaMigration
+from .utils import url_hash, split_tags
+
+log = get_logger("migrations")
+
+
+def _columns(conn, table: str):
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def _add_column(conn, table: str, name: str, ddl_type: str):
+    if name in _columns(conn, table):
+        return False
+    log.info(f"Migrating: adding {table}.{name}")
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl_type}"))
+    return True
+
+
+def _json_type(conn) -> str:
+    return "JSONB" if conn.dialect.name == "postgresql" else "JSON"
+
+
+def add_url_hash(conn):
+    # news.url_hash was added after the first deployments; create_all() won't alter an existing table
+    if "url_hash" in _columns(conn, "news"):
+        return
+    log.info("Migrating: adding news.url_hash")
+    conn.execute(text("ALTER TABLE news ADD COLUMN url_hash VARCHAR(64)"))
+    seen = set()
+    updates = []
+    for row_id, url in conn.execute(text("SELECT id, url FROM news ORDER BY id")):
+        h = url_hash(url or "")
+        # The oldest row of a URL gets the hash (later upserts update it); newer duplicates keep NULL so the
+        # unique index can be built
+        if h in seen:
+            continue
+        seen.add(h)
+        updates.append({"id": row_id, "h": h})
+    if updates:
+        conn.execute(text("UPDATE news SET url_hash = :h WHERE id = :id"), updates)
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_news_url_hash ON news (url_hash)"))
+    log.info(f"Migrating: backfilled url_hash for {len(updates)} rows")
+
+
+def add_feed_state_hwm(conn):
+    _add_column(conn, "feed_state", "last_published_at", "TIMESTAMP WITH TIME ZONE")
+    _add_column(conn, "feed_state", "seen_ids", _json_type(conn))
+
+
+def add_feed_state_leases(conn):
+    _add_column(conn, "feed_state", "lease_owner", "VARCHAR(128)")
+    _add_column(conn, "feed_state", "lease_until", "TIMESTAMP WITH TIME ZONE")
+    _add_column(conn, "feed_state", "last_polled_at", "TIMESTAMP WITH TIME ZONE")
+
+
+def add_feed_state_schedule(conn):
+    _add_column(conn, "feed_state", "next_poll_at", "TIMESTAMP WITH TIME ZONE")
+    _add_column(conn, "feed_state", "poll_interval", "INTEGER")
+    _add_column(conn, "feed_state", "error_count", "INTEGER DEFAULT 0")
+
+
+def _tsvector_expr(cfg: str) -> str:
+    return (
+        f"setweight(to_tsvector('{cfg}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{cfg}', coalesce(summary, '')), 'B') || "
+        f"setweight(to_tsvector('{cfg}', coalesce(content, '')), 'C')"
+    )
+
+
+def add_search_tsv(conn):
+    # PostgreSQL full-text search: generated tsvector (turkish config for tr rows, english otherwise) + GIN index
+    if conn.dialect.name != "postgresql" or "search_tsv" in _columns(conn, "news"):
+        return
+    log.info("Migrating: adding news.search_tsv (rewrites the table, may take a while on large archives)")
+    conn.execute(text(
+        "ALTER TABLE news ADD COLUMN search_tsv tsvector GENERATED ALWAYS AS ("
+        f"CASE WHEN language = 'tr' THEN {_tsvector_expr('turkish')} ELSE {_tsvector_expr('english')} END"
+        ") STORED"
+    ))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_news_search_tsv ON news USING GIN (search_tsv)"))
+
+
+def add_published_at_id_index(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_news_published_at_id ON news (published_at, id)"))
+
+
+def add_fetched_at_index(conn):
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_news_fetched_at ON news (fetched_at)"))
+
+
+def backfill_news_tags(conn):
+    # news_tags is created empty by create_all(); fill it once from the comma-joined news.tags column
+    if conn.execute(text("SELECT 1 FROM news_tags LIMIT 1")).first() is not None:
+        return
+    rows = []
+    total = 0
+    for news_id, tags in conn.execute(text("SELECT id, tags FROM news WHERE tags IS NOT NULL AND tags <> ''")):
+        rows.extend({"news_id": news_id, "tag": t[:64]} for t in split_tags(tags))
+        if len(rows) >= 5000:
+            conn.execute(text("INSERT INTO news_tags (news_id, tag) VALUES (:news_id, :tag)"), rows)
+            total += len(rows)
+            rows = []
+    if rows:
+        conn.execute(text("INSERT INTO news_tags (news_id, tag) VALUES (:news_id, :tag)"), rows)
+        total += len(rows)
+    if total:
+        log.info(f"Migrating: backfilled {total} news_tags rows")
+
+
+def add_news_clusters(conn):
+    # minhash/cluster_id on news; stories inside the dedup window are fingerprinted and clustered,
+    # older ones become single-story clusters
+    if "cluster_id" in _columns(conn, "news"):
+        return
+    _add_column(conn, "news", "minhash", "BYTEA" if conn.dialect.name == "postgresql" else "BLOB")
+    _add_column(conn, "news", "cluster_id", "INTEGER")
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.DEDUP_WINDOW_HOURS)
+    index = dedup.LSHIndex()
+    updates, lsh = [], []
+    rows = conn.execute(
+        text("SELECT id, title, summary, language, published_at FROM news WHERE published_at >= :c ORDER BY id"),
+        {"c": cutoff},
+    )
+    for row_id, title, summary, lang, published_at in rows:
+        sig = dedup.signature(title or "", summary or "", lang or "")
+        if sig is None:
+            continue
+        cid = index.match(sig)
+        if cid is None:
+            cid = row_id
+        index.add(sig, cid)
+        updates.append({"id": row_id, "m": sig, "c": cid})
+        lsh.extend(dedup.lsh_rows(row_id, sig, cid, published_at))
+    if updates:
+        conn.execute(text("UPDATE news SET minhash = :m, cluster_id = :c WHERE id = :id"), updates)
+        conn.execute(text("INSERT INTO news_lsh (bucket, news_id, cluster_id, published_at) "
+                          "VALUES (:bucket, :news_id, :cluster_id, :published_at)"), lsh)
+    conn.execute(text("UPDATE news SET cluster_id = id WHERE cluster_id IS NULL"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_news_cluster_id ON news (cluster_id)"))
+    clusters = len({u["c"] for u in updates})
+    log.info(f"Migrating: clustered {len(updates)} recent stories into {clusters} clusters")
+
+
+def backfill_news_stats(conn):
+    # news_stats is created empty by create_all(); sum the archive once in published_at order, writing each
+    # day's buckets as soon as the next day starts so memory stays at one day of keys
+    if conn.execute(text("SELECT 1 FROM news_stats LIMIT 1")).first() is not None:
+        return
+    delta: Counter = Counter()
+    day, total = None, 0
+    rows = conn.execute(select(News.source_name, News.language, News.tags, News.published_at)
+                        .where(News.published_at.isnot(None)).order_by(News.published_at))
+    for source_name, language, tags, published_at in rows:
+        d = stats.floor(published_at, "d")
+        if d != day and delta:
+            total += len(delta)
+            conn.execute(NewsStat.__table__.insert(), stats.rows(delta))
+            delta.clear()
+        day = d
+        stats.count_story(delta, source_name, language, tags, published_at)
+    if delta:
+        total += len(delta)
+        conn.execute(NewsStat.__table__.insert(), stats.rows(delta))
+    if total:
+        log.info(f"Migrating: backfilled {total} news_stats rows")
+
+
+def create_tables(conn):
+    from .db import Base
+    Base.metadata.create_all(conn)
+
+
+# (version, step). Versions are recorded in schema_migrations and never reused; append new steps at the end.
+# Every step is idempotent, so databases created before versioning replay the whole list once.
+MIGRATIONS = [
+    ("0001_create_tables", create_tables),
+    ("0002_news_url_hash", add_url_hash),
+    ("0003_feed_state_hwm", add_feed_state_hwm),
+    ("0004_news_search_tsv", add_search_tsv),
+    ("0005_news_published_at_id_index", add_published_at_id_index),
+    ("0006_news_tags_backfill", backfill_news_tags),
+    ("0007_feed_state_leases", add_feed_state_leases),
+    ("0008_feed_state_schedule", add_feed_state_schedule),
+    ("0009_news_clusters", add_news_clusters),
+    ("0010_news_stats_backfill", backfill_news_stats),
+    ("0011_news_fetched_at_index", add_fetched_at_index),
+]
+_LOCK_KEY = 0x6E657773  # pg_advisory_lock id shared by every process that migrates
+
+
+def applied(conn) -> Set[str]:
+    if not inspect(conn).has_table("schema_migrations"):
+        return set()
+    return {v for (v,) in conn.execute(select(SchemaMigration.version))}
+
+
+def pending(conn) -> List[str]:
+    done = applied(conn)
+    return [version for version, _ in MIGRATIONS if version not in done]
+
+
+def run_migrations(conn) -> List[str]:
+    # Each step commits with its version row, so a failed step leaves the earlier ones recorded. On PostgreSQL an
+    # advisory lock makes API workers and ingestors starting together wait for one migrator.
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": _LOCK_KEY})
+        conn.commit()
+    try:
+        SchemaMigration.__table__.create(conn, checkfirst=True)
+        conn.commit()
+        done = applied(conn)
+        ran = []
+        for version, step in MIGRATIONS:
+            if version in done:
+                continue
+            log.info(f"Migrating: {version}")
+            step(conn)
+            conn.execute(SchemaMigration.__table__.insert().values(version=version))
+            conn.commit()
+            ran.append(version)
+        return ran
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _LOCK_KEY})
+            conn.commit()
+
+
+async def migrate(engine=None, apply: bool = True) -> List[str]:
+    # Pending versions are read on the caller's pool (one query when the schema is current); DDL and backfills
+    # run on a dedicated connection so they never hold a pooled one
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+    from .db import engine as default_engine
+    engine = engine or default_engine
+    async with engine.connect() as conn:
+        todo = await conn.run_sync(pending)
+    if not todo or not apply:
+        return todo
+    tmp_engine = create_async_engine(engine.url.render_as_string(hide_password=False), poolclass=NullPool)
+    try:
+        async with tmp_engine.connect() as conn:
+            return await conn.run_sync(run_migrations)
+    finally:
+        await tmp_engine.dispose()
+
+
+async def _main(status: bool):
+    from .db import engine
+    try:
+        todo = await migrate(engine, apply=False)
+        for version, _ in MIGRATIONS:
+            print(f"{'pending' if version in todo else 'applied'}  {version}")
+        if todo and not status:
+            ran = await migrate(engine)
+            print(f"Applied {len(ran)} migration(s)")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations (python -m app.migrations)")
+    parser.add_argument("--status", action="store_true", help="List applied/pending versions without migrating")
+    asyncio.run(_main(parser.parse_args().status))
@@ -1,21 +1,114 @@
 from __future__ import annotations
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Text, DateTime, Integer
+from sqlalchemy import String, Text, DateTime, Integer, BigInteger, LargeBinary, JSON, Index, ForeignKey
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from .db import Base
 
 class News(Base):
     __tablename__ = "news"
+    __table_args__ = (
+        # keyset pagination on (published_at, id)
+        Index("ix_news_published_at_id", "published_at", "id"),
+        # /news/stream update replay (fetched_at is bumped on every update)
+        Index("ix_news_fetched_at", "fetched_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     source_name: Mapped[str] = mapped_column(String(200), index=True)
     title: Mapped[str] = mapped_column(String(1024), index=True)
     url: Mapped[str] = mapped_column(String(2048), unique=False, index=True)
+    url_hash: Mapped[str] = mapped_column(String(64), unique=True, index=True, nullable=True)  # sha256(url), dedup key
     published_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), index=True)
     summary: Mapped[str] = mapped_column(Text, default="")
     content: Mapped[str] = mapped_column(Text, default="")
     language: Mapped[str] = mapped_column(String(8), default="")
     tags: Mapped[str] = mapped_column(String(512), default="")  # comma separated
     fetched_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-    raw: Mapped[dict] = mapped_column(JSONB().with_variant(Text, "sqlite"), default={})  # JSONB for PG, Text for SQLite
+    raw: Mapped[dict] = mapped_column(JSONB().with_variant(JSON, "sqlite"), default={})  # JSONB for PG, JSON (TEXT) for SQLite
+    # Near-duplicate clustering (see dedup.py): MinHash signature of the headline, id of the cluster's first story
+    minhash: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
+    cluster_id: Mapped[int] = mapped_column(Integer, index=True, nullable=True)
+
+class NewsLSH(Base):
+    # LSH buckets (MinHash bands) of recent stories; pruned to the dedup window so it stays small
+    __tablename__ = "news_lsh"
+
+    bucket: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    news_id: Mapped[int] = mapped_column(Integer, ForeignKey("news.id", ondelete="CASCADE"), primary_key=True)
+    cluster_id: Mapped[int] = mapped_column(Integer)
+    published_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), index=True)
+
+class NewsTag(Base):
+    # Normalized copy of News.tags, one row per (news, tag); (tag, news_id) serves exact tag filters and /tags counts
+    __tablename__ = "news_tags"
+    __table_args__ = (
+        Index("ix_news_tags_tag_news_id", "tag", "news_id"),
+    )
+
+    news_id: Mapped[int] = mapped_column(Integer, ForeignKey("news.id", ondelete="CASCADE"), primary_key=True)
+    tag: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+class NewsStat(Base):
+    # Rollup behind /news/stats, kept current by save_items: stories per (grain, bucket, source, language, tag).
+    # grain is "h" (UTC hour) or "d" (UTC day); tag "*" counts every story once, other tags once per tagged story
+    __tablename__ = "news_stats"
+    __table_args__ = (
+        Index("ix_news_stats_tag_bucket", "grain", "tag", "bucket"),
+    )
+
+    grain: Mapped[str] = mapped_column(String(1), primary_key=True)
+    bucket: Mapped[DateTime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    source_name: Mapped[str] = mapped_column(String(200), primary_key=True)
+    language: Mapped[str] = mapped_column(String(8), primary_key=True)
+    tag: Mapped[str] = mapped_column(String(64), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+class FeedState(Base):
+    # Per-source polling state (HTTP validators etc.), keyed by the source name from sources.yml
+    __tablename__ = "feed_state"
+
+    source_name: Mapped[str] = mapped_column(String(200), primary_key=True)
+    url: Mapped[str] = mapped_column(String(2048), default="")
+    etag: Mapped[str] = mapped_column(String(512), default="")
+    last_modified: Mapped[str] = mapped_column(String(128), default="")
+    content_hash: Mapped[str] = mapped_column(String(64), default="")
+    # High-water mark for incremental ingestion: newest dated entry seen, plus the entry ids in the last feed
+    last_published_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=True)
+    seen_ids: Mapped[list] = mapped_column(JSONB().with_variant(JSON, "sqlite"), default=list)
+    # Poll lease (see sharding.claim_sources): who is polling this source right now, and until when
+    lease_owner: Mapped[str] = mapped_column(String(128), nullable=True)
+    lease_until: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_polled_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Adaptive scheduler (SCHEDULER_MODE=adaptive): current interval, consecutive errors and next due time
+    next_poll_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=True)
+    poll_interval: Mapped[int] = mapped_column(Integer, nullable=True)
+    error_count: Mapped[int] = mapped_column(Integer, default=0, nullable=True)
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class WebhookOutbox(Base):
+    # Durable queue of webhook deliveries; rows are written in the ingest transaction and deleted once delivered
+    __tablename__ = "webhook_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    endpoint: Mapped[str] = mapped_column(String(2048), index=True)
+    event: Mapped[str] = mapped_column(String(64), default="news.created")
+    payload: Mapped[dict] = mapped_column(JSONB().with_variant(JSON, "sqlite"), default={})
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+    last_error: Mapped[str] = mapped_column(String(512), default="")
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+class AppMeta(Base):
+    # Small key/value counters shared between processes (e.g. news_version, bumped on every ingest write)
+    __tablename__ = "app_meta"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0)
+
+class SchemaMigration(Base):
+    # Applied steps of app.migrations.MIGRATIONS; startup only compares this table with the list
+    __tablename__ = "schema_migrations"
+
+    version: Mapped[str] = mapped_column(String(128), primary_key=True)
+    applied_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
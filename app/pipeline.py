@@ -0,0 +1,248 @@
+from __future__ import annotations
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import metrics
+from .config import settings
+from .db import SessionLocal
+from .ingest import save_items
+from .logging_util import get_logger
+from .models import FeedState
+from .sharding import claim_sources, release_sources, lease_owner
+from .sources.base import Source, Item, FetchResult
+from . import translation
+
+log = get_logger("pipeline")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_STOP = object()
+_STAGE_NAMES = ("fetch", "parse", "translate", "save")
+_stages: Dict[str, tuple] = {}
+
+
+@dataclass
+class SourceResult:
+    name: str
+    fetched: int = 0
+    inserted: int = 0
+    error: Optional[str] = None
+    not_modified: bool = False
+    fetch_ms: int = 0
+    parse_ms: int = 0
+    translate_ms: int = 0
+    save_ms: int = 0
+
+    @property
+    def total_ms(self) -> int:
+        return self.fetch_ms + self.parse_ms + self.translate_ms + self.save_ms
+
+
+def _stage_series(name: str):
+    # Per-source histogram children, bound once per source and reused every poll
+    series = _stages.get(name)
+    if series is None:
+        series = _stages[name] = tuple(metrics.SOURCE_STAGE.labels(name, stage) for stage in _STAGE_NAMES) \
+            + (metrics.SOURCE_ERRORS.labels(name),)
+    return series
+
+
+def _observe(res: SourceResult):
+    fetch, parse, translate, save, errors = _stage_series(res.name)
+    if res.error:
+        errors.inc()
+        return
+    fetch.observe(res.fetch_ms / 1000)
+    if res.not_modified:
+        return
+    parse.observe(res.parse_ms / 1000)
+    translate.observe(res.translate_ms / 1000)
+    save.observe(res.save_ms / 1000)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    # feedparser, HTML cleaning and the (sync) translator run here, off the event loop
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, settings.PARSE_WORKERS), thread_name_prefix="parse")
+    return _executor
+
+
+def _make_client():
+    import httpx  # type: ignore
+    limit = max(1, settings.FETCH_CONCURRENCY)
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.FETCH_TIMEOUT),
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=limit * 2, max_keepalive_connections=limit),
+        headers={"User-Agent": settings.FETCH_USER_AGENT},
+    )
+
+
+def _next_chunk(items: Iterator[Item], size: int) -> List[Item]:
+    return list(islice(items, size))
+
+
+async def _fetch_one(src: Source, client, state: Optional[FeedState], sem: asyncio.Semaphore,
+                     queue: asyncio.Queue, res: SourceResult):
+    loop = asyncio.get_running_loop()
+    size = max(1, settings.PARSE_CHUNK_SIZE)
+    async with sem:
+        async def _work():
+            t0 = time.perf_counter()
+            fetched = await src.download(client, state)
+            t1 = time.perf_counter()
+            res.fetch_ms = int((t1 - t0) * 1000)
+            if fetched is not None and fetched.not_modified:
+                return fetched, iter(()), []
+            # parse() is a generator: the first slice does the feedparser work, later ones build items lazily
+            items = src.parse(fetched, state)
+            chunk = await loop.run_in_executor(_get_executor(), _next_chunk, items, size)
+            res.parse_ms = int((time.perf_counter() - t1) * 1000)
+            return fetched, items, chunk
+        try:
+            fetched, items, chunk = await asyncio.wait_for(_work(), timeout=settings.FETCH_TIMEOUT)
+        except asyncio.TimeoutError:
+            res.error = "timeout"
+            log.warning(f"[{src.name}] timed out after {settings.FETCH_TIMEOUT:.0f}s")
+            return
+        except Exception as e:
+            res.error = str(e) or e.__class__.__name__
+            log.warning(f"[{src.name}] fetch failed: {res.error}")
+            return
+    res.not_modified = bool(fetched is not None and fetched.not_modified)
+    while True:
+        if chunk:
+            t0 = time.perf_counter()
+            try:
+                chunk = await src.translate_items(chunk)
+            except Exception as e:
+                log.warning(f"[{src.name}] translation failed, keeping originals: {e}")
+            res.translate_ms += int((time.perf_counter() - t0) * 1000)
+        res.fetched += len(chunk)
+        t0 = time.perf_counter()
+        try:
+            following = await loop.run_in_executor(_get_executor(), _next_chunk, items, size) if len(chunk) == size else []
+        except Exception as e:
+            res.error = str(e) or e.__class__.__name__
+            log.warning(f"[{src.name}] parse failed: {res.error}")
+            following = []
+        res.parse_ms += int((time.perf_counter() - t0) * 1000)
+        # Hand off to the single writer; the bounded queue gives us back-pressure
+        await queue.put((src, fetched, chunk, res, not following))
+        if not following:
+            return
+        chunk = following
+
+
+def _update_state(session: AsyncSession, states: Dict[str, FeedState], src: Source, fetched: Optional[FetchResult]):
+    if fetched is None:
+        return
+    st = states.get(src.name)
+    if st is None:
+        st = FeedState(source_name=src.name)
+        session.add(st)
+        states[src.name] = st
+    st.url = getattr(src, "url", "") or ""
+    # A capped poll keeps no validators: a 304 / same-hash next time would skip the entries it left behind
+    st.etag = "" if fetched.truncated else fetched.etag[:512]
+    st.last_modified = "" if fetched.truncated else fetched.last_modified[:128]
+    st.content_hash = "" if fetched.truncated else fetched.content_hash
+    if not fetched.not_modified:
+        st.last_published_at = fetched.last_published_at
+        st.seen_ids = list(fetched.seen_ids)
+
+
+async def _writer(queue: asyncio.Queue, session: AsyncSession, states: Dict[str, FeedState]):
+    while True:
+        job = await queue.get()
+        if job is _STOP:
+            return
+        src, fetched, items, res, last = job
+        t0 = time.perf_counter()
+        try:
+            # Validators ride along with the source's last chunk and only if nothing failed,
+            # so a partly saved feed is re-fetched
+            if last and not res.error:
+                _update_state(session, states, src, fetched)
+            if items:
+                res.inserted += await save_items(session, items)
+            elif session.new or session.dirty:
+                await session.commit()
+        except Exception as e:
+            res.error = str(e) or e.__class__.__name__
+            log.exception(f"Source error: {src.name}: {e}")
+            await session.rollback()
+        res.save_ms += int((time.perf_counter() - t0) * 1000)
+        if not last:
+            continue
+        if res.not_modified:
+            log.info(f"[{src.name}] not modified fetch={res.fetch_ms}ms")
+        else:
+            log.info(f"[{src.name}] fetched={res.fetched} inserted={res.inserted} "
+                     f"fetch={res.fetch_ms}ms parse={res.parse_ms}ms translate={res.translate_ms}ms save={res.save_ms}ms")
+
+
+async def _load_states(session: AsyncSession, names: List[str]) -> Dict[str, FeedState]:
+    try:
+        rows = (await session.execute(select(FeedState).where(FeedState.source_name.in_(names)))).scalars().all()
+    except Exception as e:
+        log.warning(f"Could not load feed state, polling unconditionally: {e}")
+        await session.rollback()
+        return {}
+    return {r.source_name: r for r in rows}
+
+
+def _snapshot(st: FeedState) -> FeedState:
+    # Producers read a transient copy so a rollback in the writer can never expire what they see
+    return FeedState(**{c.key: getattr(st, c.key) for c in FeedState.__table__.columns})
+
+
+async def run_sources(sources: Sequence[Source]) -> Dict[str, SourceResult]:
+    if not sources:
+        return {}
+    start = time.perf_counter()
+    sem = asyncio.Semaphore(max(1, settings.FETCH_CONCURRENCY))
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.FETCH_CONCURRENCY))
+    owner = lease_owner()
+    async with SessionLocal() as session:
+        # Only poll what this process holds a lease for; other workers/nodes may have the rest
+        claimed = set(await claim_sources(session, [src.name for src in sources], owner))
+        sources = [src for src in sources if src.name in claimed]
+        results: Dict[str, SourceResult] = {src.name: SourceResult(name=src.name) for src in sources}
+        if not sources:
+            return results
+        states = await _load_states(session, [src.name for src in sources])
+        snapshots = {name: _snapshot(st) for name, st in states.items()}
+        writer = asyncio.create_task(_writer(queue, session, states))
+        try:
+            async with _make_client() as client:
+                await asyncio.gather(*(
+                    _fetch_one(src, client, snapshots.get(src.name), sem, queue, results[src.name]) for src in sources
+                ))
+        finally:
+            await queue.put(_STOP)
+            await writer
+            await release_sources(session, list(results), owner)
+    for r in results.values():
+        _observe(r)
+    wall_ms = int((time.perf_counter() - start) * 1000)
+    serial_ms = sum(r.total_ms for r in results.values())
+    failed = sum(1 for r in results.values() if r.error)
+    polled = len(sources) - failed
+    hits = sum(1 for r in results.values() if r.not_modified)
+    hit_rate = (hits / polled * 100.0) if polled else 0.0
+    log.info(f"Cycle: sources={len(sources)} failed={failed} wall={wall_ms}ms serial_sum={serial_ms}ms "
+             f"cache_hits={hits}/{polled} ({hit_rate:.0f}%)")
+    ts = translation.stats.snapshot()
+    if ts["hits"] or ts["misses"]:
+        log.info(f"Translation: hits={ts['hits']} misses={ts['misses']} hit_ratio={ts['hit_ratio']:.0%} "
+                 f"provider_calls={ts['provider_calls']} errors={ts['provider_errors']} "
+                 f"avg_latency={ts['provider_avg_ms']:.0f}ms")
+    return results
@@ -0,0 +1,150 @@
+from __future__ import annotations
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from .config import settings
+from .logging_util import get_logger
+
+log = get_logger("ratelimit")
+
+# take(key) -> (allowed, tokens left, seconds until one token is available)
+Take = Tuple[bool, float, float]
+
+
+def _retry_after(allowed: bool, tokens: float, refill: float) -> float:
+    return 0.0 if allowed or refill <= 0 else (1.0 - tokens) / refill
+
+
+class TokenBuckets:
+    # In-memory buckets, bounded and with idle expiry; state is per process
+    def __init__(self, rate_per_minute: float, burst: float, max_keys: int = 100000):
+        self.refill = rate_per_minute / 60.0  # tokens per second
+        self.burst = float(burst)
+        self.max_keys = max(1, int(max_keys))
+        # A bucket idle this long is full again, i.e. indistinguishable from a missing one
+        self.idle_after = self.burst / self.refill if self.refill > 0 else float("inf")
+        self.store: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, last_ts), LRU first
+
+    def take_now(self, key: str, now: Optional[float] = None) -> Take:
+        now = time.monotonic() if now is None else now
+        tokens, last_ts = self.store.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + max(0.0, now - last_ts) * self.refill)
+        allowed = tokens >= 1.0
+        if allowed:
+            tokens -= 1.0
+        self.store[key] = (tokens, now)
+        self._expire(now)
+        return allowed, tokens, _retry_after(allowed, tokens, self.refill)
+
+    async def take(self, key: str) -> Take:
+        return self.take_now(key)
+
+    def _expire(self, now: float):
+        store = self.store
+        while store:
+            key, (_, last_ts) = next(iter(store.items()))
+            if now - last_ts < self.idle_after and len(store) <= self.max_keys:
+                break
+            del store[key]
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+
+class SQLiteBuckets:
+    # Buckets in a WAL SQLite file: every worker process on the host shares one limit
+    _TAKE = (
+        "INSERT INTO buckets (key, tokens, ts, ok) VALUES (:key, :burst - 1, :now, 1) "
+        "ON CONFLICT(key) DO UPDATE SET "
+        " ok = min(:burst, tokens + max(0, :now - ts) * :refill) >= 1, "
+        " tokens = min(:burst, tokens + max(0, :now - ts) * :refill)"
+        "          - (min(:burst, tokens + max(0, :now - ts) * :refill) >= 1), "
+        " ts = :now "
+        "RETURNING ok, tokens"
+    )
+
+    def __init__(self, path: str, rate_per_minute: float, burst: float):
+        self.refill = rate_per_minute / 60.0
+        self.burst = float(burst)
+        self.idle_after = self.burst / self.refill if self.refill > 0 else 86400.0
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")  # limiter state is disposable
+        self._db.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+                         "ts REAL NOT NULL, ok INTEGER NOT NULL)")
+        self._calls = 0
+
+    def take_now(self, key: str, now: Optional[float] = None) -> Take:
+        # Wall clock: the timestamps are compared across processes
+        now = time.time() if now is None else now
+        with self._lock:
+            ok, tokens = self._db.execute(self._TAKE, {"key": key, "burst": self.burst, "now": now,
+                                                       "refill": self.refill}).fetchone()
+            self._calls += 1
+            if self._calls >= 1000:
+                self._calls = 0
+                self._db.execute("DELETE FROM buckets WHERE ts < ?", (now - self.idle_after,))
+        allowed = bool(ok)
+        return allowed, float(tokens), _retry_after(allowed, float(tokens), self.refill)
+
+    async def take(self, key: str) -> Take:
+        return await asyncio.to_thread(self.take_now, key)
+
+
+class RedisBuckets:
+    # Refill-and-take in one Lua script (one round trip); server TIME so replicas need no clock sync
+    _SCRIPT = """
+local refill = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local b = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(b[1]) or burst
+local ts = tonumber(b[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * refill)
+local ok = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  ok = 1
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return {ok, tostring(tokens)}
+"""
+
+    def __init__(self, url: str, rate_per_minute: float, burst: float, prefix: str = "rl:", client=None):
+        self.refill = rate_per_minute / 60.0
+        self.burst = float(burst)
+        self.prefix = prefix
+        self.ttl = max(1, int(self.burst / self.refill) + 1) if self.refill > 0 else 86400
+        if client is None:
+            import redis.asyncio as redis  # type: ignore
+            client = redis.from_url(url)
+        self._redis = client
+        self._script = client.register_script(self._SCRIPT)
+
+    async def take(self, key: str) -> Take:
+        ok, tokens = await self._script(keys=[self.prefix + key], args=[self.refill, self.burst, self.ttl])
+        allowed, tokens = bool(int(ok)), float(tokens)
+        return allowed, tokens, _retry_after(allowed, tokens, self.refill)
+
+
+def make_backend(rate_per_minute: float, burst: float, kind: Optional[str] = None):
+    kind = (kind or settings.RATE_LIMIT_BACKEND or "memory").lower()
+    try:
+        if kind == "sqlite":
+            return SQLiteBuckets(settings.RATE_LIMIT_SQLITE_PATH, rate_per_minute, burst)
+        if kind == "redis":
+            return RedisBuckets(settings.RATE_LIMIT_REDIS_URL, rate_per_minute, burst, settings.RATE_LIMIT_REDIS_PREFIX)
+    except Exception as e:
+        log.warning(f"Rate limit backend '{kind}' unavailable, using in-memory buckets: {e}")
+    return TokenBuckets(rate_per_minute, burst, settings.RATE_LIMIT_MAX_KEYS)
@@ -2,12 +2,27 @@ from __future__ import annotations
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import asyncio
+import heapq
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
 import pytz
+from sqlalchemy import select, update
+from . import metrics
 from .config import settings
+from .db import SessionLocal
 from .logging_util import get_logger
+from .models import FeedState
+from .pipeline import run_sources, SourceResult
+from .sources.base import Source
 
 log = get_logger("scheduler")
 
+_COALESCE = 5.0  # sources due within this many seconds are polled in one batch
+_RELOAD_EVERY = 300.0  # seconds between sources.yml reloads
+
 def start_scheduler(async_job_fn):
     tz = pytz.timezone(settings.TZ)
     sched = AsyncIOScheduler(timezone=tz)
@@ -17,3 +32,185 @@ def start_scheduler(async_job_fn):
     sched.start()
     log.info(f"Async scheduler started with cron '{cron}' in TZ={settings.TZ}")
     return sched
+
+def start_polling(async_job_fn, load_sources_fn: Callable[[], Sequence[Source]]):
+    # SCHEDULER_MODE=cron: every source on SCHEDULE_CRON; adaptive: per-source next-poll times
+    if (settings.SCHEDULER_MODE or "cron").lower() == "adaptive":
+        sched = AdaptiveScheduler(load_sources_fn)
+        sched.task = asyncio.create_task(sched.run_forever())
+        log.info(f"Adaptive scheduler started (interval {settings.POLL_MIN_INTERVAL:.0f}s..{settings.POLL_MAX_INTERVAL:.0f}s)")
+        return sched
+    return start_scheduler(async_job_fn)
+
+
+def next_interval(interval: float, new_items: int, elapsed: float, bounds: Tuple[float, float],
+                  capped: bool = False) -> float:
+    # Aim for ~POLL_TARGET_NEW_ITEMS new entries per poll, smoothed so one quiet/busy poll doesn't swing it
+    lo, hi = bounds
+    if new_items > 0 and elapsed > 0:
+        ideal = elapsed * settings.POLL_TARGET_NEW_ITEMS / new_items
+        interval = 0.5 * interval + 0.5 * ideal
+        if capped:
+            # The poll hit MAX_ENTRIES_PER_POLL, so newer entries are waiting: come back much sooner
+            interval = min(interval, elapsed / 2)
+    elif elapsed > 0:
+        interval *= 1.5
+    return min(hi, max(lo, interval))
+
+def error_backoff(interval: float, errors: int) -> float:
+    return min(max(interval, settings.POLL_ERROR_MAX_INTERVAL), interval * (2 ** min(errors, 16)))
+
+
+@dataclass
+class _Plan:
+    interval: float
+    errors: int = 0
+    last_polled: Optional[float] = None  # epoch seconds of the last successful poll
+
+
+class AdaptiveScheduler:
+    def __init__(self, load_sources_fn: Callable[[], Sequence[Source]], run=run_sources):
+        self._load = load_sources_fn
+        self._run = run
+        self._heap: List[Tuple[float, str]] = []
+        self._due: Dict[str, float] = {}  # name -> live heap entry; anything else in the heap is stale
+        self._plans: Dict[str, _Plan] = {}
+        self._sources: Dict[str, Source] = {}
+        self._inflight: Set[asyncio.Task] = set()
+        self._wake = asyncio.Event()
+        self._loaded_at = float("-inf")
+        self.lag = 0.0  # seconds the last batch started after its due time
+        self.task: Optional[asyncio.Task] = None
+
+    def bounds(self, src: Source) -> Tuple[float, float]:
+        poll = getattr(src, "poll", {}) or {}
+        if poll.get("poll_interval"):
+            return poll["poll_interval"], poll["poll_interval"]
+        lo = poll.get("min_interval", settings.POLL_MIN_INTERVAL)
+        return lo, max(lo, poll.get("max_interval", settings.POLL_MAX_INTERVAL))
+
+    def _schedule(self, name: str, due: float):
+        self._due[name] = due
+        heapq.heappush(self._heap, (due, name))
+        self._wake.set()
+
+    async def _refresh(self):
+        self._loaded_at = time.monotonic()
+        try:
+            sources = {s.name: s for s in self._load()}
+        except Exception as e:
+            log.warning(f"Could not reload sources, keeping the current set: {e}")
+            return
+        for name in set(self._sources) - set(sources):
+            self._due.pop(name, None)
+            self._plans.pop(name, None)
+        self._sources = sources
+        new = [n for n in sources if n not in self._plans]
+        if not new:
+            return
+        # Resume from feed_state so a restart doesn't poll everything at once
+        states: Dict[str, FeedState] = {}
+        try:
+            async with SessionLocal() as session:
+                rows = (await session.execute(select(FeedState).where(FeedState.source_name.in_(new)))).scalars().all()
+                states = {r.source_name: r for r in rows}
+        except Exception as e:
+            log.warning(f"Could not load poll schedule, starting fresh: {e}")
+        now = time.time()
+        for name in new:
+            st = states.get(name)
+            lo, hi = self.bounds(sources[name])
+            interval = min(hi, max(lo, float(st.poll_interval if st and st.poll_interval else settings.POLL_DEFAULT_INTERVAL)))
+            last = st.last_polled_at.replace(tzinfo=st.last_polled_at.tzinfo or timezone.utc).timestamp() \
+                if st and st.last_polled_at else None
+            self._plans[name] = _Plan(interval=interval, errors=(st.error_count or 0) if st else 0, last_polled=last)
+            due = st.next_poll_at.replace(tzinfo=st.next_poll_at.tzinfo or timezone.utc).timestamp() \
+                if st and st.next_poll_at else now
+            # Spread brand-new sources over a few seconds instead of one burst
+            self._schedule(name, max(now + random.uniform(0, _COALESCE), min(due, now + interval)))
+
+    def _pop_due(self, now: float) -> List[str]:
+        batch = []
+        while self._heap and self._heap[0][0] <= now + _COALESCE:
+            due, name = heapq.heappop(self._heap)
+            if self._due.get(name) != due:
+                continue
+            del self._due[name]
+            if not batch:
+                self.lag = max(0.0, now - due)
+                metrics.SCHEDULER_LAG.set(self.lag)
+            batch.append(name)
+        return batch
+
+    async def run_forever(self):
+        while True:
+            if time.monotonic() - self._loaded_at > _RELOAD_EVERY:
+                await self._refresh()
+            now = time.time()
+            while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)  # drop stale entries
+            if not self._heap or self._heap[0][0] > now:
+                wait = (self._heap[0][0] - now) if self._heap else _RELOAD_EVERY
+                self._wake.clear()
+                try:
+                    # A finished batch reschedules its sources and wakes us early
+                    await asyncio.wait_for(self._wake.wait(), timeout=min(max(wait, 0.05), 30.0))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            batch = self._pop_due(now)
+            if batch:
+                # Batches run side by side; a slow feed must not hold back the others' schedule
+                t = asyncio.create_task(self.poll(batch))
+                self._inflight.add(t)
+                t.add_done_callback(self._inflight.discard)
+
+    async def poll(self, names: List[str]):
+        sources = [self._sources[n] for n in names if n in self._sources]
+        started = time.time()
+        try:
+            results: Dict[str, SourceResult] = await self._run(sources)
+        except Exception as e:
+            log.exception(f"Poll batch failed: {e}")
+            results = {s.name: SourceResult(name=s.name, error=str(e) or e.__class__.__name__) for s in sources}
+        updates = []
+        for src in sources:
+            plan = self._plans.get(src.name)
+            if plan is None:  # removed from sources.yml meanwhile
+                continue
+            res = results.get(src.name)
+            if res is None:
+                # Leased by another worker/node or polled very recently: keep the cadence
+                delay = plan.interval
+            elif res.error:
+                plan.errors += 1
+                delay = error_backoff(plan.interval, plan.errors)
+                log.info(f"[{src.name}] error #{plan.errors}, next poll in {delay:.0f}s")
+            else:
+                elapsed = (started - plan.last_polled) if plan.last_polled else 0.0
+                capped = bool(settings.MAX_ENTRIES_PER_POLL and res.fetched >= settings.MAX_ENTRIES_PER_POLL)
+                plan.interval = next_interval(plan.interval, res.fetched, elapsed, self.bounds(src), capped)
+                plan.errors = 0
+                plan.last_polled = started
+                delay = plan.interval
+            due = time.time() + delay * random.uniform(0.9, 1.1)
+            self._schedule(src.name, due)
+            updates.append({"source_name": src.name, "next_poll_at": datetime.fromtimestamp(due, tz=timezone.utc),
+                            "poll_interval": int(plan.interval), "error_count": plan.errors})
+        await self._persist(updates)
+
+    async def _persist(self, updates: List[Dict]):
+        if not updates:
+            return
+        try:
+            async with SessionLocal() as session:
+                await session.execute(update(FeedState), updates)
+                await session.commit()
+        except Exception as e:
+            log.warning(f"Could not store poll schedule: {e}")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+        for t in list(self._inflight):
+            t.cancel()
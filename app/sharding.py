@@ -0,0 +1,110 @@
+from __future__ import annotations
+import bisect
+import hashlib
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .db import dialect_insert
+from .logging_util import get_logger
+from .models import FeedState
+
+log = get_logger("sharding")
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    # Consistent hashing with virtual nodes: changing the worker count only moves ~1/N of the sources
+    def __init__(self, nodes: Iterable[str], vnodes: int = 64):
+        self._ring: List[int] = []
+        self._owners: Dict[int, str] = {}
+        for node in nodes:
+            for i in range(vnodes):
+                h = _hash(f"{node}#{i}")
+                self._owners[h] = node
+                bisect.insort(self._ring, h)
+        if not self._ring:
+            raise ValueError("HashRing needs at least one node")
+
+    def owner(self, key: str) -> str:
+        i = bisect.bisect(self._ring, _hash(key)) % len(self._ring)
+        return self._owners[self._ring[i]]
+
+
+def worker_name(index: int) -> str:
+    return f"worker-{index}"
+
+
+def shard(sources: Sequence, index: int, workers: int) -> List:
+    if workers <= 1:
+        return list(sources)
+    ring = HashRing(worker_name(i) for i in range(workers))
+    me = worker_name(index)
+    return [s for s in sources if ring.owner(s.name) == me]
+
+
+def lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def claim_sources(session: AsyncSession, names: List[str], owner: Optional[str] = None) -> List[str]:
+    # Lease rows in feed_state: a source is polled by whoever holds an unexpired lease, and not
+    # again until SOURCE_MIN_REPOLL seconds after the last poll, even by another node in the same cycle
+    if not names or not settings.SOURCE_LEASES:
+        return names
+    owner = owner or lease_owner()
+    insert = dialect_insert(session.bind.dialect.name)
+    if insert is None:
+        return names
+    now = datetime.now(timezone.utc)
+    try:
+        await session.execute(
+            insert(FeedState).values([{"source_name": n, "url": "", "seen_ids": []} for n in names])
+            .on_conflict_do_nothing(index_elements=["source_name"])
+        )
+        stmt = (
+            update(FeedState)
+            .where(FeedState.source_name.in_(names))
+            .where(or_(FeedState.lease_until.is_(None), FeedState.lease_until < now, FeedState.lease_owner == owner))
+            .where(or_(FeedState.last_polled_at.is_(None),
+                       FeedState.last_polled_at < now - timedelta(seconds=settings.SOURCE_MIN_REPOLL)))
+            .values(lease_owner=owner, lease_until=now + timedelta(seconds=settings.SOURCE_LEASE_TTL))
+            .returning(FeedState.source_name)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = set((await session.execute(stmt)).scalars().all())
+        await session.commit()
+    except Exception as e:
+        log.warning(f"Could not claim source leases, polling all assigned sources: {e}")
+        await session.rollback()
+        return names
+    skipped = len(names) - len(claimed)
+    if skipped:
+        log.info(f"Leases: {skipped} source(s) held by another worker or polled recently, skipping")
+    return [n for n in names if n in claimed]
+
+
+async def release_sources(session: AsyncSession, names: List[str], owner: Optional[str] = None):
+    if not names or not settings.SOURCE_LEASES:
+        return
+    owner = owner or lease_owner()
+    try:
+        await session.execute(
+            update(FeedState)
+            .where(FeedState.source_name.in_(names), FeedState.lease_owner == owner)
+            .values(lease_owner=None, lease_until=None, last_polled_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+    except Exception as e:
+        # Leases expire on their own after SOURCE_LEASE_TTL
+        log.warning(f"Could not release source leases: {e}")
+        await session.rollback()
@@ -1,9 +1,29 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Iterable, Optional, Dict, Any
-from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional, Dict, Any, List
+from datetime import datetime, date, timezone
 
-@dataclass
+# Item.raw is stored as-is in news.raw: a few short JSON values per item, never parser objects
+RAW_MAX_TEXT = 512
+RAW_MAX_ITEMS = 10
+RAW_MAX_DEPTH = 3
+
+def bounded_raw(value: Any, depth: int = 0) -> Any:
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return value[:RAW_MAX_TEXT]
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if depth >= RAW_MAX_DEPTH:
+        return None
+    if isinstance(value, dict):
+        return {str(k)[:64]: bounded_raw(v, depth + 1) for k, v in list(value.items())[:RAW_MAX_ITEMS * 2]}
+    if isinstance(value, (list, tuple, set)):
+        return [bounded_raw(v, depth + 1) for v in list(value)[:RAW_MAX_ITEMS]]
+    return str(value)[:RAW_MAX_TEXT]
+
+@dataclass(frozen=True, slots=True)
 class Item:
     source_name: str
     title: str
@@ -14,12 +34,43 @@ class Item:
     language: str
     raw: Dict[str, Any]
 
+@dataclass
+class FetchResult:
+    # Raw HTTP payload handed from the async download stage to the parse stage
+    url: str
+    body: Optional[bytes] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    # Validators for the next conditional GET
+    etag: str = ""
+    last_modified: str = ""
+    content_hash: str = ""
+    # 304 from the server, or a 200 whose body hash matches the previous poll
+    not_modified: bool = False
+    # Filled in by parse(): the new high-water mark and the entry ids present in this feed
+    last_published_at: Optional[datetime] = None
+    seen_ids: List[str] = field(default_factory=list)
+    # parse() left new entries for the next poll (MAX_ENTRIES_PER_POLL), so that poll must not be conditional
+    truncated: bool = False
+
 class Source:
     def __init__(self, name: str, language: str = "", translate_to_tr: bool = False, meta: Dict[str, Any] | None = None, **kwargs):
         self.name = name
         self.language = language or ""
         self.translate_to_tr = bool(translate_to_tr)
         self.meta = meta or {}
+        # Adaptive scheduler overrides from sources.yml (poll_interval / min_interval / max_interval, seconds)
+        self.poll: Dict[str, float] = {}
 
     def fetch(self) -> Iterable[Item]:
         raise NotImplementedError
+
+    async def download(self, client, state=None) -> Optional[FetchResult]:
+        # Sources without an HTTP feed do all their work in parse()
+        return None
+
+    def parse(self, result: Optional[FetchResult], state=None) -> Iterator[Item]:
+        # Lazily consumed by the pipeline in PARSE_CHUNK_SIZE slices
+        return iter(self.fetch())
+
+    async def translate_items(self, items: List[Item]) -> List[Item]:
+        return items
@@ -1,78 +1,198 @@
 from __future__ import annotations
+import hashlib
+from dataclasses import replace
 from datetime import datetime, timezone
-from typing import Iterable, List, Dict, Any
+from typing import Iterator, List, Dict, Any, Optional
 
-from .base import Source, Item
+from .base import Source, Item, FetchResult, bounded_raw
+from ..config import settings
+from ..text import html_to_text
 from ..translation import Translator
+from ..utils import as_utc
 
 def _clean_html(summary: str) -> str:
-    try:
-        # Lazy import BeautifulSoup
-        try:
-            from bs4 import BeautifulSoup  # type: ignore
-        except Exception:
-            return summary or ""
-        return BeautifulSoup(summary or "", "html.parser").get_text(" ", strip=True)
-    except Exception:
-        return summary or ""
+    return html_to_text(summary or "", settings.SUMMARY_MAX_CHARS)
+
+def _entry_datetime(e):
+    # published_parsed may be missing -> fallback to now()
+    if getattr(e, "published_parsed", None):
+        return datetime(*e.published_parsed[:6], tzinfo=timezone.utc), True
+    if getattr(e, "updated_parsed", None):
+        return datetime(*e.updated_parsed[:6], tzinfo=timezone.utc), True
+    return datetime.now(tz=timezone.utc), False
+
+def _entry_key(e) -> str:
+    return (getattr(e, "id", "") or getattr(e, "link", "") or "").strip()
+
+def _entry_raw(e) -> Dict[str, Any]:
+    # The entry fields worth keeping in news.raw; content bodies, links and *_detail are dropped
+    get = getattr(e, "get", None)
+    if get is None:
+        return {}
+    src = get("source") or {}
+    raw = {
+        "id": get("id"),
+        "author": get("author"),
+        "published": get("published"),
+        "updated": get("updated"),
+        "comments": get("comments"),
+        "tags": [t.get("term") for t in (get("tags") or []) if hasattr(t, "get")],
+        "source": {"title": src.get("title"), "href": src.get("href")} if src and hasattr(src, "get") else None,
+    }
+    return {k: v for k, v in raw.items() if v}
 
 class RSSSource(Source):
-    def __init__(self, name: str, url: str, language: str = "", translate_to_tr: bool = False, translator_cfg: Dict[str, Any] | None = None, **kwargs):
+    def __init__(self, name: str, url: str, language: str = "", translate_to_tr: bool = False, translator_cfg: Dict[str, Any] | None = None,
+                 translator: Optional[Translator] = None, **kwargs):
         super().__init__(name, language, translate_to_tr, meta={"type": "rss", "url": url})
         self.url = url
-        self.translator = Translator(translator_cfg or {}) if translate_to_tr else None
+        self.translator = (translator or Translator(translator_cfg or {})) if translate_to_tr else None
 
-    def fetch(self) -> Iterable[Item]:
+    def fetch(self) -> Iterator[Item]:
         # Lazy import feedparser
         try:
             import feedparser  # type: ignore
         except Exception:
-            # If feedparser is not available, return empty list so the app continues running
-            return []
-        feed = feedparser.parse(self.url)
-        items: List[Item] = []
-        # Only process the first entry (most recent item)
-        for e in (getattr(feed, "entries", []) or [])[:1]:
-            # published_parsed may be missing -> fallback to now()
-            if hasattr(e, "published_parsed") and e.published_parsed:
-                dt = datetime(*e.published_parsed[:6], tzinfo=timezone.utc)
-            elif hasattr(e, "updated_parsed") and e.updated_parsed:
-                dt = datetime(*e.updated_parsed[:6], tzinfo=timezone.utc)
-            else:
-                dt = datetime.now(tz=timezone.utc)
-
-            title = getattr(e, "title", "").strip()
-            link = getattr(e, "link", "").strip()
-            summary = _clean_html(getattr(e, "summary", ""))
+            # If feedparser is not available, yield nothing so the app continues running
+            return iter(())
+        return self._build_items(feedparser.parse(self.url))
+
+    async def download(self, client, state=None) -> Optional[FetchResult]:
+        # Validators are only reused while the configured URL stays the same
+        if state is not None and (state.url or "") != self.url:
+            state = None
+        headers = {}
+        if state is not None:
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+        r = await client.get(self.url, headers=headers)
+        if r.status_code == 304 and state is not None:
+            return FetchResult(url=self.url, etag=r.headers.get("etag") or state.etag,
+                               last_modified=r.headers.get("last-modified") or state.last_modified,
+                               content_hash=state.content_hash, not_modified=True)
+        r.raise_for_status()
+        body = r.content
+        digest = hashlib.sha256(body).hexdigest()
+        return FetchResult(
+            url=str(r.url), body=body, headers=dict(r.headers),
+            etag=r.headers.get("etag") or "", last_modified=r.headers.get("last-modified") or "",
+            content_hash=digest,
+            not_modified=state is not None and digest == state.content_hash,
+        )
+
+    def parse(self, result: Optional[FetchResult], state=None) -> Iterator[Item]:
+        if result is None or result.body is None:
+            yield from self.fetch()
+            return
+        try:
+            import feedparser  # type: ignore
+        except Exception:
+            return
+        # Pass the response headers through so feedparser can still sniff encoding / base URL
+        headers = {k.lower(): v for k, v in (result.headers or {}).items()}
+        headers.setdefault("content-location", result.url)
+        feed = feedparser.parse(result.body, response_headers=headers)
+        result.body = None  # parsed; don't keep the payload around while items stream out
+        # Translation is left to translate_items() so the pipeline can batch it across entries
+        items = self._build_items(feed, state, result, translate=False)
+        del feed
+        yield from items
+
+    def _wants_translation(self, lang: str) -> bool:
+        return bool(self.translator) and (lang or "").lower().startswith("en")
+
+    async def translate_items(self, items: List[Item]) -> List[Item]:
+        todo = [it for it in items if self._wants_translation(it.language)]
+        if not todo:
+            return items
+        texts = [it.title for it in todo] + [it.summary for it in todo]
+        try:
+            out = await self.translator.translate_many(texts, source_lang="en", target_lang="tr")
+        except Exception:
+            return items
+        n = len(todo)
+        pairs = iter(zip(out[:n], out[n:]))
+        result = []
+        for it in items:
+            if self._wants_translation(it.language):
+                tr_title, tr_summary = next(pairs)
+                # Store original in raw
+                raw = dict(original=bounded_raw(dict(title=it.title, summary=it.summary, language=it.language)), **(it.raw or {}))
+                it = replace(it, title=tr_title or it.title, summary=tr_summary or it.summary,
+                             content=tr_summary or it.summary, language="tr", raw=raw)
+            result.append(it)
+        return result
+
+    def _new_entries(self, feed, state=None, result: Optional[FetchResult] = None):
+        # Incremental ingestion: skip entries already seen or older than the source's high-water mark
+        if state is not None and (state.url or "") != self.url:
+            state = None
+        seen = set((state.seen_ids or []) if state is not None else [])
+        hwm = as_utc(state.last_published_at) if state is not None else None
+        new_hwm = hwm
+        keys: List[str] = []
+        fresh = []
+        for e in (getattr(feed, "entries", []) or []):
+            dt, dated = _entry_datetime(e)
+            key = _entry_key(e)
+            if key:
+                keys.append(key)
+            if key and key in seen:
+                continue
+            if hwm is not None and dt < hwm:
+                continue
+            fresh.append((dt, dated, key, e))
+        # Oldest first, so ids follow publish order and a capped poll leaves the newest entries for the next one
+        fresh.sort(key=lambda p: p[0])
+        if settings.MAX_ENTRIES_PER_POLL > 0 and len(fresh) > settings.MAX_ENTRIES_PER_POLL:
+            dropped = {key for _, _, key, _ in fresh[settings.MAX_ENTRIES_PER_POLL:] if key}
+            fresh = fresh[:settings.MAX_ENTRIES_PER_POLL]
+            keys = [k for k in keys if k not in dropped]
+            if result is not None:
+                result.truncated = True
+        for dt, dated, _, _ in fresh:
+            # Undated entries get now(); they must not push the mark past real publish times
+            if dated and (new_hwm is None or dt > new_hwm):
+                new_hwm = dt
+        if result is not None:
+            result.last_published_at = new_hwm
+            result.seen_ids = keys[:max(0, settings.SEEN_IDS_MAX)]
+        return [(dt, e) for dt, _, _, e in fresh]
+
+    def _build_items(self, feed, state=None, result: Optional[FetchResult] = None, translate: bool = True) -> Iterator[Item]:
+        meta = getattr(feed, "feed", {}) or {}
+        feed_raw = bounded_raw(dict(title=meta.get("title", ""), link=meta.get("link", "")))
+        # Copy out the few fields items are built from, so the parsed tree (content bodies, *_detail,
+        # already-seen entries) is freed before the items stream through translation and the writer
+        fresh = [(dt, getattr(e, "title", "").strip(), getattr(e, "link", "").strip(), getattr(e, "summary", ""), _entry_raw(e))
+                 for dt, e in self._new_entries(feed, state, result)]
+        del feed, meta
+        fresh.reverse()  # popped from the end, so items still come out oldest first
+        while fresh:
+            dt, title, link, summary, entry_raw = fresh.pop()
+            summary = _clean_html(summary)
             content = summary
 
             lang = self.language or "en"
 
             # If the source is English and translate_to_tr is true, translate title/summary
-            if self.translator and (lang.lower().startswith("en")):
+            raw: Dict[str, Any] = {}
+            if translate and self._wants_translation(lang):
                 try:
                     tr_title = self.translator.translate(title, source_lang="en", target_lang="tr") if title else title
                     tr_summary = self.translator.translate(summary, source_lang="en", target_lang="tr") if summary else summary
                     # Store original in raw
-                    raw = dict(original=dict(title=title, summary=summary, language=lang))
+                    raw["original"] = bounded_raw(dict(title=title, summary=summary, language=lang))
                     title, summary, content, lang = tr_title or title, tr_summary or summary, tr_summary or summary, "tr"
                 except Exception:
                     raw = {}
-            else:
-                raw = {}
 
-            base_raw = dict(
-                feed=dict(title=getattr(getattr(feed, "feed", {}), "get", lambda *_: "")("title", ""),
-                          link=getattr(getattr(feed, "feed", {}), "get", lambda *_: "")("link", ""))
-            )
-            # add entry raw if available
-            try:
-                base_raw["e"] = e
-            except Exception:
-                pass
-            raw.update(base_raw)
-
-            items.append(Item(
+            raw["feed"] = feed_raw
+            raw["entry"] = bounded_raw(entry_raw)
+
+            yield Item(
                 source_name=self.name,
                 title=title,
                 url=link,
@@ -81,5 +201,4 @@ class RSSSource(Source):
                 content=content,
                 language=lang,
                 raw=raw,
-            ))
-        return items
+            )
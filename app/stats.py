@@ -0,0 +1,79 @@
+from __future__ import annotations
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, select, update
+
+from .models import NewsStat
+from .utils import as_utc, split_tags
+
+# /news/stats rollup. save_items adds +1 per inserted story (and -1/+1 when an update moves a story to another
+# bucket, source, language or tag set) to the hour and day buckets of news_stats in the same transaction, so range
+# queries read a few thousand pre-summed rows instead of counting news.
+
+ALL = "*"  # tag value of the per-story total; real tags would double count stories with several tags
+GRAINS = {"hour": "h", "day": "d"}
+DIMENSIONS = {"source": NewsStat.source_name, "language": NewsStat.language, "tag": NewsStat.tag}
+_KEY = ("grain", "bucket", "source_name", "language", "tag")
+
+
+def floor(dt: datetime, grain: str) -> datetime:
+    t = as_utc(dt).astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return t.replace(hour=0) if grain == "d" else t
+
+
+def count_story(delta: Counter, source_name, language, tags, published_at, sign: int = 1):
+    if published_at is None:
+        return
+    hour, day = floor(published_at, "h"), floor(published_at, "d")
+    source, lang = (source_name or "")[:200], (language or "")[:8]
+    for tag in [ALL] + [t[:64] for t in split_tags(tags)]:
+        delta[("h", hour, source, lang, tag)] += sign
+        delta[("d", day, source, lang, tag)] += sign
+
+
+def rows(delta: Counter) -> List[Dict[str, Any]]:
+    # Sorted so concurrent writers take the row locks in the same order
+    return [dict(zip(_KEY, key), count=n) for key, n in sorted(delta.items()) if n]
+
+
+async def apply(session, insert, delta: Counter):
+    values = rows(delta)
+    if not values:
+        return
+    if insert is not None:
+        stmt = insert(NewsStat)
+        stmt = stmt.on_conflict_do_update(index_elements=list(_KEY), set_={"count": NewsStat.count + stmt.excluded["count"]})
+        await session.execute(stmt, values)
+        return
+    t = NewsStat.__table__
+    for v in values:
+        key = and_(*[t.c[k] == v[k] for k in _KEY])
+        res = await session.execute(update(t).where(key).values(count=t.c["count"] + v["count"]))
+        if not res.rowcount:
+            await session.execute(t.insert().values(**v))
+
+
+def query(interval: str, group_by: List[str], source: Optional[str], lang: Optional[str], tags: List[str],
+          published_from: Optional[datetime], published_to: Optional[datetime], limit: int):
+    grain = GRAINS[interval]
+    if tags and "tag" not in group_by:
+        group_by = group_by + ["tag"]  # a story with two of the tags is one row per tag, so keep them apart
+    cols = [NewsStat.bucket] + [DIMENSIONS[d] for d in group_by]
+    conds = [NewsStat.grain == grain]
+    if tags:
+        conds.append(NewsStat.tag.in_(tags) if len(tags) > 1 else NewsStat.tag == tags[0])
+    else:
+        conds.append(NewsStat.tag != ALL if "tag" in group_by else NewsStat.tag == ALL)
+    if source:
+        conds.append(NewsStat.source_name == source)
+    if lang:
+        conds.append(NewsStat.language == lang)
+    if published_from:
+        conds.append(NewsStat.bucket >= floor(published_from, grain))
+    if published_to:
+        conds.append(NewsStat.bucket < published_to)
+    n = func.sum(NewsStat.count)
+    return (select(*cols, n.label("count")).where(and_(*conds)).group_by(*cols).having(n > 0)
+            .order_by(*cols).limit(limit)), group_by
@@ -0,0 +1,280 @@
+from __future__ import annotations
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from . import metrics
+from .config import settings
+from .db import SessionLocal, engine
+from .logging_util import get_logger
+from .models import News
+from .utils import as_utc
+
+log = get_logger("stream")
+
+# Live news for /news/stream. The ingestor NOTIFYs the ids it committed; every API process LISTENs once, loads
+# those rows with one query and fans the pre-encoded SSE frames out to its subscribers in memory. Without
+# PostgreSQL (or asyncpg) the API polls for new ids instead.
+# SSE ids are "<last created id>:<update mark>", the mark being the newest fetched_at (µs since the epoch) of the
+# stories published so far (save_items bumps fetched_at on update), so a reconnecting client gets both the stories
+# created and those updated meanwhile. Polling mode finds updates the same way.
+
+CHANNEL = "news_events"
+_NOTIFY_IDS = 700  # ids per NOTIFY payload, well under PostgreSQL's 8000-byte limit
+_COLUMNS = (News.id, News.source_name, News.title, News.url, News.published_at, News.summary, News.content,
+            News.language, News.tags, News.cluster_id, News.fetched_at)
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_UPDATE_SLACK = 5_000_000  # µs; update replay starts this far before the client's mark, for commits that landed late
+
+
+async def notify_changes(session, created: List[int], updated: List[int]):
+    # Runs inside the ingest transaction: PostgreSQL only delivers the NOTIFY if the rows commit
+    if session.bind.dialect.name != "postgresql":
+        return
+    for kind, ids in (("c", created), ("u", updated)):
+        for i in range(0, len(ids), _NOTIFY_IDS):
+            await session.execute(select(func.pg_notify(CHANNEL, json.dumps({kind: ids[i:i + _NOTIFY_IDS]}))))
+
+
+def _micros(dt) -> int:
+    return (as_utc(dt) - _EPOCH) // timedelta(microseconds=1) if dt else 0
+
+
+def parse_event_id(value: Optional[str]) -> Optional[Tuple[int, Optional[int]]]:
+    # -> (last created id, update mark); a bare id (no mark) only replays created stories
+    created, _, updated = (value or "").strip().partition(":")
+    if not created.isdigit() or (updated and not updated.isdigit()):
+        return None
+    return int(created), int(updated) if updated else None
+
+
+def _frame(cursor: int, updated: int, kind: str, record: Dict[str, Any]) -> bytes:
+    data = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str)
+    return f"id: {cursor}:{updated}\nevent: news.{kind}\ndata: {data}\n\n".encode("utf-8")
+
+
+class Subscription:
+    __slots__ = ("queue", "closed", "group")
+
+    def __init__(self, group: "_Group"):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, settings.STREAM_QUEUE_SIZE))
+        self.closed = False  # set when the client fell too far behind; it reconnects and replays from the DB
+        self.group = group
+
+
+class _Group:
+    # Subscribers with identical filters share one match per event
+    __slots__ = ("source", "lang", "tags", "all_tags", "subs")
+
+    def __init__(self, source: Optional[str], lang: Optional[str], tags: FrozenSet[str], all_tags: bool):
+        self.source, self.lang, self.tags, self.all_tags = source, lang, tags, all_tags
+        self.subs: set = set()
+
+    def matches(self, rec: Dict[str, Any], rec_tags: FrozenSet[str]) -> bool:
+        if self.source and rec["source_name"] != self.source:
+            return False
+        if self.lang and rec["language"] != self.lang:
+            return False
+        if self.tags:
+            return self.tags <= rec_tags if self.all_tags else not self.tags.isdisjoint(rec_tags)
+        return True
+
+
+class NewsHub:
+    def __init__(self):
+        self._groups: Dict[Tuple, _Group] = {}
+        self.subscribers = 0
+        self.cursor = 0  # highest news id published so far; the SSE id clients resume from
+        self.updated = 0  # update mark: newest fetched_at (µs) among the stories published so far
+        self._recent: Optional[Dict[int, int]] = None  # polling: id -> fetched_at already sent inside the slack window
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, source: Optional[str] = None, lang: Optional[str] = None, tags: List[str] = (),
+                  tag_mode: str = "any") -> Subscription:
+        key = (source or None, lang or None, frozenset(tags), tag_mode == "all")
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _Group(*key)
+        sub = Subscription(group)
+        group.subs.add(sub)
+        self.subscribers += 1
+        self.start()
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        group = sub.group
+        if sub in group.subs:
+            group.subs.discard(sub)
+            self.subscribers -= 1
+            if not group.subs:
+                self._groups.pop((group.source, group.lang, group.tags, group.all_tags), None)
+
+    def publish(self, events: List[Tuple[str, Dict[str, Any]]], updated: int = 0) -> int:
+        # events: ("created" | "updated", record), created ones in id order; updated: the batch's newest fetched_at.
+        # Each frame is encoded once.
+        self.updated = max(self.updated, updated)
+        encoded = []
+        for kind, rec in events:
+            if kind == "created":
+                self.cursor = max(self.cursor, rec["id"])
+            tags = frozenset(t.strip().lower() for t in (rec.get("tags") or "").split(",") if t.strip())
+            encoded.append((rec, tags, _frame(self.cursor, self.updated, kind, rec)))
+        delivered = 0
+        for group in list(self._groups.values()):
+            chunk = b"".join(frame for rec, tags, frame in encoded if group.matches(rec, tags))
+            if not chunk:
+                continue
+            for sub in list(group.subs):
+                if sub.closed:
+                    continue
+                try:
+                    sub.queue.put_nowait(chunk)
+                    delivered += 1
+                except asyncio.QueueFull:
+                    sub.closed = True
+        return delivered
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    async def _run(self):
+        self.cursor, self.updated = await _marks()
+        while True:
+            try:
+                if engine.dialect.name == "postgresql" and engine.dialect.driver == "asyncpg":
+                    await self._listen()
+                else:
+                    await self._poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"News stream feed interrupted, retrying: {e}")
+                await asyncio.sleep(min(30.0, settings.STREAM_POLL_INTERVAL * 5))
+
+    async def _poll(self):
+        while True:
+            await self._catch_up()
+            await self._poll_updates()
+            await asyncio.sleep(settings.STREAM_POLL_INTERVAL)
+
+    async def _catch_up(self):
+        # Everything inserted after the cursor: the polling mode, and gap filling after a LISTEN reconnect
+        while True:
+            rows = await _load(News.id > self.cursor, limit=1000)
+            if rows:
+                if self._recent is not None:
+                    self._recent.update((r["id"], mark) for r, mark in rows)
+                self.publish([("created", r) for r, _ in rows], max(mark for _, mark in rows))
+            if len(rows) < 1000:
+                return
+
+    async def _poll_updates(self):
+        # Stories rewritten since the mark. The window reaches _UPDATE_SLACK back for commits that landed late;
+        # _recent keeps what was already sent in it (created or updated) from going out twice.
+        since = _EPOCH + timedelta(microseconds=max(0, self.updated - _UPDATE_SLACK))
+        stmt = (select(News.id, News.fetched_at).where(News.id <= self.cursor, News.fetched_at > since)
+                .order_by(News.fetched_at).limit(1000))
+        async with SessionLocal() as session:
+            rows = [(i, _micros(f)) for i, f in await session.execute(stmt)]
+        if self._recent is None:
+            self._recent = dict(rows)  # first pass: these were written before the hub started
+            return
+        changed = [i for i, mark in rows if self._recent.get(i) != mark]
+        self._recent.update(rows)
+        if changed:
+            await self._publish_ids([], changed)
+        floor = self.updated - _UPDATE_SLACK
+        self._recent = {i: mark for i, mark in self._recent.items() if mark > floor}
+
+    async def _listen(self):
+        import asyncpg  # type: ignore
+        from sqlalchemy.engine import make_url
+        url = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+        conn = await asyncpg.connect(url.render_as_string(hide_password=False))
+        pending: asyncio.Queue = asyncio.Queue()
+        try:
+            await conn.add_listener(CHANNEL, lambda _c, _pid, _ch, payload: pending.put_nowait(payload))
+            await self._catch_up()
+            log.info(f"News stream listening on '{CHANNEL}'")
+            while True:
+                payloads = [await pending.get()]
+                await asyncio.sleep(0.05)  # coalesce the NOTIFYs of one commit into one query
+                while not pending.empty():
+                    payloads.append(pending.get_nowait())
+                created, updated = [], []
+                for p in payloads:
+                    msg = json.loads(p)
+                    created.extend(msg.get("c") or ())
+                    updated.extend(msg.get("u") or ())
+                await self._publish_ids(created, updated)
+        finally:
+            await conn.close()
+
+    async def _publish_ids(self, created: List[int], updated: List[int]):
+        ids = sorted(set(created) | set(updated))
+        if not ids:
+            return
+        rows = {}
+        for i in range(0, len(ids), 1000):
+            rows.update((r["id"], (r, mark)) for r, mark in await _load(News.id.in_(ids[i:i + 1000])))
+        new = set(created)
+        changed = [rows[i] for i in sorted(set(updated) - new) if i in rows]
+        events = [("created", rows[i][0]) for i in sorted(new) if i in rows] + [("updated", r) for r, _ in changed]
+        self.publish(events, max((mark for _, mark in rows.values()), default=0))
+
+
+async def _marks() -> Tuple[int, int]:
+    async with SessionLocal() as session:
+        max_id, max_fetched = (await session.execute(select(func.max(News.id), func.max(News.fetched_at)))).one()
+    return int(max_id or 0), _micros(max_fetched)
+
+
+def _rows(result) -> List[Tuple[Dict[str, Any], int]]:
+    from .ingest import _payload  # ingest imports this module
+    return [(_payload(dict(r._mapping)), _micros(r.fetched_at)) for r in result]
+
+
+async def _load(cond, limit: Optional[int] = None) -> List[Tuple[Dict[str, Any], int]]:
+    stmt = select(*_COLUMNS).where(cond).order_by(News.id)
+    if limit:
+        stmt = stmt.limit(limit)
+    async with SessionLocal() as session:
+        return _rows(await session.execute(stmt))
+
+
+async def replay(conds, after: int, updated_after: Optional[int]) -> List[bytes]:
+    # Frames a reconnecting client missed (Last-Event-ID), each kind capped at STREAM_REPLAY_LIMIT: stories it had
+    # that were updated since its mark (oldest first, so a cut-off replay resumes where it stopped), then the
+    # stories created after its id. Update events are idempotent, so the slack only re-sends a few.
+    limit = max(1, settings.STREAM_REPLAY_LIMIT)
+    # A bare id starts tracking updates from now; until the hub has loaded its mark, take it from the table
+    frames, mark = [], hub.updated or (await _marks())[1]
+    async with SessionLocal() as session:
+        if updated_after is not None:
+            mark = updated_after
+            since = _EPOCH + timedelta(microseconds=max(0, updated_after - _UPDATE_SLACK))
+            stmt = (select(*_COLUMNS).where(News.id <= after, News.fetched_at > since, *conds)
+                    .order_by(News.fetched_at, News.id).limit(limit))
+            for rec, fetched in _rows(await session.execute(stmt)):
+                mark = max(mark, fetched)
+                frames.append(_frame(after, mark, "updated", rec))
+        stmt = select(*_COLUMNS).where(News.id > after, *conds).order_by(News.id).limit(limit)
+        frames += [_frame(rec["id"], mark, "created", rec) for rec, _ in _rows(await session.execute(stmt))]
+    return frames
+
+
+hub = NewsHub()
+metrics.Gauge("news_stream_subscribers", "Open /news/stream connections", fn=lambda: hub.subscribers, scope=metrics.API)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+from .config import settings
+from .logging_util import get_logger
+from .utils import COMMODITY_KEYWORDS_EN, COMMODITY_KEYWORDS_TR
+
+log = get_logger("tagging")
+
+# Inflectional endings accepted after a Turkish term ("altının", "petrolde", "Brent'ten").
+# Up to three may stack ("bakır-lar-ın-da"); anything else after a term is a different word.
+TR_SUFFIXES = [
+    "lar", "ler", "ları", "leri", "ların", "lerin",
+    "ı", "i", "u", "ü", "yı", "yi", "yu", "yü", "nı", "ni", "nu", "nü",
+    "ın", "in", "un", "ün", "nın", "nin", "nun", "nün", "yın", "yin", "yun", "yün",
+    "a", "e", "ya", "ye", "na", "ne",
+    "da", "de", "ta", "te", "nda", "nde",
+    "dan", "den", "tan", "ten", "ndan", "nden",
+    "la", "le", "yla", "yle", "ki", "daki", "deki", "taki", "teki", "ndaki", "ndeki",
+    "sı", "si", "su", "sü", "m", "n", "ım", "im", "um", "üm", "ımız", "imiz", "ınız", "iniz",
+    "dır", "dir", "dur", "dür", "tır", "tir", "tur", "tür",
+]
+EN_SUFFIXES = ["s", "es", "'s"]
+
+
+def normalize(text: str, lang: str = "") -> str:
+    # NFC + lowercase; Turkish dotted/dotless I handled before lower() ("İ" -> "i", "I" -> "ı")
+    text = unicodedata.normalize("NFC", text or "")
+    if (lang or "").startswith("tr"):
+        text = text.replace("İ", "i").replace("I", "ı")
+    return text.lower()
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    # Terms -> prefix-trie regex: the engine walks the shared prefixes once per position, the way an
+    # Aho-Corasick goto function would, instead of trying each alternative from scratch
+    trie: Dict = {}
+    for t in terms:
+        node = trie
+        for ch in t:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Greedy optional branch: the longest term wins ("natural gas" over "natural")
+        return f"(?:{body})?" if end else body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    # One compiled single-pass matcher per language: word boundary before the term, and after it
+    # either a boundary or (Turkish/English) an inflectional ending followed by a boundary
+    def __init__(self, terms: Dict[str, str], lang: str):
+        self.lang = lang
+        self.terms = terms  # normalized term -> tag
+        self.regex: Optional[re.Pattern] = None
+        if not terms:
+            return
+        suffixes = TR_SUFFIXES if lang == "tr" else EN_SUFFIXES
+        alt = "|".join(re.escape(s) for s in sorted(suffixes, key=len, reverse=True))
+        tail = f"(?:'?(?:{alt})){{0,3}}" if lang == "tr" else f"(?:{alt})?"
+        self.regex = re.compile(rf"(?<!\w)(?P<t>{_trie_pattern(terms)}){tail}(?!\w)")
+
+    def tags(self, text: str) -> List[str]:
+        if self.regex is None or not text:
+            return []
+        found = {self.terms.get(m.group("t")) for m in self.regex.finditer(normalize(text, self.lang))}
+        found.discard(None)
+        return sorted(found)
+
+
+class Tagger:
+    def __init__(self, taxonomy: Dict[str, Dict[str, List[str]]]):
+        # taxonomy: tag -> {lang ("tr" | "en" | "*"): [terms/synonyms]}
+        per_lang: Dict[str, Dict[str, str]] = {"tr": {}, "en": {}}
+        for tag, by_lang in taxonomy.items():
+            for lang, terms in by_lang.items():
+                targets = ["tr", "en"] if lang in ("*", "any", "all") else [lang]
+                for target in targets:
+                    if target not in per_lang:
+                        continue
+                    for term in terms or []:
+                        norm = normalize(str(term), target).strip()
+                        if norm:
+                            per_lang[target].setdefault(norm, str(tag))
+        self.matchers = {lang: KeywordMatcher(terms, lang) for lang, terms in per_lang.items()}
+        self.size = sum(len(t) for t in per_lang.values())
+
+    def tag(self, text: str, lang: str) -> List[str]:
+        return self.matchers["tr" if (lang or "").startswith("tr") else "en"].tags(text)
+
+
+def default_taxonomy() -> Dict[str, Dict[str, List[str]]]:
+    # The built-in keyword lists: every keyword is its own tag
+    tax: Dict[str, Dict[str, List[str]]] = {}
+    for kw in COMMODITY_KEYWORDS_TR:
+        tax.setdefault(kw, {}).setdefault("tr", []).append(kw)
+    for kw in COMMODITY_KEYWORDS_EN:
+        tax.setdefault(kw, {}).setdefault("en", []).append(kw)
+    return tax
+
+
+def _coerce(raw) -> Dict[str, Dict[str, List[str]]]:
+    # tag: [terms]  (all languages)   or   tag: {tr: [...], en: [...]}
+    tax: Dict[str, Dict[str, List[str]]] = {}
+    for tag, spec in (raw or {}).items():
+        if isinstance(spec, dict):
+            tax[str(tag)] = {str(k): [str(t) for t in (v or [])] for k, v in spec.items()}
+        elif isinstance(spec, (list, tuple)):
+            tax[str(tag)] = {"*": [str(t) for t in spec]}
+        elif spec is None:
+            tax[str(tag)] = {"*": [str(tag)]}
+    return tax
+
+
+def load_taxonomy(path: Optional[str] = None, sources_path: str = "config/sources.yml") -> Dict[str, Dict[str, List[str]]]:
+    # TAXONOMY_PATH file first, then a "taxonomy:" block in sources.yml, else the built-in lists
+    import yaml  # type: ignore
+    path = path or settings.TAXONOMY_PATH
+    for p, key in ((path, "tags"), (sources_path, "taxonomy")):
+        if not p or not os.path.exists(p):
+            continue
+        try:
+            with open(p, "r", encoding="utf-8") as f:
+                cfg = yaml.safe_load(f) or {}
+        except Exception as e:
+            log.warning(f"Could not read taxonomy from {p}: {e}")
+            continue
+        raw = cfg.get(key) if isinstance(cfg, dict) else None
+        if raw:
+            tax = _coerce(raw)
+            log.info(f"Loaded taxonomy with {len(tax)} tags from {p}")
+            return tax
+    return default_taxonomy()
+
+
+_tagger: Optional[Tagger] = None
+_lock = threading.Lock()
+
+
+def get_tagger() -> Tagger:
+    global _tagger
+    with _lock:
+        if _tagger is None:
+            try:
+                _tagger = Tagger(load_taxonomy())
+            except Exception as e:
+                log.warning(f"Taxonomy unavailable, using built-in keywords: {e}")
+                _tagger = Tagger(default_taxonomy())
+        return _tagger
@@ -0,0 +1,34 @@
+import asyncio
+import os
+import tempfile
+
+# DB-backed tests run against a throwaway SQLite file; set before app.db builds the engine
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+os.environ.setdefault("WEBHOOK_URLS", "")
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000")
+os.environ.setdefault("RATE_LIMIT_BURST", "100000")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    # Fresh tables per test; returns a runner that disposes the pool so each asyncio.run gets new connections
+    from app.db import Base, engine
+
+    async def reset():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        await engine.dispose()
+
+    def run(coro):
+        async def wrapped():
+            try:
+                return await coro
+            finally:
+                await engine.dispose()
+        return asyncio.run(wrapped())
+
+    asyncio.run(reset())
+    return run
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app import api
+from app.config import settings
+from app.db import SessionLocal
+from app.models import News
+
+AT = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+
+def _seed(n):
+    async def run():
+        # Three stories per published_at, so pages split inside runs of equal sort keys
+        rows = [dict(source_name="S", title=f"t{i}", url=f"https://x/{i}", url_hash=f"{i:064d}",
+                     published_at=AT - timedelta(hours=i // 3), summary="", content="", language="en", tags="",
+                     raw={}) for i in range(n)]
+        async with SessionLocal() as session:
+            await session.execute(insert(News), rows)
+            await session.commit()
+    return run()
+
+
+def _walk(client, **params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        r = client.get("/news", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert r.status_code == 200
+        ids += [row["id"] for row in r.json()]
+        pages += 1
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            return ids, pages
+
+
+def test_keyset_pages_have_no_gaps_or_duplicates(db, monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+    db(_seed(23))
+    with TestClient(api.app) as client:
+        for sort in ("id", "published_at"):
+            for order in ("desc", "asc"):
+                ids, pages = _walk(client, limit=4, sort=sort, order=order, fields="id")
+                assert sorted(ids) == list(range(1, 24)) and pages == 6
+                whole = client.get("/news", params={"limit": 50, "sort": sort, "order": order, "fields": "id"})
+                assert ids == [row["id"] for row in whole.json()]  # same order as one unpaged request
+        assert client.get("/news", params={"cursor": "not-a-cursor"}).status_code == 400
+        cursor = client.get("/news", params={"limit": 2}).headers["x-next-cursor"]
+        assert client.get("/news", params={"cursor": cursor, "sort": "published_at"}).status_code == 400
+        assert client.get("/news", params={"cursor": cursor, "offset": 2}).status_code == 400
@@ -0,0 +1,19 @@
+import gzip
+
+from app import compression
+
+
+def test_negotiate_q_values_and_server_order():
+    offered = ["zstd", "br", "gzip"]
+    assert compression.negotiate("gzip, br", offered) == "br"
+    assert compression.negotiate("gzip;q=1.0, br;q=0.5", offered) == "gzip"
+    assert compression.negotiate("*", offered) == "zstd"
+    assert compression.negotiate("*, zstd;q=0", offered) == "br"
+    assert compression.negotiate("identity", offered) is None
+    assert compression.negotiate("", offered) is None
+
+
+def test_streamed_gzip_round_trips():
+    z = compression.stream("gzip")
+    out = b"".join(z.chunk(b'{"id":%d}\n' % i) for i in range(100)) + z.end()
+    assert gzip.decompress(out) == b"".join(b'{"id":%d}\n' % i for i in range(100))
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from app import ingest, stats
+from app.config import settings
+from app.db import SessionLocal
+from app.models import News, NewsStat, NewsTag, WebhookOutbox
+from app.sources.base import Item
+
+AT = datetime(2025, 9, 1, 10, tzinfo=timezone.utc)
+
+
+def _item(url, title, published=AT, summary="Spot gold rose."):
+    return Item("Kitco", title, url, published, summary, summary, "en", {})
+
+
+def test_save_items_insert_reinsert_update_and_batch_dedup(db, monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_URLS", "http://hook/a")
+    monkeypatch.setattr(settings, "DEDUP_ENABLED", False)
+
+    async def save(*items):
+        async with SessionLocal() as session:
+            return await ingest.save_items(session, list(items))
+
+    async def one(stmt):
+        async with SessionLocal() as session:
+            return (await session.execute(stmt)).scalar()
+
+    async def run():
+        # Two copies of one URL in a batch: a single row, the newer copy wins
+        assert await save(_item("https://x/1", "Gold old copy"), _item("https://x/1", "Gold new copy", AT + timedelta(minutes=5)),
+                          _item("https://x/2", "Oil slips", summary="Crude oil fell.")) == 2
+        assert await one(select(News.title).where(News.url == "https://x/1")) == "Gold new copy"
+        assert await one(select(func.count()).select_from(WebhookOutbox)) == 2
+        assert await one(select(func.count()).select_from(NewsTag).where(NewsTag.tag == "oil")) == 1
+        total = select(func.sum(NewsStat.count)).where(NewsStat.grain == "d", NewsStat.tag == stats.ALL)
+        assert await one(total) == 2
+
+        # Re-insert of the same story: nothing written
+        fetched = await one(select(News.fetched_at).where(News.url == "https://x/2"))
+        assert await save(_item("https://x/2", "Oil slips", summary="Crude oil fell.")) == 0
+        assert await one(select(func.count(News.id))) == 2
+
+        # Newer published_at: the row is rewritten in place, re-tagged, fetched_at bumped, stats moved
+        later = AT + timedelta(days=1)
+        assert await save(_item("https://x/2", "Gold rallies", later, "Gold rallied.")) == 0
+        assert await one(select(News.title).where(News.url == "https://x/2")) == "Gold rallies"
+        assert await one(select(News.fetched_at).where(News.url == "https://x/2")) != fetched
+        assert await one(select(func.count()).select_from(NewsTag).where(NewsTag.tag == "oil")) == 0
+        assert await one(total) == 2
+        assert await one(total.where(NewsStat.bucket == stats.floor(later, "d"))) == 1
+        assert await one(select(func.count()).select_from(WebhookOutbox)) == 2  # updates don't enqueue webhooks
+    db(run())
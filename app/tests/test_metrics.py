@@ -0,0 +1,15 @@
+from app import api, metrics  # noqa: F401  (api registers the stream gauge)
+
+
+def _families(text):
+    return {line.split()[2] for line in text.splitlines() if line.startswith("# TYPE")}
+
+
+def test_each_process_serves_only_the_families_it_fills():
+    served_api, served_ingest = _families(metrics.render(metrics.API)), _families(metrics.render(metrics.INGEST))
+    assert {"news_http_requests_total", "news_response_cache_hits_total", "news_stream_subscribers"} <= served_api
+    assert {"news_inserted_total", "news_source_errors_total", "news_translation_cache_hits_total",
+            "news_translation_request_duration_seconds", "news_webhook_backlog"} <= served_ingest
+    assert not served_api & {"news_inserted_total", "news_translation_cache_hits_total", "news_scheduler_lag_seconds"}
+    assert not served_ingest & {"news_http_requests_total", "news_response_cache_hits_total"}
+    assert "news_db_pool_checked_out" in served_api & served_ingest
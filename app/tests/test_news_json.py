@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import api
+
+
+def _rows():
+    utc, ist = timezone.utc, timezone(timedelta(hours=3))
+    return [dict(id=i, source_name="Kitco", title=f"Altın yükseldi {i}", url=f"https://x/{i}", published_at=at,
+                 summary="s", content="c", language="tr", tags="gold", cluster_id=None)
+            for i, at in enumerate([datetime(2025, 9, 1, tzinfo=utc), datetime(2025, 9, 1, 1, 2, 3, 450000, tzinfo=utc),
+                                    datetime(2025, 9, 1, 9, tzinfo=ist)])]
+
+
+def test_fast_path_bytes_match_news_out_response_model(monkeypatch):
+    ref = FastAPI()
+
+    @ref.get("/news", response_model=List[api.NewsOut], response_model_exclude_unset=True)
+    def news():
+        return [api.NewsOut.model_validate(r) for r in _rows()]
+
+    expected = TestClient(ref).get("/news").content
+    assert b'"2025-09-01T00:00:00Z"' in expected
+    assert api._dumps(_rows()) == expected
+    monkeypatch.setattr(api, "_orjson", False)  # json fallback when orjson isn't installed
+    assert api._dumps(_rows()) == expected
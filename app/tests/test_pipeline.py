@@ -0,0 +1,37 @@
+import httpx
+from sqlalchemy import func, select
+
+from app import pipeline
+from app.config import settings
+from app.db import SessionLocal
+from app.models import News
+from app.sources.rss_source import RSSSource
+
+_FEED = "<rss><channel><title>T</title>{}</channel></rss>".format("".join(
+    f"<item><guid>e{i}</guid><title>Gold story number {i}</title><link>https://x/{i}</link>"
+    f"<pubDate>Mon, 01 Sep 2025 10:0{i}:00 GMT</pubDate></item>" for i in range(5)))
+
+
+def test_capped_poll_of_unchanged_feed_is_finished_next_poll(db, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_ENTRIES_PER_POLL", 3)
+    monkeypatch.setattr(settings, "DEDUP_ENABLED", False)
+    monkeypatch.setattr(settings, "SOURCE_MIN_REPOLL", 0)  # three polls back to back
+    conditional = []
+
+    def handler(request):
+        conditional.append("if-none-match" in request.headers)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=_FEED.encode(), headers={"etag": '"v1"'})
+
+    monkeypatch.setattr(pipeline, "_make_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    async def poll():
+        res = (await pipeline.run_sources([RSSSource("S", "https://x/feed")]))["S"]
+        async with SessionLocal() as session:
+            return res.not_modified, (await session.execute(select(func.count(News.id)))).scalar()
+
+    assert db(poll()) == (False, 3)
+    assert db(poll()) == (False, 5)  # the capped poll kept no validators: unconditional GET
+    assert db(poll()) == (True, 5)
+    assert conditional == [False, False, True]
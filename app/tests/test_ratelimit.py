@@ -0,0 +1,44 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+from app.ratelimit import RedisBuckets, SQLiteBuckets, TokenBuckets
+
+
+def test_memory_buckets_refill_and_expire():
+    b = TokenBuckets(60, 2, max_keys=2)
+    assert [b.take_now("k", 0.0)[0] for _ in range(3)] == [True, True, False]
+    assert b.take_now("k", 0.0)[2] == pytest.approx(1.0)
+    assert b.take_now("k", 1.0)[0] is True
+    b.take_now("a", 1.0)
+    b.take_now("b", 1.0)
+    assert len(b) == 2  # oldest key evicted
+
+
+def test_sqlite_buckets_share_one_limit_across_instances():
+    path = os.path.join(tempfile.mkdtemp(), "rl.db")
+    a, b = SQLiteBuckets(path, 60, 3), SQLiteBuckets(path, 60, 3)  # two worker processes on one host
+    taken = [a.take_now("ip", 100.0)[0], b.take_now("ip", 100.0)[0], a.take_now("ip", 100.0)[0],
+             b.take_now("ip", 100.0)[0]]
+    assert taken == [True, True, True, False]
+    assert b.take_now("ip", 100.0)[2] == pytest.approx(1.0)
+    assert a.take_now("ip", 101.0)[0] is True and b.take_now("ip", 101.0)[0] is False  # one token per second
+    assert a.take_now("other", 101.0)[0] is True
+
+
+def test_redis_buckets_share_one_limit_across_instances():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def run():
+        server = fakeredis.FakeServer()
+        a, b = (RedisBuckets("", 60, 3, client=fakeredis.FakeAsyncRedis(server=server)) for _ in range(2))
+        taken = [(await bucket.take("ip"))[0] for bucket in (a, b, a, b)]
+        assert taken == [True, True, True, False]
+        allowed, tokens, retry = await a.take("ip")
+        assert not allowed and 0 < retry <= 1.0
+        assert (await b.take("other"))[0] is True
+        assert 0 < await a._redis.ttl(a.prefix + "ip") <= a.ttl  # idle buckets expire on their own
+
+    asyncio.run(run())
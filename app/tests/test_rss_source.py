@@ -0,0 +1,23 @@
+import time
+from types import SimpleNamespace
+
+from app.config import settings
+from app.sources.base import FetchResult
+from app.sources.rss_source import RSSSource
+
+
+def _feed(n):
+    entries = [SimpleNamespace(id=f"e{i}", link=f"https://x/{i}", title=f"number {i}", summary="",
+                               published_parsed=time.gmtime(1_700_000_000 + 60 * i)) for i in range(n)]
+    return SimpleNamespace(feed={}, entries=entries[::-1])  # feeds list newest first
+
+
+def test_capped_poll_keeps_oldest_and_leaves_rest_for_next_poll(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_ENTRIES_PER_POLL", 3)
+    src, feed = RSSSource("S", "https://x/feed"), _feed(5)
+    result = FetchResult(url=src.url)
+    titles = [it.title for it in src._build_items(feed, None, result, translate=False)]
+    assert titles == ["number 0", "number 1", "number 2"]
+    state = SimpleNamespace(url=src.url, seen_ids=result.seen_ids, last_published_at=result.last_published_at)
+    titles = [it.title for it in src._build_items(feed, state, FetchResult(url=src.url), translate=False)]
+    assert titles == ["number 3", "number 4"]
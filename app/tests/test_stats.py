@@ -0,0 +1,23 @@
+from collections import Counter
+from datetime import datetime, timezone
+
+from app import stats
+
+
+def test_story_counts_once_per_tag_and_total():
+    delta = Counter()
+    at = datetime(2025, 9, 1, 13, 47, tzinfo=timezone.utc)
+    stats.count_story(delta, "Kitco", "en", "gold,silver", at)
+    hour, day = datetime(2025, 9, 1, 13, tzinfo=timezone.utc), datetime(2025, 9, 1, tzinfo=timezone.utc)
+    assert delta[("h", hour, "Kitco", "en", stats.ALL)] == 1
+    assert delta[("d", day, "Kitco", "en", "silver")] == 1
+    assert len(delta) == 6
+
+
+def test_update_moves_story_between_buckets():
+    delta = Counter()
+    stats.count_story(delta, "Kitco", "en", "gold", datetime(2025, 9, 1, 10, tzinfo=timezone.utc), -1)
+    stats.count_story(delta, "Kitco", "en", "gold", datetime(2025, 9, 1, 10, 30, tzinfo=timezone.utc))
+    assert stats.rows(delta) == []
+    stats.count_story(delta, "Kitco", "en", "gold", datetime(2025, 9, 2, 1, tzinfo=timezone.utc))
+    assert {r["bucket"].day for r in stats.rows(delta)} == {2}
@@ -0,0 +1,97 @@
+import asyncio
+
+from app.stream import NewsHub, parse_event_id
+
+
+def _hub():
+    hub = NewsHub()
+    hub.start = lambda: None
+    return hub
+
+
+def _rec(id, lang="en", tags="gold,fed", source="Kitco"):
+    return {"id": id, "source_name": source, "language": lang, "tags": tags, "title": f"t{id}"}
+
+
+def test_filters_and_single_chunk_per_batch():
+    async def run():
+        hub = _hub()
+        every, tr, gold_fed = hub.subscribe(), hub.subscribe(lang="tr"), hub.subscribe(tags=["gold", "fed"], tag_mode="all")
+        oil = hub.subscribe(tags=["oil"])
+        hub.publish([("created", _rec(1)), ("created", _rec(2, lang="tr", tags="gold"))])
+        chunk = every.queue.get_nowait()
+        assert chunk.count(b"event: news.created") == 2 and every.queue.empty()
+        assert b"id: 2:0\n" in tr.queue.get_nowait()
+        assert b'"id":1' in gold_fed.queue.get_nowait() and gold_fed.queue.empty()
+        assert oil.queue.empty()
+        hub.unsubscribe(oil)
+        assert hub.subscribers == 3
+    asyncio.run(run())
+
+
+def test_slow_subscriber_is_closed_and_updates_keep_cursor():
+    async def run():
+        from app.config import settings
+        old, settings.STREAM_QUEUE_SIZE = settings.STREAM_QUEUE_SIZE, 1
+        try:
+            hub = _hub()
+            sub = hub.subscribe()
+        finally:
+            settings.STREAM_QUEUE_SIZE = old
+        hub.publish([("created", _rec(5))])
+        hub.publish([("updated", _rec(3))])
+        assert sub.closed and hub.cursor == 5
+    asyncio.run(run())
+
+
+def test_update_frames_carry_a_resumable_mark():
+    async def run():
+        hub = _hub()
+        sub = hub.subscribe()
+        hub.publish([("created", _rec(7))])
+        hub.publish([("updated", _rec(3))], updated=1_700_000_000_000_000)
+        assert b"id: 7:0\n" in sub.queue.get_nowait()
+        assert b"id: 7:1700000000000000\nevent: news.updated" in sub.queue.get_nowait()
+    asyncio.run(run())
+    assert parse_event_id("7:1700000000000000") == (7, 1_700_000_000_000_000)
+    assert parse_event_id("7") == (7, None)
+    assert parse_event_id("x") is None and parse_event_id(None) is None
+
+
+def test_polling_publishes_updates_once_and_bare_id_replay_gets_a_mark(db, monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from app import ingest, stream
+    from app.db import SessionLocal
+    from app.sources.base import Item
+
+    at = datetime(2025, 9, 1, tzinfo=timezone.utc)
+
+    def item(i, published):
+        return Item("S", f"Gold story number {i}", f"https://x/{i}", published, "s", "", "en", {})
+
+    async def save(*items):
+        async with SessionLocal() as session:
+            await ingest.save_items(session, list(items))
+
+    async def run():
+        await save(item(1, at))
+        hub = _hub()
+        monkeypatch.setattr(stream, "hub", hub)
+        first = (await stream.replay([], 0, None))[0]  # hub not started yet: the mark comes from the table
+        assert first.startswith(b"id: 1:") and not first.startswith(b"id: 1:0\n")
+        sub = hub.subscribe()
+        hub.cursor, hub.updated = await stream._marks()
+        await hub._poll_updates()  # seeds what existed before the hub
+        await save(item(2, at))
+        await hub._catch_up()
+        await hub._poll_updates()
+        await save(item(1, at + timedelta(hours=1)))
+        await hub._poll_updates()
+        await hub._poll_updates()
+        frames = b""
+        while not sub.queue.empty():
+            frames += sub.queue.get_nowait()
+        assert frames.count(b"event: news.created") == 1 and frames.count(b"event: news.updated") == 1
+        assert b'event: news.updated\ndata: {"id":1' in frames
+    db(run())
@@ -0,0 +1,19 @@
+from app.tagging import Tagger, default_taxonomy
+
+
+def test_whole_words_only():
+    t = Tagger(default_taxonomy())
+    assert t.tag("Oil prices jump amid turmoil", "en") == ["oil"]
+    assert t.tag("Market turmoil deepens", "en") == []
+
+
+def test_turkish_suffixes_and_case():
+    t = Tagger(default_taxonomy())
+    assert t.tag("ALTININ onsu yükseldi, petrolde düşüş", "tr") == ["altın", "petrol"]
+    assert t.tag("Altınbaş Holding", "tr") == []
+
+
+def test_synonyms_map_to_tag():
+    t = Tagger({"natural gas": {"en": ["natural gas", "natgas"]}, "altın": {"tr": ["külçe altın", "altın"]}})
+    assert t.tag("Natgas futures slip", "en") == ["natural gas"]
+    assert t.tag("Külçe altının fiyatı", "tr") == ["altın"]
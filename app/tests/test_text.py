@@ -0,0 +1,27 @@
+from bs4 import BeautifulSoup
+
+from app.text import _fast, html_to_text
+
+FIXTURES = [
+    '<a href="https://news.google.com/rss/articles/CBMi?oc=5" target="_blank">Gold hits record</a>&nbsp;&nbsp;<font color="#6f6f6f">Reuters</font>',
+    "<ol><li><a href='x'>Oil slips</a></li><li>Brent &amp; WTI</li></ol>",
+    '<p>It&#8217;s a &ldquo;bull&rdquo; market&hellip;</p><img src="a.jpg" alt="x > y" /><p>The post <a href="p">X</a> appeared first on Site.</p>',
+    "S&P 500 and AT&T rise <3% as &copy 2024 &lang;x&rang;",
+    "Altın &amp; gümüş<br/>ons\xa0fiyatı <!-- ad --> yükseldi",
+    "<p>Oil</p><script>var a = '<b>';</script><style>p{}</style>",
+    "Tea &rarrw; coffee &foo; &#150; bar <div>unclosed<br",
+]
+
+
+def test_matches_beautifulsoup():
+    for markup in FIXTURES:
+        assert html_to_text(markup) == BeautifulSoup(markup, "html.parser").get_text(" ", strip=True), markup
+
+
+def test_common_markup_skips_beautifulsoup():
+    assert all(_fast(m) is not None for m in FIXTURES[:5])
+
+
+def test_length_cap():
+    out = html_to_text("<p>" + "altın " * 1000 + "</p>", max_chars=100)
+    assert len(out) <= 101 and out.endswith("altın…")
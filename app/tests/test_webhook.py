@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import httpx
+from sqlalchemy import func, select
+
+from app import webhook
+from app.config import settings
+from app.db import SessionLocal
+from app.models import WebhookOutbox
+
+
+def _dispatcher(handler):
+    d = webhook.WebhookDispatcher()
+    d._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return d
+
+
+async def _outbox():
+    async with SessionLocal() as session:
+        return (await session.execute(select(WebhookOutbox.attempts).order_by(WebhookOutbox.id))).scalars().all()
+
+
+def test_dispatcher_leases_retries_and_recovers_a_crashed_claim(db, monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_URLS", "http://hook/a")
+    monkeypatch.setattr(settings, "WEBHOOK_BACKOFF", 0.05)
+    monkeypatch.setattr(settings, "WEBHOOK_TIMEOUT", 0.1)  # lease = timeout x (batches + 1)
+    received, fail = [], [True]
+
+    async def handler(request):
+        # Rows are claimed and committed before delivery: another dispatcher finds nothing due meanwhile
+        assert await _dispatcher(handler).dispatch_due() == 0
+        if fail[0]:
+            fail[0] = False
+            return httpx.Response(500)
+        received.append(json.loads(request.content)["record"]["id"])
+        return httpx.Response(200)
+
+    async def run():
+        async with SessionLocal() as session:
+            await webhook.enqueue_news(session, [{"id": 1}, {"id": 2}])
+            await session.commit()
+        d = _dispatcher(handler)
+        assert await d.dispatch_due() == 2  # first POST fails: both rows wait for the retry, in order
+        assert await _outbox() == [1, 0] and received == []
+        await asyncio.sleep(0.1)
+        assert await d.dispatch_due() == 2
+        assert await _outbox() == [] and received == [1, 2] and d.backlog == 0
+
+        # A dispatcher that dies mid-delivery leaves its claim; the row comes due again when the lease runs out
+        async with SessionLocal() as session:
+            await webhook.enqueue_news(session, [{"id": 3}])
+            await session.commit()
+        hang = _dispatcher(lambda request: asyncio.sleep(10))
+        task = asyncio.create_task(hang.dispatch_due())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        assert await d.dispatch_due() == 0
+        await asyncio.sleep(0.25)
+        assert await d.dispatch_due() == 1 and received == [1, 2, 3]
+        async with SessionLocal() as session:
+            assert (await session.execute(select(func.count(WebhookOutbox.id)))).scalar() == 0
+    db(run())
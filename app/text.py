@@ -0,0 +1,117 @@
+from __future__ import annotations
+import re
+from html.entities import html5, name2codepoint
+from typing import List, Optional
+
+# HTML -> plain text for feed summaries. Produces what BeautifulSoup(markup, "html.parser").get_text(" ", strip=True)
+# does (text runs between tags, entities decoded, each run stripped, joined by one space) with a single regex
+# scan; markup the scanner can't vouch for (unusual tags/entities, stray "<") goes through BeautifulSoup itself.
+
+_TAG = re.compile(
+    r"<(?:!--.*?--|/?[a-zA-Z][-.:\w]*(?:\s+[^\s=/>\"'<]+(?:\s*=\s*(?:\"[^\"]*\"|'[^']*'|[^\s\"'=<>`]+))?)*\s*/?)>",
+    re.S,
+)
+_OPEN = re.compile(r"<(?:[a-zA-Z/!?]|$)")  # "<" starting markup the scanner didn't match; "<3" / "a < b" stay text
+_TAG_NAME = re.compile(r"</?([a-zA-Z][-.:\w]*)")
+_ENTITY = re.compile(r"&(?:#([0-9]{1,7});|#[xX]([0-9a-fA-F]{1,6});|([a-zA-Z][-.a-zA-Z0-9]*)(;?))")
+# Elements whose text BeautifulSoup treats specially (excluded from get_text, or raw text for the tokenizer)
+_SPECIAL = frozenset("script style template rt rp textarea title xmp iframe noembed noframes noscript plaintext".split())
+_KNOWN = frozenset(k.rstrip(";") for k in html5)
+_HTML4 = {name: html5[name + ";"] for name in name2codepoint}  # html5 values: &lang; is U+27E8, not U+2329
+
+_soup_cls = None
+
+
+def _decode(run: str) -> Optional[str]:
+    if "&" not in run:
+        return run
+    out: List[str] = []
+    pos = 0
+    for m in _ENTITY.finditer(run):
+        dec, hexa, name, semi = m.groups()
+        if dec or hexa:
+            cp = int(dec or hexa, 10 if dec else 16)
+            # BeautifulSoup maps 0x80-0x9F through windows-1252 and replaces invalid code points
+            if cp == 0 or 0x80 <= cp <= 0x9F or 0xD800 <= cp <= 0xDFFF or cp > 0x10FFFF:
+                return None
+            char = chr(cp)
+        elif name in _HTML4:
+            char = _HTML4[name]
+        elif name in _KNOWN or semi:
+            return None  # HTML5-only names and "&unknown;" have their own quirks
+        else:
+            continue  # "S&P", "AT&T": literal text
+        out.append(run[pos:m.start()])
+        out.append(char)
+        pos = m.end()
+    out.append(run[pos:])
+    return "".join(out)
+
+
+def _fast(markup: str) -> Optional[str]:
+    parts: List[str] = []
+    pos = 0
+    for m in _TAG.finditer(markup):
+        tag = m.group(0)
+        if not tag.startswith("<!--"):
+            name = _TAG_NAME.match(tag).group(1).lower()
+            if name in _SPECIAL:
+                return None
+        run = markup[pos:m.start()]
+        if run:
+            if "<" in run and _OPEN.search(run):
+                return None
+            run = _decode(run)
+            if run is None:
+                return None
+            run = run.strip()
+            if run:
+                parts.append(run)
+        pos = m.end()
+    run = markup[pos:]
+    if run:
+        if ("<" in run and _OPEN.search(run)) or run.endswith("&") or re.search(r"&[#a-zA-Z][-.a-zA-Z0-9]*$", run):
+            return None  # unterminated tag or reference at the very end
+        run = _decode(run)
+        if run is None:
+            return None
+        run = run.strip()
+        if run:
+            parts.append(run)
+    return " ".join(parts)
+
+
+def soup_text(markup: str) -> str:
+    global _soup_cls
+    if _soup_cls is None:
+        try:
+            from bs4 import BeautifulSoup  # type: ignore
+            _soup_cls = BeautifulSoup
+        except Exception:
+            _soup_cls = False
+    if not _soup_cls:
+        return markup
+    try:
+        return _soup_cls(markup, "html.parser").get_text(" ", strip=True)
+    except Exception:
+        return markup
+
+
+def _cap(text: str, max_chars: int) -> str:
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    space = cut.rfind(" ")
+    return (cut[:space] if space > max_chars * 0.8 else cut).rstrip() + "…"
+
+
+def html_to_text(markup: str, max_chars: int = 0) -> str:
+    if not markup:
+        return ""
+    if "<" not in markup and "&" not in markup:
+        text = markup.strip()
+    else:
+        text = _fast(markup)
+        if text is None:
+            text = soup_text(markup)
+    return _cap(text, max_chars)
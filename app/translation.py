@@ -1,8 +1,146 @@
 from __future__ import annotations
-from typing import Optional, Dict
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, List, Iterable
+
+from . import metrics
+from .config import settings
+from .logging_util import get_logger
+
+log = get_logger("translation")
+
+
+class TranslationCache:
+    # Small persistent (text hash, source_lang, target_lang) -> translation store with TTL + size eviction
+    def __init__(self, path: str, max_entries: int = 50000, ttl_seconds: float = 30 * 86400):
+        self.path = path or ":memory:"
+        self.max_entries = max(0, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self._lock = threading.Lock()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT PRIMARY KEY, translated TEXT NOT NULL, created REAL NOT NULL, used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_translations_used ON translations (used)")
+        self._writes = 0
+
+    @staticmethod
+    def key(text: str, source_lang: str, target_lang: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{source_lang}:{target_lang}:{digest}"
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, str] = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT key, translated FROM translations WHERE key IN ({marks}) AND created > ?",
+                    (*chunk, now - self.ttl),
+                ).fetchall()
+                found.update(rows)
+            if found:
+                self._db.executemany("UPDATE translations SET used = ? WHERE key = ?", [(now, k) for k in found])
+        return found
+
+    def put_many(self, pairs: Dict[str, str]):
+        if not pairs:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO translations (key, translated, created, used) VALUES (?, ?, ?, ?)",
+                [(k, v, now, now) for k, v in pairs.items()],
+            )
+            self._writes += len(pairs)
+            # Amortize eviction: only look at the table size every few hundred writes
+            if self._writes >= 500:
+                self._writes = 0
+                self._evict(now)
+
+    def _evict(self, now: float):
+        self._db.execute("DELETE FROM translations WHERE created <= ?", (now - self.ttl,))
+        if self.max_entries:
+            (count,) = self._db.execute("SELECT count(*) FROM translations").fetchone()
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM translations WHERE key IN (SELECT key FROM translations ORDER BY used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+
+class TranslationStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.provider_calls = 0
+        self.provider_errors = 0
+        self.provider_seconds = 0.0
+
+    def record_lookup(self, hits: int, misses: int):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def record_call(self, seconds: float, ok: bool):
+        metrics.TRANSLATION_LATENCY.observe(seconds)
+        with self._lock:
+            self.provider_calls += 1
+            self.provider_seconds += seconds
+            if not ok:
+                self.provider_errors += 1
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "provider_calls": self.provider_calls,
+                "provider_errors": self.provider_errors,
+                "provider_avg_ms": (self.provider_seconds * 1000.0 / self.provider_calls) if self.provider_calls else 0.0,
+            }
+
+
+_cache: Optional[TranslationCache] = None
+_cache_lock = threading.Lock()
+stats = TranslationStats()
+
+
+def get_cache() -> TranslationCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranslationCache(
+                settings.TRANSLATION_CACHE_PATH,
+                max_entries=settings.TRANSLATION_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.TRANSLATION_CACHE_TTL_DAYS * 86400,
+            )
+        return _cache
+
 
 class Translator:
     def __init__(self, cfg: Dict):
+        self.configure(cfg)
+        self._client = None
+        self._aclient = None
+
+    def configure(self, cfg: Dict):
         self.cfg = cfg or {}
         self.primary = (self.cfg.get("provider_primary") or "").lower()
         self.fallback = (self.cfg.get("provider_fallback") or "").lower()
@@ -10,45 +148,96 @@ class Translator:
     def translate(self, text: str, source_lang: str = "en", target_lang: str = "tr") -> str:
         if not text:
             return text
-        # try primary
-        if self.primary == "libretranslate":
-            out = self._libretranslate(text, source_lang, target_lang)
-            if out:
-                return out
-        elif self.primary == "mymemory":
-            out = self._mymemory(text, source_lang, target_lang)
-            if out:
-                return out
-        # fallback
-        if self.fallback == "libretranslate":
-            out = self._libretranslate(text, source_lang, target_lang)
-            if out:
-                return out
-        elif self.fallback == "mymemory":
-            out = self._mymemory(text, source_lang, target_lang)
+        cache = get_cache()
+        key = cache.key(text, source_lang, target_lang)
+        hit = cache.get_many([key]).get(key)
+        stats.record_lookup(1 if hit is not None else 0, 0 if hit is not None else 1)
+        if hit is not None:
+            return hit
+        for provider in (self.primary, self.fallback):
+            out = None
+            if provider == "libretranslate":
+                out = self._libretranslate(text, source_lang, target_lang)
+            elif provider == "mymemory":
+                out = self._mymemory(text, source_lang, target_lang)
             if out:
+                cache.put_many({key: out})
                 return out
         return text  # give up
 
+    async def translate_many(self, texts: List[str], source_lang: str = "en", target_lang: str = "tr") -> List[str]:
+        # Batched, cache-first variant used by the ingest pipeline; untranslatable strings come back unchanged
+        cache = get_cache()
+        unique = list(dict.fromkeys(t for t in texts if t))
+        if not unique:
+            return list(texts)
+        keys = {t: cache.key(t, source_lang, target_lang) for t in unique}
+        cached = await asyncio.to_thread(cache.get_many, keys.values())
+        done: Dict[str, str] = {t: cached[k] for t, k in keys.items() if k in cached}
+        missing = [t for t in unique if t not in done]
+        stats.record_lookup(len(done), len(missing))
+        for provider in (self.primary, self.fallback):
+            if not missing:
+                break
+            if provider == "libretranslate":
+                got = await self._libretranslate_many(missing, source_lang, target_lang)
+            elif provider == "mymemory":
+                got = await self._mymemory_many(missing, source_lang, target_lang)
+            else:
+                continue
+            fresh = {t: out for t, out in zip(missing, got) if out}
+            if fresh:
+                done.update(fresh)
+                await asyncio.to_thread(cache.put_many, {keys[t]: out for t, out in fresh.items()})
+            missing = [t for t in missing if t not in fresh]
+        return [done.get(t, t) if t else t for t in texts]
+
+    async def aclose(self):
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def _sync_client(self):
+        import httpx  # type: ignore
+        if self._client is None:
+            self._client = httpx.Client(timeout=10.0)
+        return self._client
+
+    def _async_client(self):
+        import httpx  # type: ignore
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_connections=max(1, settings.TRANSLATION_CONCURRENCY)),
+            )
+        return self._aclient
+
     def _libretranslate(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
         try:
             # Lazy import
             import httpx  # type: ignore
         except Exception:
             return None
+        t0 = time.perf_counter()
+        ok = False
         try:
             lt = self.cfg.get("libretranslate") or {}
             url = lt.get("endpoint")
             if not url:
                 return None
             payload = {"q": text, "source": source_lang, "target": target_lang, "format": "text"}
-            with httpx.Client(timeout=10.0) as client:
-                r = client.post(url, json=payload)
-                if r.status_code == 200:
-                    data = r.json()
-                    return data.get("translatedText") or data.get("translated_text") or None
+            r = self._sync_client().post(url, json=payload)
+            if r.status_code == 200:
+                data = r.json()
+                ok = True
+                return data.get("translatedText") or data.get("translated_text") or None
         except Exception:
             return None
+        finally:
+            stats.record_call(time.perf_counter() - t0, ok)
         return None
 
     def _mymemory(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
@@ -57,17 +246,101 @@ class Translator:
             import httpx  # type: ignore
         except Exception:
             return None
+        t0 = time.perf_counter()
+        ok = False
         try:
             mm = self.cfg.get("mymemory") or {}
             url = mm.get("endpoint")
             if not url:
                 return None
             params = {"q": text, "langpair": f"{source_lang}|{target_lang}"}
-            with httpx.Client(timeout=10.0) as client:
-                r = client.get(url, params=params)
-                if r.status_code == 200:
-                    data = r.json()
-                    return (data.get("responseData") or {}).get("translatedText")
+            r = self._sync_client().get(url, params=params)
+            if r.status_code == 200:
+                data = r.json()
+                ok = True
+                return (data.get("responseData") or {}).get("translatedText")
         except Exception:
             return None
+        finally:
+            stats.record_call(time.perf_counter() - t0, ok)
         return None
+
+    async def _libretranslate_many(self, texts: List[str], source_lang: str, target_lang: str) -> List[Optional[str]]:
+        # LibreTranslate accepts a list in "q" and answers with a list of the same length
+        lt = self.cfg.get("libretranslate") or {}
+        url = lt.get("endpoint")
+        out: List[Optional[str]] = [None] * len(texts)
+        if not url:
+            return out
+        try:
+            client = self._async_client()
+        except Exception:
+            return out
+        size = max(1, settings.TRANSLATION_BATCH_SIZE)
+        for i in range(0, len(texts), size):
+            chunk = texts[i:i + size]
+            t0 = time.perf_counter()
+            ok = False
+            try:
+                payload = {"q": chunk, "source": source_lang, "target": target_lang, "format": "text"}
+                r = await client.post(url, json=payload)
+                if r.status_code == 200:
+                    got = r.json().get("translatedText")
+                    if isinstance(got, list) and len(got) == len(chunk):
+                        out[i:i + size] = [g or None for g in got]
+                        ok = True
+            except Exception as e:
+                log.warning(f"libretranslate batch failed: {e}")
+            finally:
+                stats.record_call(time.perf_counter() - t0, ok)
+        return out
+
+    async def _mymemory_many(self, texts: List[str], source_lang: str, target_lang: str) -> List[Optional[str]]:
+        # No batch endpoint: fan out over the pooled client instead
+        mm = self.cfg.get("mymemory") or {}
+        url = mm.get("endpoint")
+        if not url:
+            return [None] * len(texts)
+        try:
+            client = self._async_client()
+        except Exception:
+            return [None] * len(texts)
+        sem = asyncio.Semaphore(max(1, settings.TRANSLATION_CONCURRENCY))
+
+        async def one(text: str) -> Optional[str]:
+            async with sem:
+                t0 = time.perf_counter()
+                ok = False
+                try:
+                    r = await client.get(url, params={"q": text, "langpair": f"{source_lang}|{target_lang}"})
+                    if r.status_code == 200:
+                        ok = True
+                        return (r.json().get("responseData") or {}).get("translatedText")
+                except Exception:
+                    return None
+                finally:
+                    stats.record_call(time.perf_counter() - t0, ok)
+            return None
+
+        return list(await asyncio.gather(*(one(t) for t in texts)))
+
+
+_translator: Optional[Translator] = None
+
+
+def get_translator(cfg: Dict) -> Translator:
+    # One translator per process: every load_sources() (each run_once, each scheduler reload) reuses its pooled
+    # clients; a changed translation config is applied in place
+    global _translator
+    if _translator is None:
+        _translator = Translator(cfg)
+    elif (cfg or {}) != _translator.cfg:
+        _translator.configure(cfg)
+    return _translator
+
+
+async def close_translator():
+    global _translator
+    if _translator is not None:
+        await _translator.aclose()
+        _translator = None
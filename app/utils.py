@@ -1,6 +1,7 @@
 from __future__ import annotations
 import hashlib
-from typing import Iterable, List
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
 
 COMMODITY_KEYWORDS_TR = [
     "altın","gümüş","petrol","doğalgaz","bakır","pamuk","buğday","mısır","kahve","şeker","nikel","alüminyum","platin","paladyum"
@@ -12,14 +13,32 @@ COMMODITY_KEYWORDS_EN = [
 def url_hash(url: str) -> str:
     return hashlib.sha256(url.encode("utf-8")).hexdigest()
 
+def as_utc(dt: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes; treat them as UTC so comparisons don't blow up
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
 def tag_by_keywords(text: str, lang: str) -> List[str]:
-    text_l = (text or "").lower()
-    bag = []
-    pool = COMMODITY_KEYWORDS_TR if (lang or "").startswith("tr") else COMMODITY_KEYWORDS_EN
-    for kw in pool:
-        if kw in text_l:
-            bag.append(kw)
-    return sorted(set(bag))
+    # Whole-word, suffix-aware taxonomy matching; see tagging.Tagger
+    from .tagging import get_tagger
+    return get_tagger().tag(text, lang)
 
 def join_tags(tags: Iterable[str]) -> str:
     return ",".join(sorted(set([t.strip() for t in tags if t and t.strip()])))
+
+def split_tags(tags: str) -> List[str]:
+    return sorted(set(t.strip() for t in (tags or "").split(",") if t.strip()))
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def parse_duration(value) -> Optional[float]:
+    # 900, "900", "15m", "2h", "1d" -> seconds
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    v = str(value).strip().lower()
+    if v[-1:] in _DURATION_UNITS:
+        return float(v[:-1]) * _DURATION_UNITS[v[-1]]
+    return float(v)
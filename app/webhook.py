@@ -1,10 +1,17 @@
 from __future__ import annotations
+import asyncio
 import json
-import time
-from typing import Iterable, Dict, Any, List
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
 
+from sqlalchemy import delete, func, insert, select, update
+
+from . import metrics
 from .config import settings
 from .logging_util import get_logger
+from .models import WebhookOutbox
+from .utils import as_utc
 
 log = get_logger("webhook")
 
@@ -14,35 +21,182 @@ def _parse_endpoints() -> List[str]:
         return []
     return [u.strip() for u in urls.split(",") if u.strip()]
 
-def notify_news(items: Iterable[Dict[str, Any]]):
+async def enqueue_news(session, items: List[Dict[str, Any]], event: str = "news.created") -> int:
+    # Called inside the ingest transaction: the outbox rows commit (or roll back) together with the news rows
     endpoints = _parse_endpoints()
-    if not endpoints:
-        return
-    # Send one-by-one to preserve memory, and include record content
-    for it in items:
-        body = {"event": "news.created", "record": it}
-        for url in endpoints:
-            _post_with_retry(url, body)
-
-def _post_with_retry(url: str, body: Dict[str, Any], retries: int = 3, backoff: float = 1.0):
-    # Import httpx lazily so that it is optional at runtime
-    try:
+    if not endpoints or not items:
+        return 0
+    rows = [{"endpoint": url, "event": event, "payload": it} for it in items for url in endpoints]
+    await session.execute(insert(WebhookOutbox), rows)
+    return len(rows)
+
+
+class WebhookDispatcher:
+    # Background delivery of the outbox over a pooled client; never runs on the ingest path
+    def __init__(self, session_factory=None):
+        if session_factory is None:
+            from .db import SessionLocal
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.backlog = 0
+        self._next_due: Optional[datetime] = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._client = None
+
+    def start(self):
+        if self._task is None and _parse_endpoints():
+            self._task = asyncio.create_task(self._run())
+            log.info("Webhook dispatcher started")
+        return self
+
+    def wake(self):
+        self._wake.set()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def drain(self, max_rounds: int = 1):
+        # Used by one-shot runs: deliver what is due now and return
+        if not _parse_endpoints():
+            return
+        for _ in range(max_rounds):
+            if not await self.dispatch_due():
+                break
+
+    async def _run(self):
+        while True:
+            try:
+                sent = await self.dispatch_due()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Webhook dispatcher error: {e}")
+                sent = 0
+            if sent:
+                continue
+            timeout = settings.WEBHOOK_POLL_INTERVAL
+            if self._next_due is not None:
+                # Wake up in time for the earliest scheduled retry
+                until_due = (self._next_due - datetime.now(tz=timezone.utc)).total_seconds()
+                timeout = max(0.05, min(timeout, until_due))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def _get_client(self):
         import httpx  # type: ignore
-    except Exception:
-        log.warning("httpx not installed; skipping webhook POST to %s", url)
-        return
-
-    last_err = None
-    for i in range(retries):
-        try:
-            with httpx.Client(timeout=10.0) as client:
-                r = client.post(url, json=body, headers={"Content-Type": "application/json"})
-                if r.status_code < 300:
-                    log.info(f"Webhook OK -> {url}")
-                    return
-                else:
-                    last_err = f"[{r.status_code}] {r.text[:200]}"
-        except Exception as e:
-            last_err = str(e)
-        time.sleep(backoff * (2 ** i))
-    log.error(f"Webhook failed -> {url}: {last_err}")
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=settings.WEBHOOK_TIMEOUT,
+                                             headers={"Content-Type": "application/json"})
+        return self._client
+
+    async def dispatch_due(self, limit: int = 500) -> int:
+        now = datetime.now(tz=timezone.utc)
+        size = max(1, settings.WEBHOOK_BATCH_SIZE)
+        async with self.session_factory() as session:
+            stmt = (select(WebhookOutbox)
+                    .where(WebhookOutbox.next_attempt_at <= now,
+                           WebhookOutbox.attempts < settings.WEBHOOK_MAX_ATTEMPTS)
+                    .order_by(WebhookOutbox.id).limit(limit))
+            if session.bind.dialect.name == "postgresql":
+                # Several ingest processes may run a dispatcher; each row goes to exactly one of them
+                stmt = stmt.with_for_update(skip_locked=True)
+            rows = (await session.execute(stmt)).scalars().all()
+            by_endpoint: Dict[str, List[WebhookOutbox]] = defaultdict(list)
+            for r in rows:
+                by_endpoint[r.endpoint].append(r)
+            if rows:
+                # Claim the rows with a lease long enough for every batch to time out, then commit so no lock or
+                # transaction is held while receivers answer; rows of a crashed dispatcher come due again after it
+                batches = max(-(-len(rs) // size) for rs in by_endpoint.values())
+                lease = now + timedelta(seconds=settings.WEBHOOK_TIMEOUT * (batches + 1))
+                await session.execute(update(WebhookOutbox).where(WebhookOutbox.id.in_([r.id for r in rows]))
+                                      .values(next_attempt_at=lease))
+            await session.commit()
+        if rows:
+            # Endpoints are independent; within one endpoint batches go out in order
+            results = await asyncio.gather(*(self._deliver(url, rs) for url, rs in by_endpoint.items()))
+            delivered = [i for ok_ids, _ in results for i in ok_ids]
+            failed = [f for _, f in results if f is not None]
+        async with self.session_factory() as session:
+            if rows:
+                if delivered:
+                    await session.execute(delete(WebhookOutbox).where(WebhookOutbox.id.in_(delivered)))
+                for url, rs, err, attempts in failed:
+                    delay = min(settings.WEBHOOK_MAX_BACKOFF, settings.WEBHOOK_BACKOFF * (2 ** (attempts - 1)))
+                    retry_at = datetime.now(tz=timezone.utc) + timedelta(seconds=delay)
+                    # The failed batch burns an attempt; later rows for the endpoint just wait behind it
+                    await session.execute(
+                        update(WebhookOutbox).where(WebhookOutbox.id.in_([r.id for r in rs[0]]))
+                        .values(attempts=WebhookOutbox.attempts + 1, last_error=err[:512], next_attempt_at=retry_at)
+                    )
+                    if rs[1]:
+                        await session.execute(
+                            update(WebhookOutbox).where(WebhookOutbox.id.in_([r.id for r in rs[1]]))
+                            .values(next_attempt_at=retry_at)
+                        )
+                    if attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+                        log.error(f"Webhook giving up -> {url} ({len(rs[0])} records kept in outbox): {err}")
+                    else:
+                        log.warning(f"Webhook failed -> {url}: {err}; retry in {delay:.0f}s")
+            backlog, next_due = (await session.execute(
+                select(func.count(WebhookOutbox.id), func.min(WebhookOutbox.next_attempt_at))
+                .where(WebhookOutbox.attempts < settings.WEBHOOK_MAX_ATTEMPTS)
+            )).one()
+            self.backlog = int(backlog or 0)
+            metrics.WEBHOOK_BACKLOG.set(self.backlog)
+            self._next_due = as_utc(next_due)
+            await session.commit()
+        return len(rows)
+
+    async def _deliver(self, url: str, rows: List[WebhookOutbox]):
+        ok_ids: List[int] = []
+        size = max(1, settings.WEBHOOK_BATCH_SIZE)
+        client = self._get_client()
+        for i in range(0, len(rows), size):
+            chunk = rows[i:i + size]
+            if size == 1:
+                body = {"event": chunk[0].event, "record": chunk[0].payload}
+            else:
+                body = {"event": chunk[0].event, "records": [r.payload for r in chunk]}
+            err = None
+            try:
+                r = await client.post(url, content=json.dumps(body, default=str))
+                if r.status_code >= 300:
+                    err = f"[{r.status_code}] {r.text[:200]}"
+            except Exception as e:
+                err = str(e) or e.__class__.__name__
+            if err is not None:
+                # Keep ordering per endpoint: later batches are not sent past a failed one
+                attempts = max((x.attempts or 0) for x in chunk) + 1
+                return ok_ids, (url, (chunk, rows[i + size:]), err, attempts)
+            ok_ids.extend(x.id for x in chunk)
+            log.info(f"Webhook OK -> {url} ({len(chunk)} records)")
+        return ok_ids, None
+
+
+_dispatcher: Optional[WebhookDispatcher] = None
+
+
+def get_dispatcher() -> WebhookDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = WebhookDispatcher()
+    return _dispatcher
+
+
+def wake_dispatcher():
+    if _dispatcher is not None:
+        _dispatcher.wake()
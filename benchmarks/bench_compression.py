@@ -0,0 +1,107 @@
+"""/news response size and latency per content coding, and the cost of a conditional request.
+
+    python -m benchmarks.bench_compression --rows 5000 --limit 200 --requests 300
+
+Fills a scratch news table with --rows stories carrying article-sized
+content, then requests /news?limit=--limit through the ASGI app in-process
+with the response cache off (every call queries and serializes):
+
+  identity  no compression
+  gzip/br/zstd  Accept-Encoding: <coding>; "miss" clears the compressed-body
+            cache before each call, "hit" reuses the body compressed for the ETag
+
+and finally a client revalidating an unchanged page with If-None-Match:
+
+  full      the page is built, hashed and dropped for a 304 (no window validator)
+  validate  /news as it is now: count/max/sum(id) + max(fetched_at) over the window
+
+br and zstd rows are skipped when brotli / zstandard aren't installed. Uses
+DATABASE_URL or a temporary SQLite file; tables are dropped and recreated.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+os.environ.setdefault("RATE_LIMIT_BURST", "100000000")
+os.environ.setdefault("REQUEST_LOG_QUERY", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import api, compression  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.db import engine  # noqa: E402
+from benchmarks.bench_news_json import seed  # noqa: E402
+
+
+async def timed(c, n: int, params: dict, headers: dict, before=None):
+    lat, r = [], None
+    for _ in range(10):
+        await c.get("/news", params=params, headers=headers)
+    for _ in range(n):
+        if before:
+            before()
+        t0 = time.perf_counter()
+        r = await c.get("/news", params=params, headers=headers)
+        lat.append(time.perf_counter() - t0)
+    lat.sort()
+    return lat[len(lat) // 2] * 1000, lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000, r
+
+
+async def run(args):
+    import httpx  # type: ignore
+
+    settings.RESPONSE_CACHE_ENABLED = False
+    await seed(args.rows)
+    await api.startup()
+    params = {"limit": args.limit}
+    offered = compression.available_encodings()
+    print(f"{args.rows} rows ({engine.dialect.name}), limit={args.limit}, codings: {', '.join(offered)}")
+    print(f"{'coding':>13} {'p50 ms':>7} {'p99 ms':>7} {'wire KB':>8} {'ratio':>6}")
+    # httpx decodes br/zstd only with the same packages installed; read the raw wire bytes instead
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench") as c:
+        plain = 0
+        for enc in ["identity"] + offered:
+            for mode in (("",) if enc == "identity" else ("miss", "hit")):
+                clear = compression.compressed_cache.clear if mode == "miss" else None
+                lat50, lat99, _ = await timed(c, args.requests, params, {"accept-encoding": enc}, clear)
+                async with c.stream("GET", "/news", params=params, headers={"accept-encoding": enc}) as r:
+                    wire = len(b"".join([b async for b in r.aiter_raw()]))
+                plain = plain or wire
+                label = f"{enc} {mode}".strip()
+                print(f"{label:>13} {lat50:7.2f} {lat99:7.2f} {wire / 1024:8.1f} {plain / wire:5.1f}x")
+
+        etag = (await c.get("/news", params=params)).headers["etag"]
+        cond = {"accept-encoding": "identity", "if-none-match": etag}
+        cached = api._cached
+
+        async def no_validator(request, session, key, build, validate=None):
+            return await cached(request, session, key, build)
+
+        api._cached = no_validator
+        full = await timed(c, args.requests, params, cond)
+        api._cached = cached
+        validated = await timed(c, args.requests, params, cond)
+        for name, (lat50, lat99, r) in (("full", full), ("validate", validated)):
+            print(f"{name:>13} {lat50:7.2f} {lat99:7.2f}   status={r.status_code} x-cache={r.headers.get('x-cache')}")
+    await api.shutdown()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--limit", type=int, default=200)
+    ap.add_argument("--requests", type=int, default=300)
+    import logging
+    logging.disable(logging.INFO)
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""API throughput at a fixed DB pool size, with and without asyncpg prepared-statement caching.
+
+    DATABASE_URL=postgresql+asyncpg://.../scratch python -m benchmarks.bench_db_pool --pool-size 5 --concurrency 64
+
+Seeds --rows synthetic stories through save_items if the news table has
+fewer, then drives the ASGI app in-process with --concurrency clients issuing
+--requests uncached /news, /news/count and /news/stats calls (the dashboard
+mix: source/lang/tag/date filters, keyset pages). Each configuration runs in
+a fresh interpreter because the engine is built from the environment at
+import time:
+
+  cache=0    DB_STATEMENT_CACHE_SIZE=0, every query parsed and planned again
+  cache=256  the default, repeated shapes reuse their prepared statements
+
+Reports requests/s, latency percentiles and the most connections ever
+checked out (it never exceeds pool size + overflow; the rest queue).
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SOURCES = ["Reuters Commodities", "Kitco Gold", "Bloomberg HT", "AA Ekonomi", "Investing Emtia", "Dünya Piyasa"]
+TAGS = ["gold", "oil", "copper", "altın", "petrol"]
+
+
+def _request(rnd):
+    kind = rnd.random()
+    day = f"2025-0{rnd.randint(6, 8)}-{rnd.randint(1, 28):02d}"
+    if kind < 0.45:
+        params = {"limit": 50, "sort": rnd.choice(["id", "published_at"])}
+        for key, values in (("source", SOURCES), ("lang", ["en", "tr"]), ("tag", TAGS)):
+            if rnd.random() < 0.4:
+                params[key] = rnd.choice(values)
+        if rnd.random() < 0.3:
+            params["published_from"] = day
+        return "/news", params
+    if kind < 0.8:
+        params = {"published_from": day}
+        if rnd.random() < 0.5:
+            params["source"] = rnd.choice(SOURCES)
+        else:
+            params["tag"] = rnd.choice(TAGS)
+        return "/news/count", params
+    return "/news/stats", {"interval": "day", "group_by": rnd.choice(["source", "tag", "source,language"]),
+                           "published_from": day}
+
+
+async def _seed(rows: int):
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import func, select
+
+    from app import ingest
+    from app.config import settings
+    from app.db import SessionLocal, engine
+    from app.models import News
+    from app.sources.base import Item
+
+    await ingest.ensure_schema(engine)
+    async with SessionLocal() as session:
+        have = (await session.execute(select(func.count(News.id)))).scalar()
+    if have >= rows:
+        return have
+    settings.DEDUP_ENABLED = False
+    rnd = random.Random(7)
+    end = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    words = ["Gold climbs", "Oil slips", "Copper rallies", "Altın yükseldi", "Petrol düştü", "Silver flat"]
+    for i in range(have, rows, 500):
+        items = [Item(rnd.choice(SOURCES), f"{rnd.choice(words)} #{j}", f"https://example.com/pool/{j}",
+                      end - timedelta(seconds=rnd.randrange(90 * 86400)), "Markets moved.", "",
+                      rnd.choice(["en", "tr"]), {}) for j in range(i, min(rows, i + 500))]
+        async with SessionLocal() as session:
+            await ingest.save_items(session, items)
+    return rows
+
+
+async def run(args) -> dict:
+    import httpx  # type: ignore
+
+    from app import api
+    from app.config import settings
+    from app.db import engine
+
+    settings.RESPONSE_CACHE_ENABLED = False
+    await api.startup()
+    pool = engine.sync_engine.pool
+    rnd = random.Random(args.seed)
+    plan = [_request(rnd) for _ in range(args.requests)]
+    latencies, peak, errors = [], 0, 0
+    queue = iter(plan)
+
+    async def client(c):
+        nonlocal peak, errors
+        for path, params in queue:
+            t0 = time.perf_counter()
+            r = await c.get(path, params=params)
+            latencies.append(time.perf_counter() - t0)
+            errors += r.status_code != 200
+            peak = max(peak, pool.checkedout())
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench") as c:
+        for path, params in plan[:50]:  # warm-up: connections opened, statements compiled
+            await c.get(path, params=params)
+        t0 = time.perf_counter()
+        await asyncio.gather(*[client(c) for _ in range(args.concurrency)])
+        wall = time.perf_counter() - t0
+    await api.shutdown()
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000  # noqa: E731
+    return {"rps": len(latencies) / wall, "p50": pct(0.5), "p95": pct(0.95), "p99": pct(0.99), "peak": peak,
+            "errors": errors}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=50000)
+    ap.add_argument("--requests", type=int, default=4000)
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--pool-size", type=int, default=5)
+    ap.add_argument("--overflow", type=int, default=0)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+    os.environ.setdefault("RATE_LIMIT_BURST", "100000000")
+    os.environ.setdefault("REQUEST_LOG_QUERY", "false")
+    if args.child:
+        import logging
+        logging.disable(logging.INFO)
+        print(json.dumps(asyncio.run(run(args))))
+        return
+    if not os.getenv("DATABASE_URL", "").startswith("postgresql"):
+        sys.exit("PostgreSQL only: set DATABASE_URL to a scratch postgresql+asyncpg database")
+    print(f"seeded {asyncio.run(_seed(args.rows))} stories; pool_size={args.pool_size} max_overflow={args.overflow} "
+          f"concurrency={args.concurrency} requests={args.requests}")
+    print(f"{'cache':>6} {'req/s':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'peak conns':>10} {'errors':>6}")
+    for cache in (0, 256):
+        env = dict(os.environ, DB_POOL_SIZE=str(args.pool_size), DB_MAX_OVERFLOW=str(args.overflow),
+                   DB_STATEMENT_CACHE_SIZE=str(cache))
+        out = subprocess.run([sys.executable, "-m", "benchmarks.bench_db_pool", "--child",
+                              "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                              "--seed", str(args.seed)], cwd=ROOT, env=env, capture_output=True, text=True)
+        if out.returncode:
+            sys.exit(out.stderr)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{cache:6d} {r['rps']:8.0f} {r['p50']:7.1f} {r['p95']:7.1f} {r['p99']:7.1f} {r['peak']:10d} {r['errors']:6d}")
+
+
+if __name__ == "__main__":
+    main()
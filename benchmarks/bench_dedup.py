@@ -0,0 +1,127 @@
+"""Near-duplicate clustering: pairwise precision/recall and throughput on a fixture corpus.
+
+    python -m benchmarks.bench_dedup --stories 2000
+
+The corpus is generated (seeded): every story gets 1-6 copies the way
+aggregators re-publish it (" - Publisher" tails, a dropped or swapped word,
+casing, "UPDATE 1-" prefixes, a different summary sentence) plus same-topic
+distractors ("Gold rises on ..." vs "Gold falls on ..."). Clustering runs
+through dedup.signature + the in-memory LSHIndex for several similarity
+thresholds; the DB path issues the same bucket lookups and checks.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import dedup  # noqa: E402
+from app.config import settings  # noqa: E402
+
+SUBJECTS = ["Gold", "Silver", "Oil", "Brent crude", "Copper", "Wheat", "Natural gas", "Coffee", "Sugar", "Platinum",
+            "Palladium", "Nickel", "Corn", "Cotton", "Aluminium"]
+VERBS = ["rises", "falls", "jumps", "slips", "surges", "slumps", "steadies", "extends gains", "pares losses", "hits record"]
+REASONS = ["as Fed signals rate cuts", "on weaker dollar", "after China data", "amid Middle East tensions",
+           "as inventories swell", "on supply worries", "ahead of jobs report", "as traders book profits",
+           "after OPEC+ meeting", "on strong demand from India", "as ECB holds rates", "amid tariff fears"]
+EXTRA = ["analysts say", "in early trade", "for third session", "to two-week high", "to one-month low", "in Asia",
+         "in London", "despite rally in equities", "while miners gain", "as volatility returns"]
+PUBLISHERS = ["Reuters", "Bloomberg", "CNBC", "Financial Times", "Kitco", "MarketWatch", "BBC", "The Guardian", "Investing.com"]
+
+
+def _story(rnd):
+    words = f"{rnd.choice(SUBJECTS)} {rnd.choice(VERBS)} {rnd.choice(REASONS)} {rnd.choice(EXTRA)}"
+    n = rnd.randint(1, 999)
+    return f"{words} #{n}" if rnd.random() < 0.3 else words
+
+
+def _variant(rnd, title: str) -> str:
+    words = title.split()
+    op = rnd.random()
+    if op < 0.25 and len(words) > 6:
+        words.pop(rnd.randrange(2, len(words)))
+    elif op < 0.45 and len(words) > 4:
+        i = rnd.randrange(2, len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    elif op < 0.6:
+        words = [w.upper() if rnd.random() < 0.5 else w for w in words]
+    elif op < 0.7:
+        words = ["UPDATE", f"{rnd.randint(1, 3)}-"] + words
+    return " ".join(words) + " - " + rnd.choice(PUBLISHERS)
+
+
+def make_corpus(stories: int, seed: int):
+    rnd = random.Random(seed)
+    docs, seen = [], set()
+    cid = 0
+    while cid < stories:
+        title = _story(rnd)
+        if title in seen:
+            continue
+        seen.add(title)
+        for _ in range(rnd.randint(1, 6)):
+            t = _variant(rnd, title)
+            docs.append((t, t.rsplit(" - ", 1)[0] + ". " + rnd.choice(EXTRA).capitalize() + ".", cid))
+        cid += 1
+    rnd.shuffle(docs)
+    return docs
+
+
+def _pairs(labels):
+    groups = defaultdict(list)
+    for i, l in enumerate(labels):
+        groups[l].append(i)
+    return sum(len(g) * (len(g) - 1) // 2 for g in groups.values()), groups
+
+
+def evaluate(docs, hashes, threshold: float):
+    settings.DEDUP_THRESHOLD = threshold
+    index = dedup.LSHIndex()
+    assigned = []
+    t0 = time.perf_counter()
+    for i, h in enumerate(hashes):
+        if h is None:
+            assigned.append(-1 - i)
+            continue
+        cid = index.match(h)
+        cid = i if cid is None else cid
+        index.add(h, cid)
+        assigned.append(cid)
+    dt = time.perf_counter() - t0
+    truth = [d[2] for d in docs]
+    _, pred_groups = _pairs(assigned)
+    tp = 0
+    pred_pairs = 0
+    for members in pred_groups.values():
+        pred_pairs += len(members) * (len(members) - 1) // 2
+        for c in Counter(truth[i] for i in members).values():
+            tp += c * (c - 1) // 2
+    true_pairs, _ = _pairs(truth)
+    precision = tp / pred_pairs if pred_pairs else 1.0
+    recall = tp / true_pairs if true_pairs else 1.0
+    buckets = len(index._buckets)
+    return precision, recall, len(docs) / dt, len(set(assigned)), buckets
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--stories", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    docs = make_corpus(args.stories, args.seed)
+    t0 = time.perf_counter()
+    hashes = [dedup.signature(t, s, "en") for t, s, _ in docs]
+    dt = time.perf_counter() - t0
+    print(f"{len(docs)} docs / {args.stories} stories; minhash {len(docs) / dt:.0f} docs/s")
+    print(f"{'threshold':>9} {'precision':>10} {'recall':>7} {'lookup docs/s':>14} {'clusters':>9} {'buckets':>8}")
+    for th in (0.6, 0.7, 0.8, 0.9):
+        p, r, rate, clusters, buckets = evaluate(docs, hashes, th)
+        print(f"{th:9.1f} {p:10.3f} {r:7.3f} {rate:14.0f} {clusters:9d} {buckets:8d}")
+
+
+if __name__ == "__main__":
+    main()
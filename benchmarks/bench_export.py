@@ -0,0 +1,99 @@
+"""Rows/s of /news/export per format vs. paging /news 200 rows at a time.
+
+    DATABASE_URL=postgresql+asyncpg://.../scratch python -m benchmarks.bench_export --rows 200000
+
+Runs against whatever is already in the news table (e.g. the table filled by
+benchmarks.bench_search --rows N) and only reads. --source restricts every run
+to one source_name. Peak RSS is printed after each run; for the export formats
+it should not move with the result size. arrow/parquet need pyarrow.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import resource
+import sys
+import time
+from urllib.parse import urlencode
+
+os.environ.setdefault("RESPONSE_CACHE_ENABLED", "false")
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+os.environ.setdefault("RATE_LIMIT_BURST", "100000000")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from app import api, export  # noqa: E402
+from app.models import News  # noqa: E402
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+async def _paged(client, params) -> int:
+    rows, cursor = 0, None
+    while True:
+        r = await client.get("/news", params={**params, "limit": 200, "order": "asc", **({"cursor": cursor} if cursor else {})})
+        page = r.json()
+        rows += len(page)
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            return rows
+
+
+async def _export(params, fmt: str) -> int:
+    # Straight ASGI call: httpx's ASGITransport would buffer the whole body and hide the streaming
+    size = 0
+    query = urlencode({**params, "format": fmt}).encode()
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": "/news/export", "raw_path": b"/news/export", "query_string": query, "root_path": "",
+             "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1234), "server": ("bench", 80)}
+
+    async def receive():
+        await asyncio.sleep(3600)  # never disconnect
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal size
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"export returned {message['status']}")
+        if message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+
+    await api.app(scope, receive, send)
+    return size
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--source", default=None, help="only rows of this source_name")
+    args = ap.parse_args()
+    await api.startup()
+    params = {"source": args.source} if args.source else {}
+    stmt = select(func.count(News.id))
+    if args.source:
+        stmt = stmt.where(News.source_name == args.source)
+    async with api.SessionLocal() as s:
+        total = (await s.execute(stmt)).scalar_one()
+    print(f"backend={api.engine.dialect.name} rows={total} batch={api.settings.EXPORT_BATCH_SIZE}")
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        formats = ["ndjson", "csv"] + (["arrow", "parquet"] if export.pyarrow_available() else [])
+        for fmt in formats:
+            t0 = time.perf_counter()
+            size = await _export(params, fmt)
+            dt = time.perf_counter() - t0
+            print(f"{fmt:>8}: {total / dt:10.0f} rows/s  {size / dt / 1e6:7.1f} MB/s  peak_rss={_rss_mb():.0f}MB")
+        t0 = time.perf_counter()
+        rows = await _paged(client, params)
+        dt = time.perf_counter() - t0
+        print(f"{'paged':>8}: {rows / dt:10.0f} rows/s  (/news limit=200 + cursor)  peak_rss={_rss_mb():.0f}MB")
+    await api.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
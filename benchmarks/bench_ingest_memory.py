@@ -0,0 +1,121 @@
+"""Peak RSS of one ingest cycle over all configured sources: streamed, bounded items vs. the old path.
+
+    python -m benchmarks.bench_ingest_memory --entries 300
+
+Every source in config/sources.yml is answered by an in-process mock feed
+(--entries items with Google-News-sized HTML summaries and content:encoded
+bodies), so no network is used; translation is off. Each mode runs in a
+fresh interpreter and reports its own peak RSS:
+
+  stream  PARSE_CHUNK_SIZE slices, bounded Item.raw (this tree)
+  legacy  whole feed materialized as one list, full feedparser entry in raw
+
+Uses DATABASE_URL or a temporary SQLite file; tables are dropped and
+recreated, so point it at a scratch database.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_PARA = ("<p>Spot <b>gold</b> rose 0.4% while <a href='https://example.com/x'>silver</a> slipped as traders weighed "
+         "central bank remarks, inflation data and the dollar's moves across Asian and European sessions.</p>")
+
+
+def make_feed(url: str, entries: int) -> bytes:
+    parts = [f"<?xml version='1.0' encoding='UTF-8'?><rss version='2.0' xmlns:content='http://purl.org/rss/1.0/modules/content/' "
+             f"xmlns:media='http://search.yahoo.com/mrss/'><channel><title>Mock {url}</title><link>{url}</link>"]
+    for i in range(entries):
+        link = f"{url}/item/{i}"
+        parts.append(
+            f"<item><title>Gold and silver move as markets react #{i}</title><link>{link}</link><guid>{link}</guid>"
+            f"<pubDate>Mon, 01 Sep 2025 {i % 24:02d}:{i % 60:02d}:00 GMT</pubDate><author>desk@example.com</author>"
+            f"<category>Markets</category><category>Commodities</category><source url='{url}'>Mock</source>"
+            f"<description><![CDATA[{_PARA * 6}]]></description>"
+            f"<content:encoded><![CDATA[{_PARA * 40}]]></content:encoded>"
+            f"<media:content url='{link}.jpg' medium='image' width='1200' height='800'/></item>"
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts).encode("utf-8")
+
+
+def _rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+async def cycle(mode: str, entries: int) -> dict:
+    import httpx  # type: ignore
+    from sqlalchemy import Text, cast, func, select
+
+    from app import pipeline
+    from app.config import settings
+    from app.db import Base, engine
+    from app.loader import load_sources
+    from app.models import News
+    from app.sources import rss_source
+
+    if mode == "legacy":
+        rss_source._entry_raw = lambda e: e  # the whole FeedParserDict, as base_raw["e"] = e did
+        rss_source.bounded_raw = lambda value, depth=0: value
+        settings.PARSE_CHUNK_SIZE = 10 ** 9  # one list per source
+    settings.MAX_ENTRIES_PER_POLL = 0
+    settings.SOURCE_MIN_REPOLL = 0
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    sources = load_sources(os.path.join(ROOT, "config", "sources.yml"))
+    for src in sources:
+        src.translator = None
+
+    def handler(request):
+        return httpx.Response(200, content=make_feed(str(request.url), entries),
+                              headers={"content-type": "application/rss+xml"})
+
+    pipeline._make_client = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    base = _rss_mb()
+    t0 = time.perf_counter()
+    results = await pipeline.run_sources(sources)
+    wall = time.perf_counter() - t0
+    peak = _rss_mb()
+    async with engine.connect() as conn:
+        raw_bytes = (await conn.execute(select(func.avg(func.length(cast(News.raw, Text)))))).scalar() or 0
+    await engine.dispose()
+    return {"mode": mode, "sources": len(sources), "inserted": sum(r.inserted for r in results.values()),
+            "base_mb": base, "peak_mb": peak, "wall_s": wall, "raw_kb": float(raw_bytes) / 1024}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--entries", type=int, default=300, help="items per mock feed")
+    ap.add_argument("--mode", choices=["stream", "legacy"], help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.mode:
+        print(json.dumps(asyncio.run(cycle(args.mode, args.entries))))
+        return
+    print(f"{'mode':>7} {'sources':>7} {'inserted':>8} {'base MB':>8} {'peak MB':>8} {'growth MB':>9} {'wall s':>7} {'raw KB/row':>10}")
+    for mode in ("legacy", "stream"):
+        out = subprocess.run([sys.executable, "-m", "benchmarks.bench_ingest_memory", "--mode", mode,
+                              "--entries", str(args.entries)], cwd=ROOT, capture_output=True, text=True)
+        if out.returncode:
+            sys.exit(out.stderr)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{mode:>7} {r['sources']:7d} {r['inserted']:8d} {r['base_mb']:8.0f} {r['peak_mb']:8.0f} "
+              f"{r['peak_mb'] - r['base_mb']:9.0f} {r['wall_s']:7.1f} {r['raw_kb']:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Requests/s of /health and /news with and without the middleware stack.
+
+    python -m benchmarks.bench_middleware --requests 5000
+
+Drives the ASGI app in-process (no sockets) so only routing + middleware +
+handler cost is measured. Compares no RateLimiter/RequestLogger, the previous
+BaseHTTPMiddleware implementations and the current pure-ASGI ones. /news is
+served from the response cache after the first call, which is what the
+frontend polling sees. Uses DATABASE_URL or a temporary SQLite file.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+os.environ.setdefault("RATE_LIMIT_BURST", "100000000")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+from app import api, middleware  # noqa: E402
+from app.config import settings  # noqa: E402
+
+legacy_log = logging.getLogger("bench.legacy")
+
+
+class LegacyRateLimiter(BaseHTTPMiddleware):
+    # The pre-rewrite limiter: unbounded dict, header mutation after call_next
+    def __init__(self, app):
+        super().__init__(app)
+        self.rate = int(settings.RATE_LIMIT_PER_MINUTE)
+        self.burst = int(settings.RATE_LIMIT_BURST)
+        self.store = {}
+
+    async def dispatch(self, request, call_next):
+        if request.url.path == "/health":
+            return await call_next(request)
+        import hashlib
+        base = request.headers.get("x-api-key", "") or (request.client.host if request.client else "unknown")
+        key = hashlib.sha256(base.encode("utf-8")).hexdigest()
+        now = time.time()
+        tokens, last_ts = self.store.get(key, (float(self.burst), now))
+        tokens = min(self.burst, tokens + max(0.0, now - last_ts) * self.rate / 60.0)
+        if tokens < 1.0:
+            return JSONResponse({"detail": "Rate limit exceeded"}, status_code=429)
+        self.store[key] = (tokens - 1.0, now)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(self.rate)
+        response.headers["X-RateLimit-Remaining"] = str(int(tokens - 1.0))
+        response.headers["X-RateLimit-Reset"] = "0"
+        return response
+
+
+class LegacyRequestLogger(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        start = time.time()
+        hdrs = {h: request.headers[h] for h in ("x-api-key", "user-agent") if h in request.headers}
+        query = dict(request.query_params)
+        response = await call_next(request)
+        legacy_log.info(f"{request.client.host if request.client else 'unknown'} {request.method} {request.url.path} "
+                        f"{response.status_code} {int((time.time() - start) * 1000)}ms headers={hdrs} query={query}")
+        return response
+
+
+async def _call(app, path: str, query: bytes = b""):
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "query_string": query, "root_path": "",
+             "headers": [(b"host", b"bench"), (b"user-agent", b"bench")], "client": ("127.0.0.1", 1234),
+             "server": ("bench", 80)}
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def _use(stack):
+    app = api.app
+    base = [m for m in app.user_middleware if m.cls not in (
+        middleware.RateLimiter, middleware.RequestLogger, LegacyRateLimiter, LegacyRequestLogger)]
+    app.user_middleware = [Middleware(c) for c in stack] + base
+    app.middleware_stack = None  # rebuilt lazily on the next call
+    return app
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=5000)
+    args = ap.parse_args()
+    # Keep log I/O out of the measurement for both variants; the queue listener thread is the production path
+    logging.getLogger().handlers = [logging.NullHandler()]
+    legacy_log.propagate = False
+    legacy_log.addHandler(logging.NullHandler())
+    middleware.log.handlers = [logging.NullHandler()]
+    await api.startup()
+
+    stacks = {
+        "none": [],
+        "legacy": [LegacyRequestLogger, LegacyRateLimiter],
+        "asgi": [middleware.RequestLogger, middleware.RateLimiter],
+    }
+    print(f"backend={api.engine.dialect.name} requests={args.requests}")
+    for path, query in (("/health", b""), ("/news", b"limit=50&order=desc")):
+        for label, stack in stacks.items():
+            app = _use(stack)
+            assert await _call(app, path, query) == 200
+            t0 = time.perf_counter()
+            for _ in range(args.requests):
+                await _call(app, path, query)
+            rps = args.requests / (time.perf_counter() - t0)
+            print(f"{path:>8} {label:>7}: {rps:10.0f} req/s")
+    await api.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
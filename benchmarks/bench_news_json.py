@@ -0,0 +1,113 @@
+"""/news serialization: ORM rows + pydantic vs. column tuples + orjson (and fields= projection).
+
+    python -m benchmarks.bench_news_json --rows 5000 --limit 200 --requests 300
+
+Fills a scratch news table with --rows stories carrying article-sized
+content, then requests /news?limit=--limit through the ASGI app in-process
+with the response cache off, so every call queries and serializes:
+
+  pydantic  the original handler (select(News), NewsOut.model_validate and
+            FastAPI's response_model serialization), mounted on a bench route
+  fast      /news as it is now
+  fields    /news?fields=id,title,url,published_at,source_name,tags (list view)
+
+Bodies of "pydantic" and "fast" are compared byte for byte first (tz-aware
+datetimes on PostgreSQL included). Uses
+DATABASE_URL or a temporary SQLite file; tables are dropped and recreated.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+os.environ.setdefault("RATE_LIMIT_BURST", "100000000")
+os.environ.setdefault("REQUEST_LOG_QUERY", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from typing import List  # noqa: E402
+
+from fastapi import Depends  # noqa: E402
+from sqlalchemy import insert, select  # noqa: E402
+
+from app import api  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models import News  # noqa: E402
+
+_PARA = ("Spot gold rose 0.4% while silver slipped as traders weighed central bank remarks, inflation data and "
+         "the dollar's moves across Asian and European sessions; altın ons fiyatı yükselişini sürdürdü. ")
+
+
+@api.app.get("/bench/legacy-news", response_model=List[api.NewsOut], response_model_exclude_unset=True)
+async def legacy_news(limit: int = 50, session=Depends(api.get_session)):
+    rows = (await session.execute(select(News).order_by(News.id.desc()).limit(limit))).scalars().all()
+    return [api.NewsOut.model_validate(r) for r in rows]
+
+
+async def seed(rows: int):
+    from datetime import datetime, timedelta, timezone
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    base = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    values = [{"source_name": f"Source {i % 12}", "title": f"Gold and silver move as markets react #{i}",
+               "url": f"https://example.com/json/{i}", "url_hash": f"{i:064d}",
+               "published_at": base - timedelta(minutes=7 * i, microseconds=i % 3 * 1000),
+               "summary": _PARA * 2, "content": _PARA * 30, "language": "tr" if i % 3 else "en",
+               "tags": "gold,silver", "raw": {"feed": "bench", "id": str(i)}, "cluster_id": i}
+              for i in range(rows)]
+    async with SessionLocal() as session:
+        for i in range(0, rows, 1000):
+            await session.execute(insert(News), values[i:i + 1000])
+        await session.commit()
+
+
+async def run(args):
+    import httpx  # type: ignore
+
+    settings.RESPONSE_CACHE_ENABLED = False
+    await seed(args.rows)
+    await api.startup()
+    variants = [("pydantic", "/bench/legacy-news", {"limit": args.limit}),
+                ("fast", "/news", {"limit": args.limit}),
+                ("fields", "/news", {"limit": args.limit, "fields": "id,title,url,published_at,source_name,tags"})]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench",
+                                 headers={"accept-encoding": "identity"}) as c:
+        legacy = (await c.get("/bench/legacy-news", params={"limit": args.limit})).content
+        fast = (await c.get("/news", params={"limit": args.limit})).content
+        print(f"{args.rows} rows ({engine.dialect.name}), limit={args.limit}: bodies identical={legacy == fast} "
+              f"({len(legacy) / 1024:.0f} KB)")
+        print(f"{'path':>9} {'p50 ms':>7} {'p99 ms':>7} {'rows/s':>9} {'KB':>6}")
+        for name, path, params in variants:
+            lat = []
+            for _ in range(10):
+                await c.get(path, params=params)
+            for _ in range(args.requests):
+                t0 = time.perf_counter()
+                r = await c.get(path, params=params)
+                lat.append(time.perf_counter() - t0)
+            lat.sort()
+            p50, p99 = lat[len(lat) // 2] * 1000, lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000
+            print(f"{name:>9} {p50:7.2f} {p99:7.2f} {args.limit * len(lat) / sum(lat):9.0f} {len(r.content) / 1024:6.0f}")
+    await api.shutdown()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--limit", type=int, default=200)
+    ap.add_argument("--requests", type=int, default=300)
+    import logging
+    logging.disable(logging.INFO)
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
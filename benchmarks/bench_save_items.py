@@ -0,0 +1,93 @@
+"""Rows/s of ingest.save_items vs. the previous one-SELECT-per-item path.
+
+    python -m benchmarks.bench_save_items --rows 2000 --batch 50
+
+Uses DATABASE_URL (e.g. postgresql+asyncpg://...) or a temporary SQLite file
+(needs aiosqlite). The tables are dropped and recreated, so point it at a
+scratch database.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select  # noqa: E402
+
+from app import ingest  # noqa: E402
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models import News  # noqa: E402
+from app.sources.base import Item  # noqa: E402
+from app.utils import join_tags, tag_by_keywords, url_hash  # noqa: E402
+
+
+async def legacy_save_items(session, items) -> int:
+    # The pre-batching implementation: one SELECT round trip per item
+    inserted = 0
+    for it in items:
+        existing = (await session.execute(select(News).where(News.url == it.url))).scalar_one_or_none()
+        tags = join_tags(tag_by_keywords(it.title + " " + it.summary, it.language))
+        if existing:
+            if ingest._is_newer(it.published_at, existing.published_at):
+                existing.title = it.title or existing.title
+                existing.published_at = it.published_at
+                existing.tags = tags or existing.tags
+            continue
+        session.add(News(source_name=it.source_name, title=it.title, url=it.url, url_hash=url_hash(it.url),
+                         published_at=it.published_at, summary=it.summary, content=it.content,
+                         language=it.language, tags=tags, raw=it.raw))
+        inserted += 1
+    await session.commit()
+    return inserted
+
+
+def make_items(n: int, run: str):
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [Item(source_name=f"bench-{i % 17}", title=f"Gold and oil move #{i}",
+                 url=f"https://example.com/{run}/{i}", published_at=base + timedelta(minutes=i),
+                 summary="Spot gold rose while crude oil slipped " * 4, content="",
+                 language="en", raw={"feed": {"title": "bench"}}) for i in range(n)]
+
+
+async def _run(fn, items, batch: int) -> float:
+    t0 = time.perf_counter()
+    async with SessionLocal() as s:
+        for i in range(0, len(items), batch):
+            await fn(s, items[i:i + batch])
+    return time.perf_counter() - t0
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2000)
+    ap.add_argument("--batch", type=int, default=50, help="items per save_items call (one source batch)")
+    args = ap.parse_args()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    ingest.notify_news = lambda payloads: None
+
+    print(f"backend={engine.dialect.name} rows={args.rows} batch={args.batch}")
+    for label, fn in (("legacy", legacy_save_items), ("bulk", ingest.save_items)):
+        items = make_items(args.rows, label)
+        fresh = await _run(fn, items, args.batch)
+        if engine.dialect.name == "postgresql":
+            # a freshly filled table has no planner stats yet; production tables do
+            async with engine.begin() as conn:
+                await conn.exec_driver_sql("ANALYZE news")
+        again = await _run(fn, items, args.batch)  # every URL already stored
+        print(f"{label:>7}: insert {args.rows / fresh:10.0f} rows/s   re-ingest {args.rows / again:10.0f} rows/s")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
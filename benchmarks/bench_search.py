@@ -0,0 +1,93 @@
+"""/news search latency: ILIKE scan vs. the tsvector/GIN full-text path.
+
+    DATABASE_URL=postgresql+asyncpg://.../scratch python -m benchmarks.bench_search --rows 2000000
+
+PostgreSQL only. Fills the news table of a scratch database with synthetic
+rows (generate_series, mixed tr/en), runs the search_tsv migration and times
+the same list/count queries the API issues through both backends.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import and_, func, select, text  # noqa: E402
+
+from app import api  # noqa: E402
+from app.db import Base, engine  # noqa: E402
+from app.migrations import add_search_tsv  # noqa: E402
+from app.models import News  # noqa: E402
+
+_FILL = """
+INSERT INTO news (source_name, title, url, url_hash, published_at, summary, content, language, tags, raw)
+SELECT 'bench-' || (g % 17),
+       (ARRAY['Gold','Silver','Oil','Copper','Wheat','Altın','Gümüş','Petrol'])[1 + g % 8]
+         || ' prices ' || (ARRAY['rise','fall','steady','surge','slip'])[1 + g % 5] || ' #' || g,
+       'https://example.com/' || g, md5(g::text) || md5((g * 7)::text),
+       now() - (g || ' minutes')::interval,
+       repeat('Markets watched central bank remarks and inflation data closely. ', 3)
+         || (ARRAY['miners','refineries','traders','farmers','ithalatçılar'])[1 + g % 5],
+       '', CASE WHEN g % 3 = 0 THEN 'tr' ELSE 'en' END, '', '{}'::jsonb
+FROM generate_series(1, :rows) AS g
+"""
+
+_TERMS = ["gold", "refineries", "surge copper", "ithalatçılar", "nonexistentterm"]
+
+
+async def _time(conn, stmt, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        (await conn.execute(stmt)).all()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=2_000_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--keep", action="store_true", help="reuse an already filled table")
+    args = ap.parse_args()
+    if engine.dialect.name != "postgresql":
+        sys.exit("bench_search needs a PostgreSQL DATABASE_URL")
+
+    if not args.keep:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            t0 = time.perf_counter()
+            await conn.execute(text(_FILL), {"rows": args.rows})
+            print(f"filled {args.rows} rows in {time.perf_counter() - t0:.1f}s")
+            t0 = time.perf_counter()
+            await conn.run_sync(add_search_tsv)
+            print(f"search_tsv migration in {time.perf_counter() - t0:.1f}s")
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("VACUUM ANALYZE news"))
+
+    print(f"{'term':>16} {'like list':>10} {'fts list':>10} {'fts rank':>10} {'like count':>11} {'fts count':>10}  (median ms)")
+    async with engine.connect() as conn:
+        for term in _TERMS:
+            row = []
+            for fts in (False, True):
+                conds, tsq = api._filters(term, None, None, None, None, None, fts)
+                row.append(await _time(conn, select(News.id).where(and_(*conds)).order_by(News.id.desc()).limit(50), args.repeat))
+                if fts:
+                    ranked = (select(News.id).where(and_(*conds))
+                              .order_by(func.ts_rank_cd(api._SEARCH_TSV, tsq).desc(), News.id.desc()).limit(50))
+                    row.append(await _time(conn, ranked, args.repeat))
+            for fts in (False, True):
+                conds, _ = api._filters(term, None, None, None, None, None, fts)
+                row.append(await _time(conn, select(func.count(News.id)).where(and_(*conds)), args.repeat))
+            print(f"{term:>16} " + " ".join(f"{v:10.1f}" for v in row))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+"""Dashboard volume charts: repeated /news/count queries vs. one /news/stats rollup query.
+
+    python -m benchmarks.bench_stats --rows 100000 --days 90
+
+Loads --rows synthetic stories spread over --days through save_items (so the
+news_stats rollup is maintained the way production does it), then builds a
+per-day x source chart and a per-day x tag chart both ways:
+
+  count   one count(News.id) per (day, source) / (day, tag), the /news/count filters
+  stats   one stats.query() each, as served by /news/stats
+
+and finally the ingest cost of keeping the rollup (save_items batches with
+and without stats.apply). Uses DATABASE_URL or a temporary SQLite file;
+tables are dropped and recreated, so point it at a scratch database.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SOURCES = ["Reuters Commodities", "Kitco Gold", "Bloomberg HT", "AA Ekonomi", "Investing Emtia", "Dünya Piyasa",
+           "Mining.com", "OilPrice"]
+HEADLINES = {"en": ["Gold climbs as dollar eases", "Oil slips on demand worries", "Copper rallies on China data",
+                    "Silver and platinum edge higher", "Wheat futures fall", "Natural gas jumps"],
+             "tr": ["Altın yükselişte", "Petrol fiyatları düştü", "Bakır talebi arttı", "Gümüş yatay seyretti",
+                    "Buğday fiyatları geriledi", "Doğalgaz zamlandı"]}
+CHART_TAGS = ["gold", "oil", "copper", "altın", "petrol"]
+
+
+def make_items(rnd, n: int, start: int, days: int, end: datetime):
+    from app.sources.base import Item
+    out = []
+    for i in range(start, start + n):
+        lang = rnd.choice(["en", "tr"])
+        when = end - timedelta(seconds=rnd.randrange(days * 86400))
+        out.append(Item(rnd.choice(SOURCES), f"{rnd.choice(HEADLINES[lang])} #{i}", f"https://example.com/n/{i}",
+                        when, "Markets moved as traders weighed the data.", "", lang, {}))
+    return out
+
+
+async def run(args):
+    from sqlalchemy import and_, func, select
+
+    from app import api, ingest, stats
+    from app.config import settings
+    from app.db import Base, SessionLocal, engine
+    from app.models import News
+
+    settings.DEDUP_ENABLED = False
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    rnd = random.Random(args.seed)
+    end = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    t0 = time.perf_counter()
+    for i in range(0, args.rows, 500):
+        async with SessionLocal() as session:
+            await ingest.save_items(session, make_items(rnd, min(500, args.rows - i), i, args.days, end))
+    print(f"{args.rows} stories over {args.days} days loaded in {time.perf_counter() - t0:.1f}s ({engine.dialect.name})")
+
+    days = [end - timedelta(days=d) for d in range(args.days, 0, -1)]
+    days = [stats.floor(d, "d") for d in days]
+    start = days[0]
+    for chart, dim, values in (("day x source", "source", SOURCES), ("day x tag", "tag", CHART_TAGS)):
+        async with SessionLocal() as session:
+            t0 = time.perf_counter()
+            legacy = {}
+            for d in days:
+                for v in values:
+                    conds, _ = api._filters(None, v if dim == "source" else None, None, [v] if dim == "tag" else [],
+                                            d, d + timedelta(days=1), False)
+                    legacy[(d, v)] = (await session.execute(select(func.count(News.id)).where(and_(*conds)))).scalar()
+            count_s = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            stmt, _ = stats.query("day", [dim], None, None, CHART_TAGS if dim == "tag" else [], start,
+                                  start + timedelta(days=args.days), 100000)
+            rolled = {(stats.floor(b, "d"), v): n for b, v, n in (await session.execute(stmt)).all()}
+            stats_s = time.perf_counter() - t0
+        same = all(rolled.get(k, 0) == n for k, n in legacy.items())
+        print(f"{chart:13} count {len(legacy):6d} queries {count_s * 1000:9.1f} ms | stats 1 query {stats_s * 1000:7.1f} ms "
+              f"| {count_s / stats_s:6.0f}x  identical={same}")
+
+    timings = {"with": [], "without": []}
+    apply, next_id = stats.apply, 10 ** 7
+    for mode in ("without", "with", "without", "with"):
+        stats.apply = apply if mode == "with" else (lambda *a, **k: asyncio.sleep(0))
+        t0 = time.perf_counter()
+        for _ in range(args.batches):
+            async with SessionLocal() as session:
+                await ingest.save_items(session, make_items(rnd, 100, next_id, 2, end))
+            next_id += 100
+        timings[mode].append((time.perf_counter() - t0) / args.batches)
+    stats.apply = apply
+    w, wo = min(timings["with"]), min(timings["without"])
+    print(f"save_items, 100-item batch: {wo * 1000:.1f} ms without rollup, {w * 1000:.1f} ms with (+{(w / wo - 1):.0%})")
+    await engine.dispose()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100000)
+    ap.add_argument("--days", type=int, default=90)
+    ap.add_argument("--batches", type=int, default=20, help="100-item save_items batches per ingest timing")
+    ap.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Fan-out cost of stream.NewsHub.publish: one ingest batch to thousands of /news/stream subscribers.
+
+    python -m benchmarks.bench_stream --subscribers 5000 --events 50
+
+Subscribers get a seeded mix of filters (none, lang, source, one or two
+tags, tag_mode=all), so they collapse into ~100 filter groups the
+way real clients do. Each round publishes --events records (as the LISTEN
+task would after one commit) and drains every queue. The "naive" line
+matches and JSON-encodes per subscriber, i.e. what a handler doing its own
+filtering would cost. No database is touched.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import stream  # noqa: E402
+
+SOURCES = ["Reuters Commodities", "Kitco Gold", "Bloomberg HT", "AA Ekonomi", "Investing Emtia", "Dünya Piyasa"]
+TAGS = ["gold", "silver", "oil", "fed", "inflation", "fx", "copper", "bist", "opec", "rates"]
+
+
+def make_events(rnd, n: int, start: int):
+    out = []
+    for i in range(n):
+        rec = {"id": start + i, "source_name": rnd.choice(SOURCES), "title": f"Gold and oil move as markets react #{i}",
+               "url": f"https://example.com/{start + i}", "published_at": "2025-09-01T10:00:00+00:00",
+               "summary": "Spot gold rose 0.4% while silver slipped as traders weighed central bank remarks. " * 3,
+               "content": None, "language": rnd.choice(["en", "tr"]), "tags": ",".join(rnd.sample(TAGS, 2)),
+               "cluster_id": start + i}
+        out.append(("created" if rnd.random() < 0.9 else "updated", rec))
+    return out
+
+
+def make_filters(rnd, n: int):
+    out = []
+    for _ in range(n):
+        kind = rnd.random()
+        if kind < 0.3:
+            out.append({})
+        elif kind < 0.5:
+            out.append({"lang": rnd.choice(["en", "tr"])})
+        elif kind < 0.6:
+            out.append({"source": rnd.choice(SOURCES)})
+        elif kind < 0.9:
+            out.append({"tags": rnd.sample(TAGS, rnd.choice([1, 1, 2]))})
+        else:
+            out.append({"tags": rnd.sample(TAGS, 2), "tag_mode": "all"})
+    return out
+
+
+def naive(filters, events) -> int:
+    delivered = 0
+    for f in filters:
+        group = stream._Group(f.get("source"), f.get("lang"), frozenset(f.get("tags", ())), f.get("tag_mode") == "all")
+        frames = []
+        for kind, rec in events:
+            tags = frozenset(t.strip().lower() for t in (rec.get("tags") or "").split(",") if t.strip())
+            if group.matches(rec, tags):
+                frames.append(stream._frame(rec["id"], 0, kind, rec))
+        if frames:
+            b"".join(frames)
+            delivered += 1
+    return delivered
+
+
+async def run(args):
+    rnd = random.Random(args.seed)
+    stream.settings.STREAM_QUEUE_SIZE = args.rounds + 1
+    hub = stream.NewsHub()
+    hub.start = lambda: None  # no LISTEN task; publish() is driven directly
+    filters = make_filters(rnd, args.subscribers)
+    subs = [hub.subscribe(**f) for f in filters]
+    rounds = [make_events(rnd, args.events, 1 + r * args.events) for r in range(args.rounds)]
+    print(f"{len(subs)} subscribers in {len(hub._groups)} filter groups, {args.rounds} rounds x {args.events} events")
+
+    t0 = time.perf_counter()
+    delivered = sum(hub.publish(ev) for ev in rounds)
+    publish_s = time.perf_counter() - t0
+    nbytes = 0
+    for s in subs:
+        while not s.queue.empty():
+            nbytes += len(s.queue.get_nowait())
+    closed = sum(1 for s in subs if s.closed)
+    print(f"hub    {publish_s / args.rounds * 1000:9.2f} ms/batch  {delivered / publish_s:12.0f} deliveries/s  "
+          f"{nbytes / max(1, delivered):.0f} B/delivery  closed={closed}")
+
+    t0 = time.perf_counter()
+    delivered = sum(naive(filters, ev) for ev in rounds)
+    naive_s = time.perf_counter() - t0
+    print(f"naive  {naive_s / args.rounds * 1000:9.2f} ms/batch  {delivered / naive_s:12.0f} deliveries/s  "
+          f"({naive_s / publish_s:.0f}x slower)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--subscribers", type=int, default=5000)
+    ap.add_argument("--events", type=int, default=50, help="records per published batch (one ingest commit)")
+    ap.add_argument("--rounds", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=1)
+    asyncio.run(run(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
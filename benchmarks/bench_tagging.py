@@ -0,0 +1,86 @@
+"""Keyword tagging throughput: the old substring loop vs. the compiled taxonomy matcher.
+
+    python -m benchmarks.bench_tagging --articles 100000 --terms 2000
+
+Synthetic title+summary texts (mixed tr/en, with inflected Turkish forms and
+words like "turmoil" that contain a keyword). Runs both on the built-in
+keyword lists and on a taxonomy padded with --terms generated terms, and
+prints how often the two disagree.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tagging import Tagger, default_taxonomy  # noqa: E402
+
+EN_WORDS = ("markets traders turmoil prices rally boiling goldman silverware copperfield central bank inflation "
+            "gold silver oil crude brent copper wheat corn coffee sugar nickel natural gas rate cut").split()
+TR_WORDS = ("piyasa fiyatı altının petrolde bakırın gümüşün yükseldi düştü merkez bankası faiz enflasyon "
+            "altınbaş buğdaya kahvenin şekerde Altın Petrol İthalat ithalatçılar").split()
+
+
+def legacy_tag(pools, text: str, lang: str):
+    # The previous tag_by_keywords: one substring scan per keyword
+    text_l = (text or "").lower()
+    pool = pools["tr"] if (lang or "").startswith("tr") else pools["en"]
+    return sorted({kw for kw in pool if kw in text_l})
+
+
+def make_articles(n: int, seed: int):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        lang = "tr" if rnd.random() < 0.4 else "en"
+        words = TR_WORDS if lang == "tr" else EN_WORDS
+        out.append((" ".join(rnd.choice(words) for _ in range(rnd.randint(30, 70))), lang))
+    return out
+
+
+def padded(tax, terms: int, seed: int):
+    rnd = random.Random(seed)
+    tax = {k: dict(v) for k, v in tax.items()}
+    letters = "abcdefghijklmnoprstuvyz"
+    for i in range(terms):
+        word = "".join(rnd.choice(letters) for _ in range(rnd.randint(5, 12)))
+        tax[f"t{i}"] = {"tr" if i % 2 else "en": [word]}
+    return tax
+
+
+def run(label: str, articles, tax):
+    pools = {"tr": [t for v in tax.values() for t in v.get("tr", [])],
+             "en": [t for v in tax.values() for t in v.get("en", [])]}
+    t0 = time.perf_counter()
+    legacy = [legacy_tag(pools, text, lang) for text, lang in articles]
+    t_legacy = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    tagger = Tagger(tax)
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    new = [tagger.tag(text, lang) for text, lang in articles]
+    t_new = time.perf_counter() - t0
+    differ = sum(1 for a, b in zip(legacy, new) if a != b)
+    n = len(articles)
+    print(f"{label:>10}: legacy {n / t_legacy:9.0f} art/s   matcher {n / t_new:9.0f} art/s "
+          f"(x{t_legacy / t_new:.1f}, build {t_build * 1000:.0f}ms)   differing tag sets {differ / n:.0%}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--articles", type=int, default=100_000)
+    ap.add_argument("--terms", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    articles = make_articles(args.articles, args.seed)
+    base = default_taxonomy()
+    print(f"{args.articles} articles, avg {sum(len(t) for t, _ in articles) / len(articles):.0f} chars")
+    run("built-in", articles, base)
+    run(f"{args.terms} terms", articles, padded(base, args.terms, args.seed))
+
+
+if __name__ == "__main__":
+    main()
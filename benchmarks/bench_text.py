@@ -0,0 +1,104 @@
+"""Summaries/s of text.html_to_text vs. a BeautifulSoup tree per summary (the previous _clean_html).
+
+    python -m benchmarks.bench_text --docs 20000
+
+The corpus is generated (seeded) from the shapes feeds actually send:
+Google News link + <font> publisher blocks and <ol> story lists,
+WordPress excerpts (<p>, <img>, &#8217;, &hellip;, "The post ... appeared
+first on"), plain text with "S&P"/"AT&T", and a small share of markup the
+fast path hands to BeautifulSoup (<script>, HTML5-only entities). Every
+output is checked against BeautifulSoup before timing.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import text  # noqa: E402
+
+WORDS = ("gold silver oil prices rise fall as traders weigh Fed comments dollar yields inflation data miners "
+         "refiners OPEC output cut demand China imports record high ons altın petrol fiyatları yükseldi").split()
+PUBLISHERS = ["Reuters", "Bloomberg", "Kitco NEWS", "Investing.com", "Financial Times", "CNBC", "Dünya Gazetesi"]
+
+
+def _sentence(rnd, n=12):
+    return " ".join(rnd.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def _google(rnd):
+    href = f"https://news.google.com/rss/articles/CBMi{rnd.getrandbits(64):x}?oc=5"
+    if rnd.random() < 0.7:
+        return (f'<a href="{href}" target="_blank">{_sentence(rnd)}</a>&nbsp;&nbsp;'
+                f'<font color="#6f6f6f">{rnd.choice(PUBLISHERS)}</font>')
+    items = "".join(f'<li><a href="{href}{i}" target="_blank">{_sentence(rnd)}</a>&nbsp;&nbsp;'
+                    f'<font color="#6f6f6f">{rnd.choice(PUBLISHERS)}</font></li>' for i in range(rnd.randint(2, 5)))
+    return f"<ol>{items}</ol>"
+
+
+def _wordpress(rnd):
+    body = "".join(f"<p>{_sentence(rnd, 25)}&#8217;s {rnd.choice(WORDS)} &amp; {rnd.choice(WORDS)}&hellip;</p>"
+                   for _ in range(rnd.randint(1, 4)))
+    img = '<img width="300" height="200" src="https://example.com/a.jpg" class="wp-post-image" alt="" />'
+    return (f"{img if rnd.random() < 0.5 else ''}{body}<p>The post <a href=\"https://example.com/p\" "
+            f"rel=\"nofollow\">{_sentence(rnd, 6)}</a> appeared first on <a href=\"https://example.com\">Site</a>.</p>")
+
+
+def _plain(rnd):
+    return f"{_sentence(rnd, 30)}. S&P 500 and AT&T shares {rnd.choice(WORDS)} <3% intraday."
+
+
+def _odd(rnd):
+    return rnd.choice([
+        f"<p>{_sentence(rnd)}</p><script>var x = '<b>';</script>",
+        f"{_sentence(rnd)} &rarrw; {_sentence(rnd)}",
+        f"<p>{_sentence(rnd)} &#150; {_sentence(rnd)}</p>",
+        f"<div>{_sentence(rnd)}<br",
+    ])
+
+
+def make_corpus(n: int, seed: int):
+    rnd = random.Random(seed)
+    kinds = [(_google, 0.55), (_wordpress, 0.3), (_plain, 0.12), (_odd, 0.03)]
+    return [rnd.choices([k for k, _ in kinds], [w for _, w in kinds])[0](rnd) for _ in range(n)]
+
+
+def legacy_clean_html(summary: str) -> str:
+    try:
+        try:
+            from bs4 import BeautifulSoup  # type: ignore
+        except Exception:
+            return summary or ""
+        return BeautifulSoup(summary or "", "html.parser").get_text(" ", strip=True)
+    except Exception:
+        return summary or ""
+
+
+def _rate(fn, docs) -> float:
+    t0 = time.perf_counter()
+    for d in docs:
+        fn(d)
+    return len(docs) / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=20000)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+    docs = make_corpus(args.docs, args.seed)
+    mismatches = sum(1 for d in docs if text.html_to_text(d) != legacy_clean_html(d))
+    fallback = sum(1 for d in docs if text._fast(d) is None)
+    print(f"{len(docs)} summaries, avg {sum(map(len, docs)) / len(docs):.0f} chars; "
+          f"mismatches={mismatches} bs4 fallback={fallback / len(docs):.1%}")
+    legacy = _rate(legacy_clean_html, docs)
+    fast = _rate(text.html_to_text, docs)
+    print(f"BeautifulSoup {legacy:10.0f} docs/s")
+    print(f"html_to_text  {fast:10.0f} docs/s  ({fast / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()